@@ -4,6 +4,7 @@ import sys
 import logging
 
 from pcs import (
+    batch,
     settings,
     usage,
     utils,
@@ -225,6 +226,9 @@ def main(argv=None):
         "booth": booth.booth_cmd,
         "host": host.host_cmd,
         "client": client.client_cmd,
+        "batch": lambda lib, argv, modifiers: batch.batch_cmd(
+            lib, argv, modifiers, main
+        ),
         "help": lambda lib, argv, modifiers: usage.main(),
     }
     try:
@@ -0,0 +1,195 @@
+import shlex
+import sys
+import tempfile
+
+from pcs import usage, utils
+from pcs.cli.common.errors import CmdLineInputError
+from pcs.cli.common.parse_args import filter_out_options
+from pcs.lib import reports
+from pcs.lib.cib.tools import get_cib_crm_feature_set
+from pcs.lib.env import MIN_FEATURE_SET_VERSION_FOR_DIFF
+from pcs.lib.errors import LibraryError
+from pcs.lib.pacemaker.live import (
+    diff_cibs,
+    get_cib,
+    push_cib_diff_xml,
+    replace_cib_configuration,
+    wait_for_idle,
+)
+
+# Commands which only change the CIB. They can be run against a CIB file and
+# their changes pushed to the cluster at once. Commands working with the live
+# cluster (e.g. resource cleanup, stonith fence) and commands waiting for the
+# cluster (--wait) are not allowed. Resource and stonith delete stop the
+# resources in the live cluster before removing them, which they skip with -f,
+# so they are not allowed either.
+BATCH_COMMANDS = {
+    "acl": ("enable", "disable", "role", "user", "group", "permission"),
+    "alert": (
+        "create", "update", "delete", "remove",
+        "recipient add", "recipient update", "recipient delete",
+        "recipient remove",
+    ),
+    "constraint": (
+        "location", "order", "colocation add", "colocation remove",
+        "colocation delete", "colocation set", "ticket add", "ticket set",
+        "ticket delete", "ticket remove", "delete", "remove", "rule",
+    ),
+    "property": ("set", "unset"),
+    "resource": (
+        "create", "update", "meta", "group add", "group remove",
+        "group delete", "ungroup", "clone", "promotable",
+        "unclone", "enable", "disable", "manage", "unmanage", "clear",
+        "op add", "op remove", "op delete", "op defaults", "defaults",
+        "utilization", "bundle create", "bundle reset", "bundle update",
+        "relocate clear",
+    ),
+    "stonith": (
+        "create", "update", "enable", "disable", "level add", "level clear",
+        "level remove", "level delete",
+    ),
+}
+
+def batch_cmd(lib, argv, modifiers, run_pcs):
+    """
+    Options:
+      * --wait - wait for the cluster to apply all the changes
+      * -f - CIB file
+
+    callable run_pcs -- runs one pcs command, takes its arguments
+    """
+    del lib
+    if argv and argv[0] == "help":
+        usage.batch([])
+        return
+    modifiers.ensure_only_supported("--wait", "-f")
+    if len(argv) != 1:
+        raise CmdLineInputError()
+    wait_timeout = None
+    if modifiers.is_specified("--wait"):
+        wait_timeout = utils.validate_wait_get_timeout()
+
+    command_list = load_commands(argv[0])
+    cib_original_xml = utils.get_cib()
+    with tempfile.NamedTemporaryFile(mode="w+", suffix=".xml") as cib_file:
+        cib_file.write(cib_original_xml)
+        cib_file.flush()
+        for line_number, command in command_list:
+            if not _run_command(run_pcs, cib_file.name, command):
+                utils.err(
+                    "Command on line {0} failed: '{1}', no changes have been "
+                    "made".format(line_number, " ".join(command))
+                )
+        # pacemaker tools may replace the file, do not read the stale one
+        with open(cib_file.name) as new_cib_file:
+            cib_new_xml = new_cib_file.read()
+
+    if utils.usefile:
+        try:
+            with open(utils.filename, "w") as target_file:
+                target_file.write(cib_new_xml)
+        except EnvironmentError as e:
+            utils.err(
+                "Unable to write CIB file '{0}': {1}".format(
+                    utils.filename, e.strerror
+                )
+            )
+        return
+
+    try:
+        runner = utils.cmd_runner()
+        _push_cib(
+            runner, utils.get_report_processor(), cib_original_xml, cib_new_xml
+        )
+        if modifiers.is_specified("--wait"):
+            wait_for_idle(runner, wait_timeout)
+    except LibraryError as e:
+        utils.process_library_reports(e.args)
+
+def load_commands(path):
+    """
+    Return a list of (line number, command arguments) tuples read from a file
+
+    string path -- path to the file, "-" for stdin
+    """
+    try:
+        if path == "-":
+            content = sys.stdin.read()
+        else:
+            with open(path) as batch_file:
+                content = batch_file.read()
+    except EnvironmentError as e:
+        utils.err(
+            "Unable to read batch file '{0}': {1}".format(path, e.strerror)
+        )
+
+    command_list = []
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        try:
+            command = shlex.split(line, comments=True)
+        except ValueError as e:
+            utils.err("Unable to parse line {0}: {1}".format(line_number, e))
+        # allow pasting commands from scripts
+        if command and command[0] == "pcs":
+            command = command[1:]
+        if not command:
+            continue
+        _check_command(line_number, command)
+        command_list.append((line_number, command))
+    return command_list
+
+def _check_command(line_number, command):
+    args = filter_out_options(command)
+    command_name = (args or [""])[0]
+    if command_name not in BATCH_COMMANDS:
+        reason = "supported commands are {0}".format(
+            ", ".join(sorted(BATCH_COMMANDS))
+        )
+    elif not any(
+        args[1:len(subcommand.split()) + 1] == subcommand.split()
+        for subcommand in BATCH_COMMANDS[command_name]
+    ):
+        reason = "only commands changing the CIB are supported"
+    elif any(
+        arg == "--wait" or arg.startswith("--wait=") for arg in command
+    ):
+        reason = "use --wait of the batch to wait for the changes"
+    else:
+        return
+    utils.err(
+        "Command on line {0} cannot be used in a batch: '{1}', {2}".format(
+            line_number, " ".join(command), reason
+        )
+    )
+
+def _run_command(run_pcs, cib_file_name, command):
+    # Commands change module level state of pcs.utils, keep the batch's one.
+    pcs_options = utils.pcs_options
+    usefile = utils.usefile
+    filename = utils.filename
+    try:
+        run_pcs(["-f", cib_file_name] + command)
+    except SystemExit as e:
+        return e.code in (None, 0)
+    finally:
+        utils.pcs_options = pcs_options
+        utils.usefile = usefile
+        utils.filename = filename
+    return True
+
+def _push_cib(runner, report_processor, cib_original_xml, cib_new_xml):
+    cib_new = get_cib(cib_new_xml)
+    feature_set = get_cib_crm_feature_set(get_cib(cib_original_xml))
+    if feature_set < MIN_FEATURE_SET_VERSION_FOR_DIFF:
+        report_processor.process(
+            reports.cib_push_forced_full_due_to_crm_feature_set(
+                MIN_FEATURE_SET_VERSION_FOR_DIFF, feature_set
+            )
+        )
+        replace_cib_configuration(runner, cib_new)
+        return
+    cib_diff_xml = diff_cibs(
+        runner, report_processor, cib_original_xml, cib_new
+    )
+    if cib_diff_xml:
+        push_cib_diff_xml(runner, cib_diff_xml)
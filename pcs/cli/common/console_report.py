@@ -616,6 +616,15 @@ CODE_TO_MESSAGE_BUILDER_MAP = {
         ).format(**info)
     ,
 
+    codes.NODE_COMMUNICATION_CANCELLED: lambda info:
+        (
+            "Communication with {_nodes} has been cancelled due to previous "
+            "errors, the operation may not have been performed there"
+        ).format(
+            _nodes=format_list(info["node_list"]),
+        )
+    ,
+
     codes.NODE_COMMUNICATION_NO_MORE_ADDRESSES: lambda info:
         "Unable to connect to '{node}' via any of its addresses".format(**info)
     ,
@@ -1098,6 +1107,26 @@ CODE_TO_MESSAGE_BUILDER_MAP = {
         .format(**info)
     ,
 
+    codes.CIB_PUSH_ATTEMPT: lambda info:
+        "Pushing CIB changes, attempt {attempt} of {max_attempts}"
+        .format(**info)
+    ,
+
+    codes.CIB_PUSH_CONFLICT: lambda info:
+        (
+            "CIB has been changed by someone else since it was loaded "
+            "(attempt {attempt} of {max_attempts}), repeating the changes on "
+            "the current CIB in {retry_delay:.2f}s"
+        ).format(**info)
+    ,
+
+    codes.CIB_PUSH_CONFLICT_ATTEMPTS_EXHAUSTED: lambda info:
+        (
+            "Unable to push CIB changes, CIB has been changed by someone else "
+            "during each of {attempts} attempts"
+        ).format(**info)
+    ,
+
     codes.CIB_DIFF_ERROR: lambda info:
         "Unable to diff CIB: {reason}\n{cib_new}"
         .format(**info)
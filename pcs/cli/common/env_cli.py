@@ -2,6 +2,7 @@ class Env():
     #pylint: disable=too-many-instance-attributes, too-few-public-methods
     def __init__(self):
         self.cib_data = None
+        self.cib_snapshot = None
         self.user = None
         self.groups = None
         self.corosync_conf_data = None
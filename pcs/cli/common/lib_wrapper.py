@@ -47,6 +47,8 @@ def cli_env_to_lib_env(cli_env):
         booth=cli_env.booth,
         known_hosts_getter=cli_env.known_hosts_getter,
         request_timeout=cli_env.request_timeout,
+        debug=cli_env.debug,
+        cib_snapshot=cli_env.cib_snapshot,
     )
 
 def lib_env_to_cli_env(lib_env, cli_env):
@@ -2591,6 +2591,49 @@ class IdNotFound(NameBuildTest):
         )
 
 
+class CibPushAttempt(NameBuildTest):
+    code = codes.CIB_PUSH_ATTEMPT
+    def test_success(self):
+        self.assert_message_from_info(
+            "Pushing CIB changes, attempt 2 of 5",
+            {
+                "attempt": 2,
+                "max_attempts": 5,
+            }
+        )
+
+
+class CibPushConflict(NameBuildTest):
+    code = codes.CIB_PUSH_CONFLICT
+    def test_success(self):
+        self.assert_message_from_info(
+            (
+                "CIB has been changed by someone else since it was loaded "
+                "(attempt 1 of 5), repeating the changes on the current CIB "
+                "in 0.15s"
+            ),
+            {
+                "attempt": 1,
+                "max_attempts": 5,
+                "retry_delay": 0.15234,
+            }
+        )
+
+
+class CibPushConflictAttemptsExhausted(NameBuildTest):
+    code = codes.CIB_PUSH_CONFLICT_ATTEMPTS_EXHAUSTED
+    def test_success(self):
+        self.assert_message_from_info(
+            (
+                "Unable to push CIB changes, CIB has been changed by someone "
+                "else during each of 5 attempts"
+            ),
+            {
+                "attempts": 5,
+            }
+        )
+
+
 class CibPushForcedFullDueToCrmFeatureSet(NameBuildTest):
     code = codes.CIB_PUSH_FORCED_FULL_DUE_TO_CRM_FEATURE_SET
     def test_success(self):
@@ -2637,6 +2680,18 @@ class NodeCommunicationNoMoreAddresses(NameBuildTest):
             )
         )
 
+class NodeCommunicationCancelled(NameBuildTest):
+    code = codes.NODE_COMMUNICATION_CANCELLED
+    def test_success(self):
+        self.assert_message_from_report(
+            (
+                "Communication with 'node1', 'node2' has been cancelled due to "
+                "previous errors, the operation may not have been performed "
+                "there"
+            ),
+            reports.node_communication_cancelled(["node2", "node1"])
+        )
+
 class HostNotFound(NameBuildTest):
     code = codes.HOST_NOT_FOUND
     def test_single_host(self):
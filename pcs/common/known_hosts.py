@@ -0,0 +1,175 @@
+import fcntl
+import json
+import os
+import os.path
+import threading
+
+from pcs import settings
+from pcs.common.host import PcsKnownHost
+
+
+CURRENT_FORMAT = 1
+
+
+class KnownHostsParseError(Exception):
+    pass
+
+
+def get_known_hosts_file_path():
+    """
+    Return a path of the known-hosts file of the current user
+
+    Pcsd (running as root) and root use the pcsd's file, other users have their
+    own file in their home directory. This is the same logic pcsd uses.
+    """
+    if os.getuid() == 0:
+        return settings.pcsd_known_hosts_location
+    return os.path.expanduser(settings.pcs_known_hosts_user_location)
+
+
+class KnownHostsFile:
+    """
+    Reader and writer of a known-hosts file keeping its parsed content in memory
+
+    The file is parsed again only if it has been replaced or modified since it
+    was read the last time, which is detected by its inode, mtime and size.
+    """
+    def __init__(self, path):
+        """
+        string path -- path of the known-hosts file
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._data_version = 0
+        self._known_hosts = {}
+
+    @property
+    def path(self):
+        return self._path
+
+    def get_known_hosts(self):
+        """
+        Return a dict {host name: PcsKnownHost}
+
+        If the file does not exist, it is considered to be empty. If the file
+        cannot be parsed, KnownHostsParseError is raised and the file is
+        considered to be empty until it changes.
+        """
+        with self._lock:
+            self._refresh()
+            return dict(self._known_hosts)
+
+    def get_data_version(self):
+        with self._lock:
+            self._refresh()
+            return self._data_version
+
+    def save(self, known_hosts, data_version):
+        """
+        Overwrite the file by the specified hosts
+
+        iterable known_hosts -- PcsKnownHost instances to be saved
+        int data_version -- version of the file content
+        """
+        text = _export(known_hosts, data_version)
+        with self._lock:
+            dirname = os.path.dirname(self._path)
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname, mode=0o700)
+            file_descriptor = os.open(
+                self._path, os.O_WRONLY | os.O_CREAT, 0o600
+            )
+            with os.fdopen(file_descriptor, "w") as a_file:
+                # Lock the file before truncating it so that a reader never
+                # gets an incomplete content.
+                fcntl.flock(a_file.fileno(), fcntl.LOCK_EX)
+                a_file.truncate()
+                a_file.write(text)
+                a_file.flush()
+                self._stat_key = _get_stat_key(os.fstat(a_file.fileno()))
+            self._data_version = data_version
+            self._known_hosts = {host.name: host for host in known_hosts}
+
+    def _refresh(self):
+        try:
+            if _get_stat_key(os.stat(self._path)) == self._stat_key:
+                return
+            with open(self._path) as a_file:
+                # The file may be written by pcsd at the same time.
+                fcntl.flock(a_file.fileno(), fcntl.LOCK_SH)
+                text = a_file.read()
+                stat_key = _get_stat_key(os.fstat(a_file.fileno()))
+        except FileNotFoundError:
+            self._stat_key = None
+            self._data_version = 0
+            self._known_hosts = {}
+            return
+
+        self._stat_key = stat_key
+        # Consider the file empty until it changes if it cannot be parsed.
+        self._data_version = 0
+        self._known_hosts = {}
+        self._data_version, self._known_hosts = _parse(text)
+
+
+def _get_stat_key(stat_result):
+    return (
+        stat_result.st_dev,
+        stat_result.st_ino,
+        stat_result.st_mtime_ns,
+        stat_result.st_size,
+    )
+
+
+def _parse(text):
+    if not text.strip():
+        return 0, {}
+    try:
+        data = json.loads(text)
+        if data["format_version"] != CURRENT_FORMAT:
+            raise KnownHostsParseError(
+                "Unsupported format_version '{0}'".format(
+                    data["format_version"]
+                )
+            )
+        return (
+            data["data_version"],
+            {
+                name: PcsKnownHost.from_known_host_file_dict(name, host)
+                for name, host in data["known_hosts"].items()
+            }
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise KnownHostsParseError(str(e))
+
+
+def _export(known_hosts, data_version):
+    return json.dumps(
+        {
+            "format_version": CURRENT_FORMAT,
+            "data_version": data_version,
+            "known_hosts": dict(
+                host.to_known_host_dict()
+                for host in sorted(known_hosts, key=lambda host: host.name)
+            ),
+        },
+        indent=2
+    )
+
+
+_known_hosts_file_dict = {}
+_known_hosts_file_dict_lock = threading.Lock()
+
+def get_known_hosts_file(path=None):
+    """
+    Return a KnownHostsFile instance shared by all its users in the process
+
+    string path -- path of the file, the current user's file by default
+    """
+    if path is None:
+        path = get_known_hosts_file_path()
+    with _known_hosts_file_dict_lock:
+        if path not in _known_hosts_file_dict:
+            _known_hosts_file_dict[path] = KnownHostsFile(path)
+        return _known_hosts_file_dict[path]
@@ -1,7 +1,11 @@
+import asyncio
 import base64
+import heapq
 import io
+import itertools
 import re
-from collections import namedtuple
+from collections import defaultdict, deque, namedtuple
+from time import monotonic
 from urllib.parse import urlencode
 
 # We should ignore SIGPIPE when using pycurl.NOSIGNAL - see the libcurl tutorial
@@ -121,6 +125,35 @@ class Request():
         """
         self._current_dest = next(self._current_dest_iterator)
 
+    def prefer_dest(self, dest):
+        """
+        Make the specified host connection the current one. The other
+        connections of the target remain available in their original order.
+
+        Destination dest -- one of the target's host connections
+        """
+        self._current_dest_iterator = iter([
+            target_dest for target_dest in self._target.dest_list
+            if target_dest != dest
+        ])
+        self._current_dest = dest
+
+    def for_dest(self, dest):
+        """
+        Return a copy of this request which uses only the specified host
+        connection
+
+        Destination dest -- host connection to use
+        """
+        return Request(
+            RequestTarget(
+                self._target.label,
+                token=self._target.token,
+                dest_list=[dest],
+            ),
+            self._data
+        )
+
     @property
     def url(self):
         """
@@ -250,27 +283,159 @@ class Response():
             self.response_code,
         )
 
+class ConnectionPool():
+    """
+    This class holds curl resources shared by Communicator instances: the DNS
+    cache, the TLS session cache and, if supported by libcurl, the cache of
+    keep-alive connections. So contacting the same node repeatedly does not
+    cost a DNS lookup, a TCP connect and a full TLS handshake every time.
+
+    The instances of this class are not thread-safe, see Communicator.
+    """
+    max_connections_default = 32
+    max_idle_time_default = 60 # in seconds
+
+    def __init__(self, max_connections=None, max_idle_time=None):
+        """
+        int max_connections -- maximal number of kept open connections
+        int max_idle_time -- drop cached connections, DNS records and TLS
+            sessions if the pool has not been used for this number of seconds
+        """
+        self._max_connections = (
+            max_connections
+            if max_connections is not None
+            else self.max_connections_default
+        )
+        self._max_idle_time = (
+            max_idle_time
+            if max_idle_time is not None
+            else self.max_idle_time_default
+        )
+        self._share = _create_share()
+        self._last_used = monotonic()
+
+    def setup_multi_handle(self, multi_handle):
+        """
+        Set up a curl multi handle to respect the limits of the pool
+
+        pycurl.CurlMulti multi_handle -- multi handle to set up
+        """
+        multi_handle.setopt(pycurl.M_MAXCONNECTS, self._max_connections)
+
+    def setup_handle(self, handle):
+        """
+        Set up a curl easy handle to use the shared resources
+
+        pycurl.Curl handle -- easy handle to set up
+        """
+        now = monotonic()
+        if now - self._last_used > self._max_idle_time:
+            # Connections are closed once all handles using the old share are
+            # gone.
+            self._share = _create_share()
+        handle.setopt(pycurl.SHARE, self._share)
+        handle.setopt(pycurl.MAXCONNECTS, self._max_connections)
+        # Supported since libcurl 7.65.0
+        if hasattr(pycurl, "MAXAGE_CONN") and _is_libcurl_at_least(7, 65):
+            handle.setopt(pycurl.MAXAGE_CONN, self._max_idle_time)
+        self._last_used = now
+
+    def handle_finished(self):
+        """
+        Mark the pool as used when a request using it is finished
+        """
+        self._last_used = monotonic()
+
+
 class NodeCommunicatorFactory():
-    def __init__(self, communicator_logger, user, groups, request_timeout):
+    # The factory holds the settings of all communicators it creates.
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self, communicator_logger, user, groups, request_timeout,
+        connection_pool=None, max_in_flight=None, max_in_flight_per_host=None,
+        address_stagger=None, debug=False, debug_max_size=None
+    ):
+        # pylint: disable=too-many-arguments
         self._logger = communicator_logger
         self._user = user
         self._groups = groups
         self._request_timeout = request_timeout
+        self._connection_pool = (
+            connection_pool if connection_pool is not None
+            else ConnectionPool()
+        )
+        self._max_in_flight = (
+            max_in_flight if max_in_flight is not None
+            else settings.default_request_max_in_flight
+        )
+        self._max_in_flight_per_host = (
+            max_in_flight_per_host if max_in_flight_per_host is not None
+            else settings.default_request_max_in_flight_per_host
+        )
+        # Delay before racing the next address of a node, None turns racing
+        # off. Communicators race addresses only if they are asked to.
+        self._address_stagger = address_stagger
+        # Addresses successfully used by multiaddress communicators, so the
+        # working address of a host is tried first by the following requests.
+        self._preferred_dest_map = {}
+        self._debug = debug
+        self._debug_max_size = (
+            debug_max_size if debug_max_size is not None
+            else settings.default_request_debug_max_size
+        )
 
     def get_communicator(self, request_timeout=None):
         return self.get_simple_communicator(request_timeout=request_timeout)
 
     def get_simple_communicator(self, request_timeout=None):
-        timeout = request_timeout if request_timeout else self._request_timeout
-        return Communicator(
-            self._logger, self._user, self._groups, request_timeout=timeout
+        return self.__create_communicator(Communicator, request_timeout)
+
+    def get_multiaddress_communicator(
+        self, request_timeout=None, race_addresses=False
+    ):
+        """
+        bool race_addresses -- try more addresses of a node in parallel, only
+            for requests which can be safely processed more times by a node
+        """
+        return self.__create_communicator(
+            MultiaddressCommunicator,
+            request_timeout,
+            address_stagger=(
+                self._address_stagger if race_addresses else None
+            ),
+            preferred_dest_map=self._preferred_dest_map,
         )
 
-    def get_multiaddress_communicator(self, request_timeout=None):
-        timeout = request_timeout if request_timeout else self._request_timeout
-        return MultiaddressCommunicator(
-            self._logger, self._user, self._groups, request_timeout=timeout
+    def get_async_communicator(self, request_timeout=None):
+        return self.__create_communicator(AsyncCommunicator, request_timeout)
+
+    def get_async_multiaddress_communicator(
+        self, request_timeout=None, race_addresses=False
+    ):
+        """
+        bool race_addresses -- see get_multiaddress_communicator
+        """
+        return self.__create_communicator(
+            AsyncMultiaddressCommunicator,
+            request_timeout,
+            address_stagger=(
+                self._address_stagger if race_addresses else None
+            ),
+            preferred_dest_map=self._preferred_dest_map,
+        )
 
+    def __create_communicator(
+        self, communicator_class, request_timeout, **kwargs
+    ):
+        timeout = request_timeout if request_timeout else self._request_timeout
+        return communicator_class(
+            self._logger, self._user, self._groups, request_timeout=timeout,
+            connection_pool=self._connection_pool,
+            max_in_flight=self._max_in_flight,
+            max_in_flight_per_host=self._max_in_flight_per_host,
+            debug=self._debug,
+            debug_max_size=self._debug_max_size,
+            **kwargs
         )
 
 
@@ -280,9 +445,32 @@ class Communicator():
     The instances of this class are not thread-safe! It is intended to use it
     only in a single thread. Use an unique instance for each thread.
     """
+    # Limits, pooling and debugging of requests are set per communicator.
+    # pylint: disable=too-many-instance-attributes
     curl_multi_select_timeout_default = 0.8 # in seconds
 
-    def __init__(self, communicator_logger, user, groups, request_timeout=None):
+    def __init__(
+        self, communicator_logger, user, groups, request_timeout=None,
+        connection_pool=None, max_in_flight=None, max_in_flight_per_host=None,
+        debug=False, debug_max_size=0
+    ):
+        # pylint: disable=too-many-arguments
+        """
+        CommunicatorLoggerInterface communicator_logger
+        string user -- CIB user
+        list groups -- CIB user groups
+        int request_timeout -- request timeout in seconds
+        ConnectionPool connection_pool -- share DNS cache, TLS sessions and
+            connections with other communicators
+        int max_in_flight -- maximal number of requests running at the same
+            time, other requests wait in a queue, None or 0 means no limit
+        int max_in_flight_per_host -- maximal number of requests running at
+            the same time against one address, None or 0 means no limit
+        bool debug -- capture curl debug output of requests, otherwise
+            Response.debug is empty
+        int debug_max_size -- keep only this number of last bytes of the debug
+            output of each request, None or 0 means no limit
+        """
         self._logger = communicator_logger
         self._auth_cookies = _get_auth_cookies(user, groups)
         self._request_timeout = (
@@ -290,12 +478,26 @@ class Communicator():
             if request_timeout is not None
             else settings.default_request_timeout
         )
+        self._connection_pool = connection_pool
         self._multi_handle = pycurl.CurlMulti()
+        if self._connection_pool:
+            self._connection_pool.setup_multi_handle(self._multi_handle)
         self._is_running = False
         # This is used just for storing references of curl easy handles.
         # We need to have references for all the handles, so they don't be
         # cleaned up by the garbage collector.
         self._easy_handle_list = []
+        self._max_in_flight = max_in_flight
+        self._max_in_flight_per_host = max_in_flight_per_host
+        # Handles waiting for a free slot to be added to the multi handle
+        self._queued_handle_list = deque()
+        self._in_flight_handle_set = set()
+        self._in_flight_per_dest = defaultdict(int)
+        self._debug = debug
+        self._debug_max_size = debug_max_size
+        # heap of (time, sequence number, callback) of scheduled callbacks
+        self._timer_list = []
+        self._timer_counter = itertools.count()
 
     def add_requests(self, request_list):
         """
@@ -304,18 +506,93 @@ class Communicator():
         getting responses from generator.  Requests are not performed after
         calling this method, but only when generator returned by start_loop
         method is in progress (returned at least one response and not raised
-        StopIteration exception).
+        StopIteration exception). Requests exceeding the in-flight limits wait
+        in the queue until some of the running requests finish.
 
         list request_list -- Request objects to add to the queue
         """
         for request in request_list:
-            handle = _create_request_handle(
-                request, self._auth_cookies, self._request_timeout,
-            )
-            self._easy_handle_list.append(handle)
-            self._multi_handle.add_handle(handle)
-            if self._is_running:
-                self._logger.log_request_start(request)
+            self._add_request(request)
+
+    def _add_request(self, request):
+        """
+        Add a request to the queue and return its curl easy handle
+
+        Request request -- request to add
+        """
+        handle = _create_request_handle(
+            request, self._auth_cookies, self._request_timeout,
+        )
+        if self._connection_pool:
+            self._connection_pool.setup_handle(handle)
+        if self._debug:
+            enable_debug_capture(handle, self._debug_max_size)
+        self._easy_handle_list.append(handle)
+        self._queued_handle_list.append(handle)
+        if self._is_running:
+            self.__start_queued_handles()
+        return handle
+
+    def cancel_requests(self, request_list):
+        """
+        Stop processing the specified requests, no responses are returned for
+        them. Requests which have already finished are ignored.
+
+        list request_list -- Request objects added by add_requests
+        """
+        for handle in list(self._easy_handle_list):
+            if _contains(request_list, handle.request_obj):
+                self._cancel_handle(handle)
+
+    def call_later(self, delay, callback):
+        """
+        Call the specified callback from the loop after delay seconds. The
+        callback may add or cancel requests. Callbacks which are due after all
+        requests have finished are never called.
+
+        float delay -- number of seconds to wait
+        callable callback -- function with no arguments
+        """
+        heapq.heappush(
+            self._timer_list,
+            (monotonic() + delay, next(self._timer_counter), callback)
+        )
+
+    def _cancel_handle(self, handle):
+        """
+        Stop processing a request, no response is returned for it
+
+        pycurl.Curl handle -- curl easy handle of a request to be cancelled
+        """
+        if handle in self._in_flight_handle_set:
+            self._multi_handle.remove_handle(handle)
+            self.__handle_finished(handle)
+        elif handle in self._queued_handle_list:
+            self._queued_handle_list.remove(handle)
+        else:
+            return
+        self._easy_handle_list.remove(handle)
+        if self._is_running:
+            self.__start_queued_handles()
+
+    def _get_timers_timeout(self):
+        """
+        Return number of seconds until _run_timers should be called or None if
+        there is no need for it
+        """
+        if not self._timer_list:
+            return None
+        return max(0, self._timer_list[0][0] - monotonic())
+
+    def _run_timers(self):
+        """
+        Called in every iteration of the loop, allows to start or cancel
+        requests based on time
+        """
+        now = monotonic()
+        while self._timer_list and self._timer_list[0][0] <= now:
+            dummy_time, dummy_seq, callback = heapq.heappop(self._timer_list)
+            callback()
 
     def start_loop(self):
         """
@@ -340,30 +617,90 @@ class Communicator():
             # if needed, add some new requests to the queue
             com.add_requests([Request(...)])
         """
+        for response in self._run_loop():
+            if response is None:
+                self.__wait_for_multi_handle()
+            else:
+                yield response
+
+    def _run_loop(self):
+        """
+        Return a generator processing the requests. It yields responses and
+        None when there is nothing to do until there is an activity on the
+        network or a timer expires. The waiting itself is up to the caller, so
+        the same loop can be driven in a blocking or an asynchronous way.
+        """
         if self._is_running:
             raise AssertionError("Method start_loop already running")
         self._is_running = True
-        for handle in self._easy_handle_list:
-            self._logger.log_request_start(handle.request_obj)
+        self.__start_queued_handles()
 
         finished_count = 0
         while finished_count < len(self._easy_handle_list):
-            self.__multi_perform()
-            self.__wait_for_multi_handle()
+            self._perform()
+            yield None
+            self._run_timers()
             response_list = self.__get_all_ready_responses()
             for response in response_list:
+                if response.handle not in self._in_flight_handle_set:
+                    # the request has been cancelled in the meantime
+                    continue
+                finished_count += 1
                 # free up memory for next usage of this Communicator instance
                 self._multi_handle.remove_handle(response.handle)
+                self.__handle_finished(response.handle)
+                if self._connection_pool:
+                    self._connection_pool.handle_finished()
                 self._logger.log_response(response)
+                # a slot has been freed, start a waiting request if any
+                self.__start_queued_handles()
                 yield response
                 # if something was added to the queue in the meantime, run it
                 # immediately, so we don't need to wait until all responses will
                 # be processed
-                self.__multi_perform()
-            finished_count += len(response_list)
+                self._perform()
         self._easy_handle_list = []
+        self._timer_list = []
         self._is_running = False
 
+    def __can_start(self, handle):
+        if (
+            self._max_in_flight
+            and
+            len(self._in_flight_handle_set) >= self._max_in_flight
+        ):
+            return False
+        return not (
+            self._max_in_flight_per_host
+            and
+            self._in_flight_per_dest[handle.request_obj.dest]
+                >=
+                self._max_in_flight_per_host
+        )
+
+    def __start_queued_handles(self):
+        postponed_handle_list = []
+        while self._queued_handle_list and (
+            not self._max_in_flight
+            or
+            len(self._in_flight_handle_set) < self._max_in_flight
+        ):
+            handle = self._queued_handle_list.popleft()
+            if not self.__can_start(handle):
+                # The address is busy, keep the handle waiting and try to
+                # start requests to other addresses.
+                postponed_handle_list.append(handle)
+                continue
+            self._in_flight_handle_set.add(handle)
+            self._in_flight_per_dest[handle.request_obj.dest] += 1
+            self._multi_handle.add_handle(handle)
+            self._logger.log_request_start(handle.request_obj)
+        self._queued_handle_list.extendleft(reversed(postponed_handle_list))
+
+    def __handle_finished(self, handle):
+        self._in_flight_handle_set.discard(handle)
+        self._in_flight_per_dest[handle.request_obj.dest] -= 1
+
     def __get_all_ready_responses(self):
         response_list = []
         repeat = True
@@ -379,8 +716,10 @@ class Communicator():
             repeat = num_queued > 0
         return response_list
 
-    def __multi_perform(self):
-        # run all internal operation required by libcurl
+    def _perform(self):
+        """
+        Run all internal operations required by libcurl
+        """
         status, num_to_process = self._multi_handle.perform()
         # if perform returns E_CALL_MULTI_PERFORM it requires to call perform
         # once again right away
@@ -393,7 +732,8 @@ class Communicator():
         need_to_wait = True
         while need_to_wait:
             timeout = self._multi_handle.timeout()
-            if timeout == 0:
+            timers_timeout = self._get_timers_timeout()
+            if timeout == 0 or timers_timeout == 0:
                 # if timeout == 0 then there is something to precess already
                 return
             timeout = (
@@ -402,32 +742,298 @@ class Communicator():
                 # curl don't have timeout set, so we can use our default
                 else self.curl_multi_select_timeout_default
             )
+            if timers_timeout is not None:
+                timeout = min(timeout, timers_timeout)
             # when value returned from select is -1, it timed out, so we can
             # wait
             need_to_wait = (self._multi_handle.select(timeout) == -1)
 
 
+class _AddressRace():
+    # pylint: disable=too-few-public-methods
+    def __init__(self, request):
+        self.request = request
+        # curl easy handle -> Destination of currently running attempts
+        self.attempt_dest = {}
+        # when to start an attempt on the next address, None means never
+        self.next_attempt_time = None
+        self.is_connected = False
+
+
 class MultiaddressCommunicator(Communicator):
     """
     Class with same interface as Communicator. In difference with Communicator,
     it takes advantage of multiple hosts in RequestTarget. So if it is not
     possible to connect to target using first hostname, it will use next one
     until connection will be successful or there is no host left.
+
+    In the racing mode (address_stagger is set) it does not wait for a failure
+    of an address. When there is no connection via an address after
+    address_stagger seconds, the next address is tried in parallel. The first
+    connected attempt wins and the other attempts are cancelled. More attempts
+    may connect and send the request before a winner is known, so a node may
+    process the request more than once. Use the racing mode only for requests
+    which are safe to be repeated.
     """
-    def start_loop(self):
-        for response in super(MultiaddressCommunicator, self).start_loop():
+    def __init__(
+        self, *args, address_stagger=None, preferred_dest_map=None, **kwargs
+    ):
+        """
+        float address_stagger -- delay in seconds before trying the next
+            address in parallel, None means trying addresses one by one
+        dict preferred_dest_map -- host label: Destination which was
+            successfully used, it is updated and may be shared by more
+            communicators
+        """
+        super().__init__(*args, **kwargs)
+        self._address_stagger = address_stagger
+        self._preferred_dest_map = (
+            preferred_dest_map if preferred_dest_map is not None else {}
+        )
+        self._race_by_handle = {}
+        self._race_list = []
+
+    def add_requests(self, request_list):
+        for request in request_list:
+            preferred_dest = self._preferred_dest_map.get(request.host_label)
+            if (
+                preferred_dest is not None
+                and
+                preferred_dest in request.target.dest_list
+            ):
+                request.prefer_dest(preferred_dest)
+            if self._address_stagger is None:
+                self._add_request(request)
+            else:
+                race = _AddressRace(request)
+                self._race_list.append(race)
+                self.__start_attempt(race)
+
+    def _run_loop(self):
+        for response in super(MultiaddressCommunicator, self)._run_loop():
+            if response is None:
+                yield None
+                continue
+            if self._address_stagger is not None:
+                yield from self.__process_race_response(response)
+                continue
             if response.was_connected:
+                self._preferred_dest_map[response.request.host_label] = (
+                    response.request.dest
+                )
                 yield response
                 continue
             try:
                 previous_dest = response.request.dest
                 response.request.next_dest()
                 self._logger.log_retry(response, previous_dest)
-                self.add_requests([response.request])
+                self._add_request(response.request)
             except StopIteration:
                 self._logger.log_no_more_addresses(response)
                 yield response
 
+    def cancel_requests(self, request_list):
+        if self._address_stagger is None:
+            super().cancel_requests(request_list)
+            return
+        for race in list(self._race_list):
+            if _contains(request_list, race.request):
+                for handle in list(race.attempt_dest):
+                    self.__drop_attempt(handle)
+                    self._cancel_handle(handle)
+                self._race_list.remove(race)
+
+    def _get_timers_timeout(self):
+        timeout_list = [
+            max(0, race.next_attempt_time - monotonic())
+            for race in self._race_list
+            if race.next_attempt_time is not None
+        ]
+        timers_timeout = super()._get_timers_timeout()
+        if timers_timeout is not None:
+            timeout_list.append(timers_timeout)
+        return min(timeout_list) if timeout_list else None
+
+    def _run_timers(self):
+        super()._run_timers()
+        now = monotonic()
+        for race in self._race_list:
+            if race.is_connected:
+                continue
+            connected_handle_list = [
+                handle for handle in race.attempt_dest
+                if handle.getinfo(pycurl.CONNECT_TIME)
+            ]
+            if connected_handle_list:
+                self.__finish_race(race, connected_handle_list[0])
+            elif (
+                race.next_attempt_time is not None
+                and
+                race.next_attempt_time <= now
+            ):
+                try:
+                    race.request.next_dest()
+                    self.__start_attempt(race)
+                except StopIteration:
+                    race.next_attempt_time = None
+
+    def __start_attempt(self, race):
+        handle = self._add_request(race.request.for_dest(race.request.dest))
+        race.attempt_dest[handle] = race.request.dest
+        self._race_by_handle[handle] = race
+        race.next_attempt_time = monotonic() + self._address_stagger
+
+    def __finish_race(self, race, winner_handle):
+        race.is_connected = True
+        race.next_attempt_time = None
+        for handle in list(race.attempt_dest):
+            if handle is not winner_handle:
+                self.__drop_attempt(handle)
+                self._cancel_handle(handle)
+
+    def __drop_attempt(self, handle):
+        race = self._race_by_handle.pop(handle)
+        del race.attempt_dest[handle]
+
+    def __process_race_response(self, response):
+        race = self._race_by_handle[response.handle]
+        dest = race.attempt_dest[response.handle]
+        # make the response look as if it was produced by the original request
+        response.handle.request_obj = race.request
+        if response.was_connected:
+            self.__finish_race(race, response.handle)
+            self.__drop_attempt(response.handle)
+            self._race_list.remove(race)
+            race.request.prefer_dest(dest)
+            self._preferred_dest_map[race.request.host_label] = dest
+            yield response
+            return
+
+        self.__drop_attempt(response.handle)
+        # if the failed attempt was connected, other attempts were cancelled
+        race.is_connected = False
+        try:
+            race.request.next_dest()
+        except StopIteration:
+            race.next_attempt_time = None
+            if not race.attempt_dest:
+                self._race_list.remove(race)
+                self._logger.log_no_more_addresses(response)
+                yield response
+            # otherwise wait for the attempts via other addresses
+            return
+        self._logger.log_retry(response, dest)
+        self.__start_attempt(race)
+
+
+class AsyncCommunicatorMixin():
+    """
+    Runs the communicator loop as a coroutine on the current asyncio event loop
+
+    Instead of blocking in select, libcurl tells the communicator which sockets
+    and timeouts to watch by its socket and timer callbacks. These are watched
+    by the event loop, so other tasks run while the requests are in progress.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._event_loop = None
+        self._curl_timer = None
+        self._activity = None
+        self._multi_handle.setopt(pycurl.M_SOCKETFUNCTION, self.__on_socket)
+        self._multi_handle.setopt(pycurl.M_TIMERFUNCTION, self.__on_timer)
+
+    def start_loop(self):
+        # pylint: disable=no-self-use
+        raise AssertionError(
+            "Use start_loop_async instead of start_loop in an async "
+            "communicator"
+        )
+
+    async def start_loop_async(self):
+        """
+        Return an asynchronous generator of responses. It works the same way as
+        start_loop of the synchronous communicators.
+
+        USAGE:
+        com.add_requests([Request(...), ...])
+        async for response in com.start_loop_async():
+            # do something with response
+            # if needed, add some new requests to the queue
+            com.add_requests([Request(...)])
+        """
+        self._event_loop = asyncio.get_event_loop()
+        self._activity = asyncio.Event()
+        try:
+            for response in self._run_loop():
+                if response is None:
+                    await self.__wait_for_activity()
+                else:
+                    yield response
+        finally:
+            if self._curl_timer is not None:
+                self._curl_timer.cancel()
+                self._curl_timer = None
+
+    def _perform(self):
+        # Libcurl is driven by the socket and timer callbacks in the async mode.
+        # Mixing it with curl_multi_perform is not allowed.
+        pass
+
+    async def __wait_for_activity(self):
+        if not self._activity.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._activity.wait(), self._get_timers_timeout()
+                )
+            except asyncio.TimeoutError:
+                pass
+        self._activity.clear()
+
+    def __on_socket(self, what, sock_fd, multi, socketp):
+        # pylint: disable=unused-argument
+        if what in (pycurl.POLL_IN, pycurl.POLL_INOUT):
+            self._event_loop.add_reader(
+                sock_fd, self.__socket_action, sock_fd, pycurl.CSELECT_IN
+            )
+        else:
+            self._event_loop.remove_reader(sock_fd)
+        if what in (pycurl.POLL_OUT, pycurl.POLL_INOUT):
+            self._event_loop.add_writer(
+                sock_fd, self.__socket_action, sock_fd, pycurl.CSELECT_OUT
+            )
+        else:
+            self._event_loop.remove_writer(sock_fd)
+
+    def __on_timer(self, timeout_ms):
+        if self._curl_timer is not None:
+            self._curl_timer.cancel()
+            self._curl_timer = None
+        if timeout_ms >= 0:
+            self._curl_timer = self._event_loop.call_later(
+                timeout_ms / 1000.0,
+                self.__socket_action,
+                pycurl.SOCKET_TIMEOUT,
+                0
+            )
+
+    def __socket_action(self, sock_fd, ev_bitmask):
+        status = pycurl.E_CALL_MULTI_PERFORM
+        while status == pycurl.E_CALL_MULTI_PERFORM:
+            status, dummy_running = self._multi_handle.socket_action(
+                sock_fd, ev_bitmask
+            )
+        self._activity.set()
+
+
+class AsyncCommunicator(AsyncCommunicatorMixin, Communicator):
+    pass
+
+
+class AsyncMultiaddressCommunicator(
+    AsyncCommunicatorMixin, MultiaddressCommunicator
+):
+    pass
+
 
 class CommunicatorLoggerInterface():
     def log_request_start(self, request):
@@ -443,6 +1049,11 @@ class CommunicatorLoggerInterface():
         raise NotImplementedError()
 
 
+def _contains(object_list, obj):
+    # Requests are compared by identity, different requests may be equal.
+    return any(item is obj for item in object_list)
+
+
 def _get_auth_cookies(user, group_list):
     """
     Returns input parameters in a dictionary which is prepared to be converted
@@ -466,6 +1077,22 @@ def _get_auth_cookies(user, group_list):
     return cookies
 
 
+def _is_libcurl_at_least(major, minor, patch=0):
+    # pycurl constants only tell which libcurl pycurl has been built with, the
+    # libcurl loaded at runtime may be older.
+    return pycurl.version_info()[2] >= (major << 16 | minor << 8 | patch)
+
+
+def _create_share():
+    share = pycurl.CurlShare()
+    share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+    share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+    # Sharing connections is supported since libcurl 7.57.0
+    if hasattr(pycurl, "LOCK_DATA_CONNECT") and _is_libcurl_at_least(7, 57):
+        share.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT)
+    return share
+
+
 def _create_request_handle(request, cookies, timeout):
     """
     Returns Curl object (easy handle) which is set up witc specified parameters.
@@ -474,33 +1101,13 @@ def _create_request_handle(request, cookies, timeout):
     dict cookies -- cookies to add to request
     int timeot -- request timeout
     """
-    # it is not possible to take this callback out of this function, because of
-    # curl API
-    def __debug_callback(data_type, debug_data):
-        # pylint: disable=no-member
-        prefixes = {
-            pycurl.DEBUG_TEXT: b"* ",
-            pycurl.DEBUG_HEADER_IN: b"< ",
-            pycurl.DEBUG_HEADER_OUT: b"> ",
-            pycurl.DEBUG_DATA_IN: b"<< ",
-            pycurl.DEBUG_DATA_OUT: b">> ",
-        }
-        if data_type in prefixes:
-            debug_output.write(prefixes[data_type])
-            debug_output.write(debug_data)
-            if not debug_data.endswith(b"\n"):
-                debug_output.write(b"\n")
-
     output = io.BytesIO()
-    debug_output = io.BytesIO()
     cookies.update(request.cookies)
     handle = pycurl.Curl()
     handle.setopt(pycurl.PROTOCOLS, pycurl.PROTO_HTTPS)
     handle.setopt(pycurl.TIMEOUT, timeout)
     handle.setopt(pycurl.URL, request.url.encode("utf-8"))
     handle.setopt(pycurl.WRITEFUNCTION, output.write)
-    handle.setopt(pycurl.VERBOSE, 1)
-    handle.setopt(pycurl.DEBUGFUNCTION, __debug_callback)
     handle.setopt(pycurl.SSL_VERIFYHOST, 0)
     handle.setopt(pycurl.SSL_VERIFYPEER, 0)
     handle.setopt(pycurl.NOSIGNAL, 1) # required for multi-threading
@@ -520,10 +1127,86 @@ def _create_request_handle(request, cookies, timeout):
     # https://github.com/pycurl/pycurl/blob/REL_7_19_0_3/examples/retriever-multi.py
     handle.request_obj = request
     handle.output_buffer = output
-    handle.debug_buffer = debug_output
+    # Debug output is not captured unless enable_debug_capture is called. It
+    # slows down the transfer and holds a copy of all the transferred data.
+    handle.debug_buffer = DebugBuffer()
     return handle
 
 
+def enable_debug_capture(handle, max_size=0):
+    """
+    Capture curl debug output of a handle into handle.debug_buffer
+
+    pycurl.Curl handle -- curl easy handle
+    int max_size -- keep only this number of last bytes, None or 0 means no
+        limit
+    """
+    debug_output = DebugBuffer(max_size)
+    # it is not possible to take this callback out of this function, because of
+    # curl API
+    def __debug_callback(data_type, debug_data):
+        # pylint: disable=no-member
+        prefixes = {
+            pycurl.DEBUG_TEXT: b"* ",
+            pycurl.DEBUG_HEADER_IN: b"< ",
+            pycurl.DEBUG_HEADER_OUT: b"> ",
+            pycurl.DEBUG_DATA_IN: b"<< ",
+            pycurl.DEBUG_DATA_OUT: b">> ",
+        }
+        if data_type in prefixes:
+            debug_output.write(prefixes[data_type])
+            debug_output.write(debug_data)
+            if not debug_data.endswith(b"\n"):
+                debug_output.write(b"\n")
+
+    handle.setopt(pycurl.VERBOSE, 1)
+    handle.setopt(pycurl.DEBUGFUNCTION, __debug_callback)
+    handle.debug_buffer = debug_output
+
+
+class DebugBuffer():
+    """
+    Buffer for curl debug output, optionally keeping only its last bytes
+    """
+    def __init__(self, max_size=0):
+        """
+        int max_size -- maximal number of bytes to keep, None or 0 means no
+            limit
+        """
+        self._max_size = max_size
+        self._chunk_list = deque()
+        self._size = 0
+        self._dropped_size = 0
+
+    def write(self, data):
+        self._chunk_list.append(data)
+        self._size += len(data)
+        if not self._max_size:
+            return
+        while self._size > self._max_size:
+            excess = self._size - self._max_size
+            first_chunk = self._chunk_list[0]
+            if len(first_chunk) <= excess:
+                self._chunk_list.popleft()
+                dropped = len(first_chunk)
+            else:
+                self._chunk_list[0] = first_chunk[excess:]
+                dropped = excess
+            self._size -= dropped
+            self._dropped_size += dropped
+
+    def getvalue(self):
+        value = b"".join(self._chunk_list)
+        if self._dropped_size:
+            return (
+                "* Debug output truncated, first {0} bytes dropped\n".format(
+                    self._dropped_size
+                ).encode("utf-8")
+                + value
+            )
+        return value
+
+
 def _dict_to_cookies(cookies_dict):
     return ";".join([
         "{0}={1}".format(key, value)
@@ -88,6 +88,9 @@ CIB_LOAD_ERROR_GET_NODES_FOR_VALIDATION = "CIB_LOAD_ERROR_GET_NODES_FOR_VALIDATI
 CIB_LOAD_ERROR_SCOPE_MISSING = "CIB_LOAD_ERROR_SCOPE_MISSING"
 CIB_PUSH_FORCED_FULL_DUE_TO_CRM_FEATURE_SET = "CIB_PUSH_FORCED_FULL_DUE_TO_CRM_FEATURE_SET"
 CIB_PUSH_ERROR = "CIB_PUSH_ERROR"
+CIB_PUSH_ATTEMPT = "CIB_PUSH_ATTEMPT"
+CIB_PUSH_CONFLICT = "CIB_PUSH_CONFLICT"
+CIB_PUSH_CONFLICT_ATTEMPTS_EXHAUSTED = "CIB_PUSH_CONFLICT_ATTEMPTS_EXHAUSTED"
 CIB_SAVE_TMP_ERROR = "CIB_SAVE_TMP_ERROR"
 CIB_UPGRADE_FAILED = "CIB_UPGRADE_FAILED"
 CIB_UPGRADE_FAILED_TO_MINIMAL_REQUIRED_VERSION = "CIB_UPGRADE_FAILED_TO_MINIMAL_REQUIRED_VERSION"
@@ -176,6 +179,7 @@ MUTUALLY_EXCLUSIVE_OPTIONS = "MUTUALLY_EXCLUSIVE_OPTIONS"
 NODE_ADDRESSES_ALREADY_EXIST = "NODE_ADDRESSES_ALREADY_EXIST"
 NODE_ADDRESSES_DUPLICATION = "NODE_ADDRESSES_DUPLICATION"
 NODE_ADDRESSES_UNRESOLVABLE = "NODE_ADDRESSES_UNRESOLVABLE"
+NODE_COMMUNICATION_CANCELLED = "NODE_COMMUNICATION_CANCELLED"
 NODE_COMMUNICATION_COMMAND_UNSUCCESSFUL = "NODE_COMMUNICATION_COMMAND_UNSUCCESSFUL"
 NODE_COMMUNICATION_DEBUG_INFO = "NODE_COMMUNICATION_DEBUG_INFO"
 NODE_COMMUNICATION_ERROR = "NODE_COMMUNICATION_ERROR"
@@ -0,0 +1,187 @@
+import json
+import os
+import os.path
+import shutil
+import tempfile
+from unittest import mock, TestCase
+
+from pcs.common import known_hosts
+from pcs.common.host import Destination, PcsKnownHost
+
+
+def _fixture_text(data_version, hosts):
+    return json.dumps({
+        "format_version": 1,
+        "data_version": data_version,
+        "known_hosts": {
+            name: {
+                "token": token,
+                "dest_list": [{"addr": addr, "port": port}],
+            }
+            for name, token, addr, port in hosts
+        },
+    })
+
+
+class KnownHostsFileTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "known-hosts")
+        self.known_hosts_file = known_hosts.KnownHostsFile(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, text):
+        with open(self.path, "w") as a_file:
+            a_file.write(text)
+
+    def test_missing_file(self):
+        self.assertEqual({}, self.known_hosts_file.get_known_hosts())
+        self.assertEqual(0, self.known_hosts_file.get_data_version())
+
+    def test_empty_file(self):
+        self.write("")
+        self.assertEqual({}, self.known_hosts_file.get_known_hosts())
+
+    def test_read(self):
+        self.write(_fixture_text(3, [("node1", "token1", "addr1", 2224)]))
+        self.assertEqual(
+            {
+                "node1": PcsKnownHost(
+                    "node1", "token1", [Destination("addr1", 2224)]
+                ),
+            },
+            self.known_hosts_file.get_known_hosts()
+        )
+        self.assertEqual(3, self.known_hosts_file.get_data_version())
+
+    def test_parse_file_only_once(self):
+        self.write(_fixture_text(1, [("node1", "token1", "addr1", 2224)]))
+        with mock.patch(
+            "pcs.common.known_hosts.json.loads", wraps=json.loads
+        ) as mock_loads:
+            self.known_hosts_file.get_known_hosts()
+            self.known_hosts_file.get_known_hosts()
+            self.known_hosts_file.get_data_version()
+            self.assertEqual(1, mock_loads.call_count)
+
+    def test_reload_modified_file(self):
+        self.write(_fixture_text(1, [("node1", "token1", "addr1", 2224)]))
+        self.assertEqual(
+            ["node1"], list(self.known_hosts_file.get_known_hosts().keys())
+        )
+        self.write(_fixture_text(2, [("node2", "token2", "addr2", 2224)]))
+        # make sure the change is detected even on a coarse mtime resolution
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(
+            ["node2"], list(self.known_hosts_file.get_known_hosts().keys())
+        )
+        self.assertEqual(2, self.known_hosts_file.get_data_version())
+
+    def test_reload_replaced_file(self):
+        self.write(_fixture_text(1, [("node1", "token1", "addr1", 2224)]))
+        self.known_hosts_file.get_known_hosts()
+        stat = os.stat(self.path)
+        new_path = self.path + ".new"
+        with open(new_path, "w") as a_file:
+            a_file.write(_fixture_text(1, [("node2", "token1", "addr1", 2224)]))
+        os.utime(new_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.rename(new_path, self.path)
+        self.assertEqual(
+            ["node2"], list(self.known_hosts_file.get_known_hosts().keys())
+        )
+
+    def test_removed_file(self):
+        self.write(_fixture_text(1, [("node1", "token1", "addr1", 2224)]))
+        self.known_hosts_file.get_known_hosts()
+        os.remove(self.path)
+        self.assertEqual({}, self.known_hosts_file.get_known_hosts())
+
+    def test_unparsable_file(self):
+        self.write("not a json")
+        self.assertRaises(
+            known_hosts.KnownHostsParseError,
+            self.known_hosts_file.get_known_hosts
+        )
+        self.assertEqual({}, self.known_hosts_file.get_known_hosts())
+
+    def test_unsupported_format(self):
+        self.write(json.dumps(
+            {"format_version": 2, "data_version": 1, "known_hosts": {}}
+        ))
+        self.assertRaises(
+            known_hosts.KnownHostsParseError,
+            self.known_hosts_file.get_known_hosts
+        )
+
+    def test_returned_dict_is_a_copy(self):
+        self.write(_fixture_text(1, [("node1", "token1", "addr1", 2224)]))
+        self.known_hosts_file.get_known_hosts().clear()
+        self.assertEqual(
+            ["node1"], list(self.known_hosts_file.get_known_hosts().keys())
+        )
+
+    def test_save(self):
+        self.known_hosts_file = known_hosts.KnownHostsFile(
+            os.path.join(self.tmp_dir, "subdir", "known-hosts")
+        )
+        host_list = [
+            PcsKnownHost("node2", "token2", [Destination("addr2", 2225)]),
+            PcsKnownHost("node1", "token1", [Destination("addr1", 2224)]),
+        ]
+        self.known_hosts_file.save(host_list, 5)
+
+        with open(self.known_hosts_file.path) as a_file:
+            self.assertEqual(
+                json.loads(_fixture_text(5, [
+                    ("node1", "token1", "addr1", 2224),
+                    ("node2", "token2", "addr2", 2225),
+                ])),
+                json.loads(a_file.read())
+            )
+        self.assertEqual(
+            0o600, os.stat(self.known_hosts_file.path).st_mode & 0o777
+        )
+        reader = known_hosts.KnownHostsFile(self.known_hosts_file.path)
+        self.assertEqual(
+            {host.name: host for host in host_list},
+            reader.get_known_hosts()
+        )
+        self.assertEqual(5, reader.get_data_version())
+
+    def test_save_overwrites_longer_content(self):
+        self.write(_fixture_text(1, [
+            ("node{0}".format(i), "token", "addr", 2224) for i in range(10)
+        ]))
+        self.known_hosts_file.save([], 2)
+        reader = known_hosts.KnownHostsFile(self.path)
+        self.assertEqual({}, reader.get_known_hosts())
+        self.assertEqual(2, reader.get_data_version())
+
+
+class GetKnownHostsFileTest(TestCase):
+    def test_shared_instance(self):
+        self.assertIs(
+            known_hosts.get_known_hosts_file("/tmp/known-hosts-a"),
+            known_hosts.get_known_hosts_file("/tmp/known-hosts-a"),
+        )
+        self.assertIsNot(
+            known_hosts.get_known_hosts_file("/tmp/known-hosts-a"),
+            known_hosts.get_known_hosts_file("/tmp/known-hosts-b"),
+        )
+
+    @mock.patch("pcs.common.known_hosts.os.getuid", lambda: 0)
+    def test_root_path(self):
+        self.assertEqual(
+            "/var/lib/pcsd/known-hosts",
+            known_hosts.get_known_hosts_file_path()
+        )
+
+    @mock.patch("pcs.common.known_hosts.os.getuid", lambda: 1000)
+    @mock.patch.dict("os.environ", {"HOME": "/home/user"})
+    def test_user_path(self):
+        self.assertEqual(
+            "/home/user/.pcs/known-hosts",
+            known_hosts.get_known_hosts_file_path()
+        )
@@ -1,9 +1,12 @@
+import asyncio
 import io
+import socket
 from unittest import mock, TestCase
 
 from pcs.test.tools.custom_mock import (
     MockCurl,
     MockCurlMulti,
+    MockCurlMultiSocket,
 )
 
 from pcs import settings
@@ -274,7 +277,6 @@ class CreateRequestHandleTest(TestCase):
     # pylint: disable=no-member, protected-access
     _common_opts = {
         pycurl.PROTOCOLS: pycurl.PROTO_HTTPS,
-        pycurl.VERBOSE: 1,
         pycurl.SSL_VERIFYHOST: 0,
         pycurl.SSL_VERIFYPEER: 0,
         pycurl.NOSIGNAL: 1,
@@ -312,6 +314,8 @@ class CreateRequestHandleTest(TestCase):
         self.assertLessEqual(
             set(expected_opts.items()), set(handle.opts.items())
         )
+        self.assertFalse(pycurl.VERBOSE in handle.opts)
+        self.assertFalse(pycurl.DEBUGFUNCTION in handle.opts)
         self.assertIs(request, handle.request_obj)
         self.assertEqual("", handle.output_buffer.getvalue().decode("utf-8"))
         self.assertEqual("", handle.debug_buffer.getvalue().decode("utf-8"))
@@ -319,8 +323,28 @@ class CreateRequestHandleTest(TestCase):
         self.assertEqual(
             "output", handle.output_buffer.getvalue().decode("utf-8")
         )
+        self.assertEqual("", handle.debug_buffer.getvalue().decode("utf-8"))
+
+    def test_debug_capture(self, mock_curl):
+        mock_curl.return_value = MockCurl(
+            None, b"output", [
+                (pycurl.DEBUG_TEXT, b"debug"),
+                (pycurl.DEBUG_HEADER_OUT, b"header\n"),
+                (pycurl.DEBUG_DATA_OUT, b"info\n"),
+                (pycurl.DEBUG_SSL_DATA_OUT, b"ssl"),
+            ]
+        )
+        request = lib.Request(
+            lib.RequestTarget("label"), lib.RequestData("action")
+        )
+        handle = lib._create_request_handle(request, {}, 1)
+        lib.enable_debug_capture(handle)
+        self.assertEqual(1, handle.opts[pycurl.VERBOSE])
+        self.assertEqual("", handle.debug_buffer.getvalue().decode("utf-8"))
+        handle.perform()
         self.assertEqual(
-            "* debug\n>> info\n", handle.debug_buffer.getvalue().decode("utf-8")
+            "* debug\n> header\n>> info\n",
+            handle.debug_buffer.getvalue().decode("utf-8")
         )
 
     def test_basic(self, mock_curl):
@@ -347,12 +371,145 @@ class CreateRequestHandleTest(TestCase):
         self.assertEqual("", handle.debug_buffer.getvalue().decode("utf-8"))
 
 
+class DebugBufferTest(TestCase):
+    def test_no_limit(self):
+        buffer = lib.DebugBuffer()
+        buffer.write(b"abc")
+        buffer.write(b"def")
+        self.assertEqual(b"abcdef", buffer.getvalue())
+
+    def test_empty(self):
+        self.assertEqual(b"", lib.DebugBuffer(5).getvalue())
+
+    def test_limit_not_exceeded(self):
+        buffer = lib.DebugBuffer(6)
+        buffer.write(b"abc")
+        buffer.write(b"def")
+        self.assertEqual(b"abcdef", buffer.getvalue())
+
+    def test_keep_last_bytes(self):
+        buffer = lib.DebugBuffer(5)
+        buffer.write(b"abc")
+        buffer.write(b"def")
+        buffer.write(b"gh")
+        self.assertEqual(
+            b"* Debug output truncated, first 3 bytes dropped\ndefgh",
+            buffer.getvalue()
+        )
+
+    def test_chunk_bigger_than_limit(self):
+        buffer = lib.DebugBuffer(2)
+        buffer.write(b"abc")
+        buffer.write(b"defgh")
+        self.assertEqual(
+            b"* Debug output truncated, first 6 bytes dropped\ngh",
+            buffer.getvalue()
+        )
+
+
+@mock.patch("pcs.common.node_communicator.monotonic")
+class ConnectionPoolTest(TestCase):
+    # pylint: disable=no-member
+    def test_setup_handle(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        pool = lib.ConnectionPool(max_connections=5, max_idle_time=10)
+        handle = MockCurl()
+        pool.setup_handle(handle)
+        self.assertIsInstance(handle.opts[pycurl.SHARE], pycurl.CurlShare)
+        self.assertEqual(5, handle.opts[pycurl.MAXCONNECTS])
+
+    def test_setup_multi_handle(self, mock_monotonic):
+        mock_monotonic.return_value = 0
+        pool = lib.ConnectionPool(max_connections=5)
+        multi_handle = MockCurlMulti([])
+        pool.setup_multi_handle(multi_handle)
+        self.assertEqual({pycurl.M_MAXCONNECTS: 5}, multi_handle.opts)
+
+    def test_share_reused(self, mock_monotonic):
+        mock_monotonic.side_effect = [0, 5, 5, 12]
+        pool = lib.ConnectionPool(max_idle_time=10)
+        handle1 = MockCurl()
+        handle2 = MockCurl()
+        pool.setup_handle(handle1)
+        pool.handle_finished()
+        pool.setup_handle(handle2)
+        self.assertIs(handle1.opts[pycurl.SHARE], handle2.opts[pycurl.SHARE])
+
+    def test_share_dropped_when_idle(self, mock_monotonic):
+        mock_monotonic.side_effect = [0, 0, 11]
+        pool = lib.ConnectionPool(max_idle_time=10)
+        handle1 = MockCurl()
+        handle2 = MockCurl()
+        pool.setup_handle(handle1)
+        pool.setup_handle(handle2)
+        self.assertIsNot(
+            handle1.opts[pycurl.SHARE], handle2.opts[pycurl.SHARE]
+        )
+
+    @mock.patch("pcs.common.node_communicator.pycurl.CurlShare")
+    @mock.patch("pcs.common.node_communicator.pycurl.version_info")
+    def test_share_connections(
+        self, mock_version_info, mock_share, mock_monotonic
+    ):
+        mock_monotonic.return_value = 0
+        mock_version_info.return_value = (3, "7.57.0", 0x073900)
+        lib.ConnectionPool()
+        self.assertIn(
+            mock.call(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT),
+            mock_share.return_value.setopt.call_args_list
+        )
+
+    @mock.patch("pcs.common.node_communicator.pycurl.CurlShare")
+    @mock.patch("pcs.common.node_communicator.pycurl.version_info")
+    def test_old_libcurl_does_not_share_connections(
+        self, mock_version_info, mock_share, mock_monotonic
+    ):
+        mock_monotonic.return_value = 0
+        mock_version_info.return_value = (3, "7.56.1", 0x073801)
+        pool = lib.ConnectionPool()
+        self.assertNotIn(
+            mock.call(pycurl.SH_SHARE, pycurl.LOCK_DATA_CONNECT),
+            mock_share.return_value.setopt.call_args_list
+        )
+        handle = MockCurl()
+        pool.setup_handle(handle)
+        self.assertNotIn(pycurl.MAXAGE_CONN, handle.opts)
+
+
 def fixture_request(host_id=1, action="action"):
     return lib.Request(
         lib.RequestTarget("host{0}".format(host_id)), lib.RequestData(action),
     )
 
 
+@mock.patch("pcs.common.node_communicator.MultiaddressCommunicator")
+class NodeCommunicatorFactoryAddressRacingTest(TestCase):
+    @staticmethod
+    def get_stagger(mock_communicator):
+        return mock_communicator.call_args[1]["address_stagger"]
+
+    def test_racing_off_by_default(self, mock_communicator):
+        factory = lib.NodeCommunicatorFactory(
+            mock.MagicMock(), None, None, 10, address_stagger=1
+        )
+        factory.get_multiaddress_communicator()
+        self.assertIsNone(self.get_stagger(mock_communicator))
+
+    def test_racing_requested(self, mock_communicator):
+        factory = lib.NodeCommunicatorFactory(
+            mock.MagicMock(), None, None, 10, address_stagger=1
+        )
+        factory.get_multiaddress_communicator(race_addresses=True)
+        self.assertEqual(1, self.get_stagger(mock_communicator))
+
+    def test_racing_disabled_in_factory(self, mock_communicator):
+        factory = lib.NodeCommunicatorFactory(
+            mock.MagicMock(), None, None, 10, address_stagger=None
+        )
+        factory.get_multiaddress_communicator(race_addresses=True)
+        self.assertIsNone(self.get_stagger(mock_communicator))
+
+
 class CommunicatorBaseTest(TestCase):
     def setUp(self):
         self.mock_com_log = mock.MagicMock(
@@ -416,6 +573,168 @@ class CommunicatorSimpleTest(CommunicatorBaseTest):
         self.assertEqual(expected_reason, response.error_msg)
 
 
+@mock.patch(
+    "pcs.common.node_communicator.pycurl.CurlMulti",
+    side_effect=lambda: MockCurlMulti([1])
+)
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class CommunicatorConnectionPoolTest(CommunicatorBaseTest):
+    def test_use_pool(self, mock_create_handle, _):
+        pool = mock.Mock(spec_set=lib.ConnectionPool)
+        com = lib.Communicator(
+            self.mock_com_log, None, None, connection_pool=pool
+        )
+        request = fixture_request()
+        handle = MockCurl(request=request)
+        mock_create_handle.return_value = handle
+        com.add_requests([request])
+        response_list = list(com.start_loop())
+        self.assertEqual(1, len(response_list))
+        self.assertEqual(
+            [
+                # pylint: disable=protected-access
+                mock.call.setup_multi_handle(com._multi_handle),
+                mock.call.setup_handle(handle),
+                mock.call.handle_finished(),
+            ],
+            pool.mock_calls
+        )
+
+
+@mock.patch(
+    "pcs.common.node_communicator.pycurl.CurlMulti",
+    side_effect=lambda: MockCurlMulti([1])
+)
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class CommunicatorDebugTest(CommunicatorBaseTest):
+    def get_debug_communicator(self, **kwargs):
+        return lib.Communicator(self.mock_com_log, None, None, **kwargs)
+
+    @staticmethod
+    def fixture_handle():
+        return MockCurl(
+            {pycurl.RESPONSE_CODE: 200},
+            debug_output_list=[(pycurl.DEBUG_DATA_IN, b"response data")],
+            request=lib.Request(
+                lib.RequestTarget("label"), lib.RequestData("action")
+            ),
+        )
+
+    def test_debug_disabled(self, mock_create_handle, _):
+        handle = self.fixture_handle()
+        handle.debug_buffer = lib.DebugBuffer()
+        mock_create_handle.return_value = handle
+        com = self.get_debug_communicator()
+        com.add_requests([handle.request_obj])
+        response_list = list(com.start_loop())
+        self.assertFalse(pycurl.VERBOSE in handle.opts)
+        self.assertEqual("", response_list[0].debug)
+
+    def test_debug_enabled(self, mock_create_handle, _):
+        handle = self.fixture_handle()
+        mock_create_handle.return_value = handle
+        com = self.get_debug_communicator(debug=True)
+        com.add_requests([handle.request_obj])
+        response_list = list(com.start_loop())
+        self.assertEqual(1, handle.opts[pycurl.VERBOSE])
+        self.assertEqual("<< response data\n", response_list[0].debug)
+
+    def test_debug_max_size(self, mock_create_handle, _):
+        handle = self.fixture_handle()
+        mock_create_handle.return_value = handle
+        com = self.get_debug_communicator(debug=True, debug_max_size=5)
+        com.add_requests([handle.request_obj])
+        response_list = list(com.start_loop())
+        self.assertEqual(
+            "* Debug output truncated, first 12 bytes dropped\ndata\n",
+            response_list[0].debug
+        )
+
+
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class CommunicatorInFlightLimitTest(CommunicatorBaseTest):
+    def assert_started_one_by_one(self, com, mock_create_handle, request_list):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com.add_requests(request_list)
+        response_list = []
+        for response in com.start_loop():
+            # pylint: disable=protected-access
+            self.assertLessEqual(len(com._multi_handle._handle_list), 1)
+            response_list.append(response)
+        self.assertEqual(request_list, [r.request for r in response_list])
+        self.assertEqual(
+            [
+                call
+                for response in response_list
+                for call in (
+                    mock.call.log_request_start(response.request),
+                    mock.call.log_response(response),
+                )
+            ],
+            self.mock_com_log.mock_calls
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([1, 1, 1])
+    )
+    def test_max_in_flight(self, _, mock_create_handle):
+        self.assert_started_one_by_one(
+            lib.Communicator(self.mock_com_log, None, None, max_in_flight=1),
+            mock_create_handle,
+            [fixture_request(i) for i in range(3)],
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([1, 1, 1])
+    )
+    def test_max_in_flight_per_host(self, _, mock_create_handle):
+        self.assert_started_one_by_one(
+            lib.Communicator(
+                self.mock_com_log, None, None, max_in_flight_per_host=1
+            ),
+            mock_create_handle,
+            [fixture_request(1, action=f"action{i}") for i in range(3)],
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([2, 1])
+    )
+    def test_other_hosts_not_blocked(self, _, mock_create_handle):
+        com = lib.Communicator(
+            self.mock_com_log, None, None, max_in_flight_per_host=1
+        )
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        request_list = [
+            fixture_request(1, "action1"),
+            fixture_request(1, "action2"),
+            fixture_request(2, "action1"),
+        ]
+        com.add_requests(request_list)
+        response_list = list(com.start_loop())
+        self.assertEqual(
+            [request_list[0], request_list[2], request_list[1]],
+            [r.request for r in response_list]
+        )
+        self.assertEqual(
+            [
+                mock.call.log_request_start(request_list[0]),
+                mock.call.log_request_start(request_list[2]),
+                mock.call.log_response(response_list[0]),
+                mock.call.log_request_start(request_list[1]),
+                mock.call.log_response(response_list[1]),
+                mock.call.log_response(response_list[2]),
+            ],
+            self.mock_com_log.mock_calls
+        )
+
+
 class CommunicatorMultiTest(CommunicatorBaseTest):
     @mock.patch("pcs.common.node_communicator._create_request_handle")
     @mock.patch(
@@ -632,3 +951,365 @@ class MultiaddressCommunicatorTest(CommunicatorBaseTest):
         self.assertEqual(logger_calls, self.mock_com_log.mock_calls)
         # pylint: disable=no-member, protected-access
         com._multi_handle.assert_no_handle_left()
+
+
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class CommunicatorTimersTest(CommunicatorBaseTest):
+    def setUp(self):
+        super().setUp()
+        self.request_list = [fixture_request(i) for i in range(2)]
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([0, 2])
+    )
+    def test_call_later(self, _, mock_create_handle):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com = self.get_communicator()
+        com.add_requests(self.request_list[:1])
+        com.call_later(
+            0, lambda: com.add_requests(self.request_list[1:])
+        )
+        response_list = list(com.start_loop())
+        self.assertEqual(
+            self.request_list, [r.request for r in response_list]
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([1])
+    )
+    def test_cancel_requests(self, _, mock_create_handle):
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com = self.get_communicator()
+        com.add_requests(self.request_list)
+        response_list = []
+        for response in com.start_loop():
+            response_list.append(response)
+            com.cancel_requests(self.request_list)
+        self.assertEqual(
+            self.request_list[:1], [r.request for r in response_list]
+        )
+        # pylint: disable=no-member, protected-access
+        com._multi_handle.assert_no_handle_left()
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([0])
+    )
+    def test_cancel_racing_requests(self, _, mock_create_handle):
+        request = lib.Request(
+            lib.RequestTarget(
+                "label", dest_list=_addr_list_to_dest(["host0", "host1"])
+            ),
+            lib.RequestData("action")
+        )
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            request=request
+        )
+        com = lib.MultiaddressCommunicator(
+            self.mock_com_log, None, None, address_stagger=0
+        )
+        com.add_requests([request])
+        com.call_later(0, lambda: com.cancel_requests([request]))
+        self.assertEqual([], list(com.start_loop()))
+        self.assertEqual(1, mock_create_handle.call_count)
+        # pylint: disable=no-member, protected-access
+        com._multi_handle.assert_no_handle_left()
+
+
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class MultiaddressCommunicatorRacingTest(CommunicatorBaseTest):
+    def setUp(self):
+        super().setUp()
+        self.attempt_list = []
+        self.request = lib.Request(
+            lib.RequestTarget(
+                "label",
+                dest_list=_addr_list_to_dest(
+                    ["host{0}".format(i) for i in range(3)]
+                )
+            ),
+            lib.RequestData("action")
+        )
+
+    def get_racing_communicator(self, address_stagger, preferred_dest_map=None):
+        return lib.MultiaddressCommunicator(
+            self.mock_com_log, None, None,
+            address_stagger=address_stagger,
+            preferred_dest_map=preferred_dest_map,
+        )
+
+    def fixture_create_handle(self, connected=(), failing=()):
+        def create_handle(request, _, __):
+            self.attempt_list.append(request)
+            addr = request.dest.addr
+            return MockCurl(
+                info=(
+                    {pycurl.CONNECT_TIME: 0.1} if addr in connected else {}
+                ),
+                error=(
+                    (pycurl.E_COULDNT_CONNECT, "reason")
+                    if addr in failing else None
+                ),
+                request=request,
+            )
+        return create_handle
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([0, 1])
+    )
+    def test_first_connected_wins(self, _, mock_create_handle):
+        mock_create_handle.side_effect = self.fixture_create_handle(
+            connected=["host1"]
+        )
+        preferred_dest_map = {}
+        com = self.get_racing_communicator(0, preferred_dest_map)
+        com.add_requests([self.request])
+        response_list = list(com.start_loop())
+
+        self.assertEqual(1, len(response_list))
+        response = response_list[0]
+        self.assertTrue(response.was_connected)
+        self.assertIs(self.request, response.request)
+        self.assertEqual(Destination("host1", None), self.request.dest)
+        self.assertEqual(
+            {"label": Destination("host1", None)}, preferred_dest_map
+        )
+        self.assertEqual(
+            ["host0", "host1"],
+            [attempt.dest.addr for attempt in self.attempt_list]
+        )
+        self.assertEqual(
+            [
+                mock.call.log_request_start(self.attempt_list[0]),
+                mock.call.log_request_start(self.attempt_list[1]),
+                mock.call.log_response(response),
+            ],
+            self.mock_com_log.mock_calls
+        )
+        # pylint: disable=no-member, protected-access
+        com._multi_handle.assert_no_handle_left()
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([1, 1])
+    )
+    def test_failure_tries_next_address_immediately(
+        self, _, mock_create_handle
+    ):
+        mock_create_handle.side_effect = self.fixture_create_handle(
+            failing=["host0"]
+        )
+        com = self.get_racing_communicator(100)
+        com.add_requests([self.request])
+        response_list = []
+        failed_response_list = []
+        self.mock_com_log.log_response.side_effect = (
+            lambda response: None if response.was_connected
+            else failed_response_list.append(response)
+        )
+        for response in com.start_loop():
+            response_list.append(response)
+
+        self.assertEqual(1, len(response_list))
+        response = response_list[0]
+        self.assertTrue(response.was_connected)
+        self.assertIs(self.request, response.request)
+        self.assertEqual(Destination("host1", None), self.request.dest)
+        self.assertEqual(
+            [
+                mock.call.log_request_start(self.attempt_list[0]),
+                mock.call.log_response(failed_response_list[0]),
+                mock.call.log_retry(
+                    failed_response_list[0], Destination("host0", None)
+                ),
+                mock.call.log_request_start(self.attempt_list[1]),
+                mock.call.log_response(response),
+            ],
+            self.mock_com_log.mock_calls
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([1, 1, 1])
+    )
+    def test_no_more_addresses(self, _, mock_create_handle):
+        mock_create_handle.side_effect = self.fixture_create_handle(
+            failing=["host0", "host1", "host2"]
+        )
+        com = self.get_racing_communicator(100)
+        com.add_requests([self.request])
+        response_list = list(com.start_loop())
+
+        self.assertEqual(1, len(response_list))
+        response = response_list[0]
+        self.assertFalse(response.was_connected)
+        self.assertIs(self.request, response.request)
+        self.assertEqual(3, len(self.attempt_list))
+        self.assertEqual(
+            mock.call.log_no_more_addresses(response),
+            self.mock_com_log.mock_calls[-1]
+        )
+        self.assertEqual(2, self.mock_com_log.log_retry.call_count)
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMulti([1])
+    )
+    def test_preferred_address_first(self, _, mock_create_handle):
+        mock_create_handle.side_effect = self.fixture_create_handle()
+        com = self.get_racing_communicator(
+            100, {"label": Destination("host2", None)}
+        )
+        com.add_requests([self.request])
+        response_list = list(com.start_loop())
+
+        self.assertEqual(1, len(response_list))
+        self.assertEqual(["host2"], [a.dest.addr for a in self.attempt_list])
+        self.assertEqual(Destination("host2", None), self.request.dest)
+
+
+@mock.patch("pcs.common.node_communicator._create_request_handle")
+class AsyncCommunicatorTest(CommunicatorBaseTest):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def get_response_list(self, com):
+        async def collect():
+            return [response async for response in com.start_loop_async()]
+        return self.loop.run_until_complete(collect())
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMultiSocket([1, 1])
+    )
+    def test_success(self, _, mock_create_handle):
+        request_list = [fixture_request(i, "action") for i in range(2)]
+        handle_list = [MockCurl(request=request) for request in request_list]
+        mock_create_handle.side_effect = handle_list
+        com = lib.AsyncCommunicator(self.mock_com_log, None, None)
+        com.add_requests(request_list)
+        response_list = self.get_response_list(com)
+
+        self.assertEqual(
+            handle_list, [response.handle for response in response_list]
+        )
+        self.assertTrue(all(r.was_connected for r in response_list))
+        self.assertEqual(
+            [
+                mock.call.log_request_start(request_list[0]),
+                mock.call.log_request_start(request_list[1]),
+                mock.call.log_response(response_list[0]),
+                mock.call.log_response(response_list[1]),
+            ],
+            self.mock_com_log.mock_calls
+        )
+        # pylint: disable=protected-access
+        com._multi_handle.assert_no_handle_left()
+        self.assertIsNone(com._curl_timer)
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMultiSocket([1, 1])
+    )
+    def test_add_request_while_running(self, _, mock_create_handle):
+        request_list = [fixture_request(i, "action") for i in range(2)]
+        mock_create_handle.side_effect = [
+            MockCurl(request=request) for request in request_list
+        ]
+        com = lib.AsyncCommunicator(self.mock_com_log, None, None)
+        com.add_requests(request_list[:1])
+
+        async def collect():
+            response_list = []
+            async for response in com.start_loop_async():
+                if not response_list:
+                    com.add_requests(request_list[1:])
+                response_list.append(response)
+            return response_list
+        response_list = self.loop.run_until_complete(collect())
+
+        self.assertEqual(
+            request_list, [response.request for response in response_list]
+        )
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMultiSocket([1, 1])
+    )
+    def test_multiaddress_retry(self, _, mock_create_handle):
+        request = lib.Request(
+            lib.RequestTarget(
+                "label", dest_list=_addr_list_to_dest(["host0", "host1"])
+            ),
+            lib.RequestData("action")
+        )
+        mock_create_handle.side_effect = lambda request, _, __: MockCurl(
+            error=(
+                (pycurl.E_COULDNT_CONNECT, "reason")
+                if request.dest.addr == "host0" else None
+            ),
+            request=request,
+        )
+        com = lib.AsyncMultiaddressCommunicator(
+            self.mock_com_log, None, None
+        )
+        com.add_requests([request])
+        response_list = self.get_response_list(com)
+
+        self.assertEqual(1, len(response_list))
+        self.assertTrue(response_list[0].was_connected)
+        self.assertEqual(Destination("host1", None), request.dest)
+        self.assertEqual(1, self.mock_com_log.log_retry.call_count)
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMultiSocket([])
+    )
+    def test_sync_loop_not_allowed(self, _, mock_create_handle):
+        com = lib.AsyncCommunicator(self.mock_com_log, None, None)
+        self.assertRaises(AssertionError, com.start_loop)
+        mock_create_handle.assert_not_called()
+
+    @mock.patch(
+        "pcs.common.node_communicator.pycurl.CurlMulti",
+        side_effect=lambda: MockCurlMultiSocket([])
+    )
+    def test_socket_callback(self, _, mock_create_handle):
+        # pylint: disable=protected-access
+        com = lib.AsyncCommunicator(self.mock_com_log, None, None)
+        multi_handle = com._multi_handle
+        multi_handle.socket_action = mock.Mock(return_value=(0, 1))
+        socket_callback = multi_handle.opts[pycurl.M_SOCKETFUNCTION]
+        sock_in, sock_out = socket.socketpair()
+        self.addCleanup(sock_in.close)
+        self.addCleanup(sock_out.close)
+
+        async def wait_for_socket():
+            com._event_loop = self.loop
+            com._activity = asyncio.Event()
+            socket_callback(pycurl.POLL_IN, sock_in.fileno(), None, None)
+            sock_out.send(b"data")
+            await com._activity.wait()
+            socket_callback(pycurl.POLL_REMOVE, sock_in.fileno(), None, None)
+        self.loop.run_until_complete(
+            asyncio.wait_for(wait_for_socket(), 5)
+        )
+
+        multi_handle.socket_action.assert_called_once_with(
+            sock_in.fileno(), pycurl.CSELECT_IN
+        )
+        self.assertFalse(self.loop.remove_reader(sock_in.fileno()))
+        mock_create_handle.assert_not_called()
@@ -1,6 +1,32 @@
-from tornado.web import RequestHandler
+from tornado.web import Application as TornadoApplication, RequestHandler
 
-from pcs.daemon import ruby_pcsd
+from pcs.daemon import metrics, ruby_pcsd
+
+class Application(TornadoApplication):
+    """
+    Application collects metrics of all finished requests. The requests are
+    labeled by the url pattern of their route (or by the route a handler sets
+    in its metrics_route), not by their path, so the number of labels is
+    bounded.
+    """
+    def log_request(self, handler):
+        super().log_request(handler)
+        route = getattr(handler, "metrics_route", None)
+        if route is None:
+            route = self.__get_route_pattern(handler.request)
+        method = handler.request.method
+        metrics.http_requests.inc(route, method, handler.get_status())
+        metrics.http_request_duration.observe(
+            handler.request.request_time(), route, method
+        )
+
+    def __get_route_pattern(self, request):
+        for rule in self.wildcard_router.rules:
+            if rule.matcher.match(request) is not None:
+                # tornado appends "$" to the patterns
+                pattern = rule.matcher.regex.pattern
+                return pattern[:-1] if pattern.endswith("$") else pattern
+        return ""
 
 class EnhanceHeadersMixin:
     """
@@ -45,6 +71,10 @@ class BaseHandler(EnhanceHeadersMixin, RequestHandler):
     """
     BaseHandler adds for all urls Strict-Transport-Security.
     """
+    # The route the request is counted to in metrics, None for the url pattern
+    # of the handler.
+    metrics_route = None
+
     def set_default_headers(self):
         self.set_strict_transport_security()
 
@@ -2,8 +2,10 @@ import os.path
 
 from tornado.web import StaticFileHandler, Finish
 
+from pcs import settings
 from pcs.daemon import app_session, ruby_pcsd, session
 from pcs.daemon.app_common import BaseHandler, EnhanceHeadersMixin, Sinatra
+from pcs.daemon.response_cache import ResponseCache
 
 class AjaxMixin:
     """
@@ -43,13 +45,15 @@ class SinatraGui(app_session.Mixin, Sinatra):
         await self.init_session()
         self.before_sinatra_use()
         if self.can_use_sinatra:
-            result = await self.ruby_pcsd_wrapper.request_gui(
-                self.request,
-                self.session.username,
-                self.session.groups,
-                self.session.is_authenticated,
-            )
-            self.send_sinatra_result(result)
+            self.send_sinatra_result(await self.request_sinatra())
+
+    async def request_sinatra(self):
+        return await self.ruby_pcsd_wrapper.request_gui(
+            self.request,
+            self.session.username,
+            self.session.groups,
+            self.session.is_authenticated,
+        )
 
     async def get(self, *args, **kwargs):
         await self.handle_sinatra_request()
@@ -92,6 +96,37 @@ class SinatraAjaxProtected(SinatraGui, AjaxMixin):
             self.enhance_headers()
             raise self.unauthorized()
 
+class CachedSinatraAjaxProtected(SinatraAjaxProtected):
+    # pylint: disable=too-many-ancestors
+    """
+    CachedSinatraAjaxProtected handles ajax urls polled by the GUI for the
+    cluster status. Their successful responses are kept in the response cache
+    for a short time and shared by all requests of the same user with the same
+    groups, i.e. with the same permissions.
+    """
+    def initialize(
+        self, session_storage, ruby_pcsd_wrapper, response_cache, cache_ttl
+    ):
+        #pylint: disable=arguments-differ
+        super().initialize(session_storage, ruby_pcsd_wrapper)
+        self.__response_cache = response_cache
+        self.__cache_ttl = cache_ttl
+
+    async def request_sinatra(self):
+        if self.request.method != "GET":
+            return await super().request_sinatra()
+        return await self.__response_cache.get(
+            (
+                self.request.method,
+                self.request.uri,
+                self.session.username,
+                tuple(sorted(self.session.groups)),
+            ),
+            self.__cache_ttl,
+            super().request_sinatra,
+            is_cacheable=lambda result: result.status == 200,
+        )
+
 class Login(SinatraGui, AjaxMixin):
     # pylint: disable=too-many-ancestors
     """
@@ -180,10 +215,17 @@ class StaticFile(EnhanceHeadersMixin, StaticFileHandler):
 def get_routes(
     session_storage: session.Storage,
     ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
+    response_cache: ResponseCache,
     public_dir,
 ):
     ruby_wrapper = dict(ruby_pcsd_wrapper=ruby_pcsd_wrapper)
     sessions = dict(session_storage=session_storage)
+    cached = lambda ttl: dict(
+        response_cache=response_cache,
+        cache_ttl=ttl,
+        **sessions,
+        **ruby_wrapper
+    )
     static_path = lambda dir: dict(path=os.path.join(public_dir, dir))
     return [
         (r"/css/(.*)", StaticFile, static_path("css")),
@@ -202,5 +244,16 @@ def get_routes(
             {**sessions, **ruby_wrapper}
         ),
 
+        (
+            r"/clusters_overview",
+            CachedSinatraAjaxProtected,
+            cached(settings.pcsd_cache_ttl_clusters_overview)
+        ),
+        (
+            r"/managec/.+/cluster_status",
+            CachedSinatraAjaxProtected,
+            cached(settings.pcsd_cache_ttl_cluster_status)
+        ),
+
         (r"/.*", SinatraAjaxProtected, {**sessions, **ruby_wrapper}),
     ]
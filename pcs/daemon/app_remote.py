@@ -1,47 +1,150 @@
+from tornado.ioloop import IOLoop
 from tornado.locks import Lock
+from tornado.web import stream_request_body
 
-from pcs.daemon import ruby_pcsd
-from pcs.daemon.app_common import Sinatra
+from pcs import settings
+from pcs.daemon import config_sync, metrics, native_remote, ruby_pcsd
+from pcs.daemon.app_common import BaseHandler, Sinatra
 from pcs.daemon.http_server import HttpsServerManage
+from pcs.daemon.response_cache import ResponseCache
 from pcs.daemon.auth import authorize_user
 
+def get_cookies(request):
+    return {name: morsel.value for name, morsel in request.cookies.items()}
+
 class SinatraRemote(Sinatra):
     """
     SinatraRemote is handler for urls which should be directed to the Sinatra
     remote (non-GUI) functions.
     """
     async def handle_sinatra_request(self):
-        result = await self.ruby_pcsd_wrapper.request_remote(self.request)
+        result = await self.request_sinatra()
+        if result.status != 404:
+            # The Sinatra serves a fixed set of paths, other paths are not
+            # counted separately.
+            self.metrics_route = self.request.path
         self.send_sinatra_result(result)
 
+    async def request_sinatra(self):
+        return await self.ruby_pcsd_wrapper.request_remote(self.request)
+
     async def get(self, *args, **kwargs):
         await self.handle_sinatra_request()
 
     async def post(self, *args, **kwargs):
         await self.handle_sinatra_request()
 
-class SyncConfigMutualExclusive(SinatraRemote):
+@stream_request_body
+class SinatraRemoteStreamed(SinatraRemote):
+    """
+    SinatraRemoteStreamed passes the request to the Sinatra before its body is
+    received and then streams the body to the Sinatra as it comes. Big uploads
+    are therefore not buffered in the daemon. The size of the body is limited
+    by the max_body_size of the server. The token is checked before a ruby
+    worker is bound to the request, so unauthenticated clients cannot keep ruby
+    workers busy.
+    """
+    __ruby_request = None
+
+    async def prepare(self):
+        status, body = await IOLoop.current().run_in_executor(
+            None,
+            native_remote.run_action,
+            native_remote.check_auth,
+            get_cookies(self.request),
+        )
+        if status != 200:
+            # the same response as the Sinatra returns
+            self.set_header("Content-Type", "text/html;charset=utf-8")
+            self.set_status(status)
+            self.finish(body)
+            return
+        self.__ruby_request = (
+            await self.ruby_pcsd_wrapper.start_remote_request(self.request)
+        )
+
+    async def data_received(self, chunk):
+        # The body of a refused request is dropped.
+        if self.__ruby_request is not None:
+            await self.__ruby_request.write(chunk)
+
+    async def request_sinatra(self):
+        return await self.__ruby_request.finish()
+
+    def on_connection_close(self):
+        self.__abort_ruby_request()
+
+    def on_finish(self):
+        # The request may be finished without the Sinatra being asked, e.g.
+        # for an unsupported method.
+        self.__abort_ruby_request()
+
+    def __abort_ruby_request(self):
+        if self.__ruby_request is not None:
+            self.__ruby_request.abort()
+
+class CachedSinatraRemote(SinatraRemote):
+    """
+    CachedSinatraRemote handles read-only status urls polled by other nodes.
+    Their successful responses are kept in the response cache for a short time.
+    The cache key contains the cookies identifying the user the request is run
+    as, so the response is shared only by requests with the same permissions.
+    """
+    def initialize(
+        self,
+        ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
+        response_cache: ResponseCache,
+        cache_ttl,
+    ):
+        #pylint: disable=arguments-differ
+        super().initialize(ruby_pcsd_wrapper)
+        self.__response_cache = response_cache
+        self.__cache_ttl = cache_ttl
+
+    async def request_sinatra(self):
+        if self.request.method != "GET":
+            return await super().request_sinatra()
+        return await self.__response_cache.get(
+            (
+                self.request.method,
+                self.request.uri,
+                tuple(
+                    self.get_cookie(name)
+                    for name in ("token", "CIB_user", "CIB_user_groups")
+                ),
+            ),
+            self.__cache_ttl,
+            super().request_sinatra,
+            is_cacheable=lambda result: result.status == 200,
+        )
+
+class SyncConfigMutualExclusive(SinatraRemoteStreamed):
     """
     SyncConfigMutualExclusive handles urls which should be directed to the
     Sinatra remote (non-GUI) functions that can not run at the same time as
     config synchronization. The exclusivity is achived by sync_config_lock.
+    Config files changed by the request are recorded as sent by another node,
+    so the config synchronization does not send them back to the nodes.
     """
     def initialize(
-        self, sync_config_lock: Lock, ruby_pcsd_wrapper: ruby_pcsd.Wrapper
+        self, sync_config_lock: Lock, ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
+        peer_configs: config_sync.PeerConfigs
     ):
         #pylint: disable=arguments-differ
         super().initialize(ruby_pcsd_wrapper)
         self.__sync_config_lock = sync_config_lock
+        self.__peer_configs = peer_configs
 
     async def get(self, *args, **kwargs):
         async with self.__sync_config_lock:
+            hashes = self.__peer_configs.get_hashes()
             await super().get(*args, **kwargs)
+            self.__peer_configs.record_changes(hashes)
 
     async def post(self, *args, **kwargs):
-        async with self.__sync_config_lock:
-            await super().get(*args, **kwargs)
+        await self.get(*args, **kwargs)
 
-class SetCerts(SinatraRemote):
+class SetCerts(SinatraRemoteStreamed):
     """
     SetCerts handles url for setting new certificate and key. It calls the
     Sinatra for setting certificate and key and in the case of the success it
@@ -57,7 +160,7 @@ class SetCerts(SinatraRemote):
         self.__https_server_manage = https_server_manage
 
     async def handle_sinatra_request(self):
-        result = await self.ruby_pcsd_wrapper.request_remote(self.request)
+        result = await self.request_sinatra()
         if result.status == 200:
             self.__https_server_manage.reload_certs()
         self.send_sinatra_result(result)
@@ -77,18 +180,79 @@ class Auth(SinatraRemote):
     async def get(self, *args, **kwargs):
         await self.auth()
 
+class NativeRemote(BaseHandler):
+    """
+    NativeRemote handles read-only remote urls which are frequently polled by
+    other nodes and the GUI. It runs the action directly instead of calling the
+    Sinatra, so no ruby process is needed. The action runs in an executor as it
+    reads files and runs external processes.
+    """
+    def initialize(self, action):
+        #pylint: disable=arguments-differ
+        self.__action = action
+
+    async def handle_native_request(self):
+        status, body = await IOLoop.current().run_in_executor(
+            None,
+            native_remote.run_action,
+            self.__action,
+            get_cookies(self.request),
+        )
+        # the same content type as the Sinatra returns
+        self.set_header("Content-Type", "text/html;charset=utf-8")
+        self.set_status(status)
+        self.write(body)
+
+    async def get(self, *args, **kwargs):
+        await self.handle_native_request()
+
+    async def post(self, *args, **kwargs):
+        await self.handle_native_request()
+
+class Metrics(BaseHandler):
+    """
+    Metrics provides metrics of the daemon in the Prometheus text format. It is
+    authenticated by a token in the same way as remote requests. The token may
+    be sent in an "Authorization: Bearer" header as well, which is what
+    Prometheus supports.
+    """
+    async def get(self, *args, **kwargs):
+        cookies = get_cookies(self.request)
+        authorization = self.request.headers.get("Authorization", "")
+        if authorization.startswith("Bearer "):
+            cookies["token"] = authorization[len("Bearer "):].strip()
+        status, body = await IOLoop.current().run_in_executor(
+            None,
+            native_remote.run_action,
+            native_remote.check_metrics_access,
+            cookies,
+        )
+        if status != 200:
+            self.set_status(status)
+            self.write(body)
+            return
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.write(metrics.render())
+
 def get_routes(
     ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
     sync_config_lock: Lock,
     https_server_manage: HttpsServerManage,
+    response_cache: ResponseCache,
+    peer_configs: config_sync.PeerConfigs,
 ):
     ruby_wrapper = dict(ruby_pcsd_wrapper=ruby_pcsd_wrapper)
-    lock = dict(sync_config_lock=sync_config_lock)
+    lock = dict(sync_config_lock=sync_config_lock, peer_configs=peer_configs)
     server_manage = dict(https_server_manage=https_server_manage)
+    cached = lambda ttl: dict(
+        response_cache=response_cache,
+        cache_ttl=ttl,
+        **ruby_wrapper
+    )
 
     return [
-        # Urls protected by tokens. It is still done by ruby pcsd.
-        (r"/run_pcs", SinatraRemote, ruby_wrapper),
+        # Urls protected by tokens.
+        (r"/run_pcs", SinatraRemoteStreamed, ruby_wrapper),
         (r"/remote/set_certs", SetCerts, {**ruby_wrapper, **server_manage}),
         (
             r"/remote/(set_sync_options|set_configs)",
@@ -96,5 +260,36 @@ def get_routes(
             {**ruby_wrapper, **lock}
         ),
         (r"/remote/auth", Auth, ruby_wrapper),
-        (r"/remote/.*", SinatraRemote, ruby_wrapper),
+        (r"/metrics", Metrics),
+        (
+            r"/remote/check_auth",
+            NativeRemote,
+            dict(action=native_remote.check_auth)
+        ),
+        (
+            r"/remote/get_corosync_conf",
+            NativeRemote,
+            dict(action=native_remote.get_corosync_conf)
+        ),
+        (
+            r"/remote/get_quorum_info",
+            NativeRemote,
+            dict(action=native_remote.get_quorum_info)
+        ),
+        (
+            r"/remote/pacemaker_node_status",
+            NativeRemote,
+            dict(action=native_remote.pacemaker_node_status)
+        ),
+        (
+            r"/remote/status",
+            CachedSinatraRemote,
+            cached(settings.pcsd_cache_ttl_remote_status)
+        ),
+        (
+            r"/remote/cluster_status",
+            CachedSinatraRemote,
+            cached(settings.pcsd_cache_ttl_remote_cluster_status)
+        ),
+        (r"/remote/.*", SinatraRemoteStreamed, ruby_wrapper),
     ]
@@ -36,13 +36,6 @@ class Mixin:
             )
         return self.__session
 
-    def prepare(self):
-        """
-        Expired sessions are removed before each request that uses sessions (it
-        means before each request that is handled by descendant of this mixin).
-        """
-        self.__storage.drop_expired()
-
     def session_logout(self):
         if self.__session is not None:
             self.__storage.destroy(self.__session.sid)
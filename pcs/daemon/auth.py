@@ -1,14 +1,22 @@
+from base64 import b64decode
 from collections import namedtuple
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from ctypes import byref, cast, CDLL, CFUNCTYPE, POINTER, sizeof, Structure
 from ctypes import c_char, c_char_p, c_int, c_uint, c_void_p
 from ctypes.util import find_library
 import grp
+import json
+import os
 import pwd
+from threading import Lock
+from time import time as now
 
 from tornado.gen import coroutine
+from tornado.ioloop import IOLoop
 
-from pcs.daemon import log
+from pcs import settings
+from pcs.daemon import log, metrics
 
 # pylint: disable=invalid-name, too-few-public-methods
 
@@ -57,6 +65,7 @@ PAM_SUCCESS = 0
 PAM_PROMPT_ECHO_OFF = 1
 PCSD_SERVICE = "pcsd"
 HA_ADM_GROUP = "haclient"# TODO use pacemaker_gname (??? + explanation why)
+SUPERUSER = settings.pacemaker_uname
 
 def authenticate_by_pam(username, password):
     @pam_conversation
@@ -85,7 +94,62 @@ def authenticate_by_pam(username, password):
     pam_end(pamh, returncode)
     return returncode == PAM_SUCCESS
 
+# Groups of users are read from these files by default. Other sources (e.g.
+# sssd) are covered by the ttl of the user groups cache.
+USER_GROUPS_FILES = ("/etc/group", "/etc/passwd")
+
+class UserGroupsCache:
+    """
+    UserGroupsCache keeps groups of users for a limited time. All groups are
+    forgotten as soon as any of the watched files changes.
+    """
+    def __init__(self, ttl, watched_files=USER_GROUPS_FILES):
+        self.__ttl = ttl
+        self.__watched_files = watched_files
+        self.__files_state = None
+        self.__groups = {}
+        # Loading groups is not thread safe (getgrall), so it is done under the
+        # lock as well.
+        self.__lock = Lock()
+
+    def get(self, username, load_groups):
+        """
+        Return cached groups of the user or load and cache them
+
+        string username -- name of the user
+        callable load_groups -- takes username, returns groups or raises
+        """
+        with self.__lock:
+            files_state = self.__get_files_state()
+            if files_state != self.__files_state:
+                self.__files_state = files_state
+                self.__groups.clear()
+
+            if username in self.__groups:
+                expiration, groups = self.__groups[username]
+                if expiration > now():
+                    return groups
+
+            groups = load_groups(username)
+            self.__groups[username] = (now() + self.__ttl, groups)
+            return groups
+
+    def __get_files_state(self):
+        state = []
+        for path in self.__watched_files:
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+_user_groups_cache = UserGroupsCache(settings.pcsd_user_groups_cache_ttl)
+
 def get_user_groups_sync(username):
+    return _user_groups_cache.get(username, load_user_groups)
+
+def load_user_groups(username):
     return tuple([
         group.gr_name
         for group in grp.getgrall()
@@ -158,17 +222,112 @@ def check_user_groups_sync(username, logger) -> UserAuthInfo:
     logger.success(username)
     return UserAuthInfo(username, groups, is_authorized=True)
 
-def authorize_user_sync(username, password) -> UserAuthInfo:
+def authenticate_user_sync(username, password):
     log.pcsd.info("Attempting login by '%s'", username)
 
     if not authenticate_by_pam(username, password):
         log.pcsd.info(
             "Failed login by '%s' (bad username or password)", username
         )
+        return False
+    return True
+
+def authorize_user_sync(username, password) -> UserAuthInfo:
+    if not authenticate_user_sync(username, password):
         return UserAuthInfo(username, [], is_authorized=False)
 
     return check_user_groups_sync(username, LoginLogger())
 
+def get_username_by_token_sync(token):
+    """
+    Return name of the user the token has been issued for or None
+    """
+    if not token:
+        return None
+    try:
+        with open(settings.pcsd_users_conf_location) as users_file:
+            user_list = json.load(users_file)
+    except (EnvironmentError, ValueError):
+        return None
+    for user in user_list:
+        if isinstance(user, dict) and user.get("token") == token:
+            return user.get("username")
+    return None
+
+def login_by_token_sync(cookies) -> UserAuthInfo:
+    """
+    Authenticate a request from another node or a client by the token cookie
+    the same way the Sinatra does it. The superuser is allowed to act on behalf
+    of the user specified in the CIB_user and CIB_user_groups cookies.
+
+    dict cookies -- cookie name: cookie value
+    """
+    username = get_username_by_token_sync(cookies.get("token"))
+    if username is None:
+        return UserAuthInfo(None, [], is_authorized=False)
+
+    if username != SUPERUSER:
+        try:
+            groups = get_user_groups_sync(username)
+        except KeyError as e:
+            PlainLogger.unable_determine_groups(username, e)
+            groups = []
+        return UserAuthInfo(username, list(groups), is_authorized=True)
+
+    cib_user = cookies.get("CIB_user", "").strip()
+    if not cib_user:
+        return UserAuthInfo(SUPERUSER, [], is_authorized=True)
+    try:
+        groups = b64decode(
+            cookies.get("CIB_user_groups", "").strip()
+        ).decode("utf-8").split()
+    except ValueError:
+        groups = []
+    return UserAuthInfo(cib_user, groups, is_authorized=True)
+
+class ProcessPool:
+    """
+    ProcessPool keeps long-lived worker processes, so a process is not forked
+    for each request. The workers are started on the first use. When a worker
+    dies, the broken pool is replaced by a new one. Records logged in the
+    workers are written to the log of this process.
+    """
+    def __init__(self, max_workers):
+        self.__max_workers = max_workers
+        self.__executor = None
+        self.__child_log = None
+
+    def submit(self, sync_fn, *args):
+        if self.__executor is None:
+            if self.__child_log is None:
+                self.__child_log = log.ChildProcessLog()
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.__max_workers,
+                initializer=log.setup_child_process,
+                initargs=(self.__child_log.queue,),
+            )
+        try:
+            return self.__executor.submit(sync_fn, *args)
+        except BrokenProcessPool:
+            log.pcsd.warning("Authentication process pool broken, restarting")
+            # The workers have been terminated already. Not waiting for the
+            # pool to finish its cleanup races with it on python 3.7.
+            self.__executor.shutdown()
+            self.__executor = None
+            return self.submit(sync_fn, *args)
+
+    def shutdown(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+        if self.__child_log is not None:
+            self.__child_log.stop()
+            self.__child_log = None
+
+# PAM authentication runs in separate processes. Some PAM modules are not
+# thread safe and a crash of a module does not take the whole daemon down.
+_process_pool = ProcessPool(settings.pcsd_auth_process_pool_size)
+
 # TODO async/await version - how to do it?
 # When async/await is used then the problem is:
 # "TypeError: object Future can't be used in 'await' expression" is raised even
@@ -176,17 +335,29 @@ def authorize_user_sync(username, password) -> UserAuthInfo:
 # http://www.tornadoweb.org/en/stable/guide/coroutines.html#python-3-5-async-and-await
 @coroutine
 def run_in_process(sync_fn, *args):
-    pool = ProcessPoolExecutor(max_workers=1)
-    result = yield pool.submit(sync_fn, *args)
-    pool.shutdown()
+    result = yield _process_pool.submit(sync_fn, *args)
     return result
 
 @coroutine
 def authorize_user(username, password) -> UserAuthInfo:
-    user = yield run_in_process(authorize_user_sync, username, password)
+    # Only PAM runs in a worker process. Groups are checked here, so the groups
+    # cache is shared by all requests.
+    with metrics.auth_duration.time("pam"):
+        is_authenticated = yield run_in_process(
+            authenticate_user_sync, username, password
+        )
+    if not is_authenticated:
+        return UserAuthInfo(username, [], is_authorized=False)
+    with metrics.auth_duration.time("groups"):
+        user = yield IOLoop.current().run_in_executor(
+            None, check_user_groups_sync, username, LoginLogger()
+        )
     return user
 
 @coroutine
 def check_user_groups(username) -> UserAuthInfo:
-    user = yield run_in_process(check_user_groups_sync, username, PlainLogger())
+    with metrics.auth_duration.time("groups"):
+        user = yield IOLoop.current().run_in_executor(
+            None, check_user_groups_sync, username, PlainLogger()
+        )
     return user
@@ -0,0 +1,314 @@
+import ctypes
+from ctypes.util import find_library
+import errno
+import hashlib
+import json
+import os
+import os.path
+import struct
+
+from tornado.ioloop import IOLoop
+
+from pcs.daemon import log, ruby_pcsd
+
+# Config files are synchronized across the cluster nodes by ruby. Pcsd runs
+# the synchronization in the time given by ruby (the interval from cfgsync_ctl)
+# and shortly after a synced file has been changed locally. Fetching configs
+# from the nodes does not need the sync_config_lock, it is held only while the
+# fetched configs are saved. Configs sent by other nodes are saved with the lock
+# held as well and they are not sent back to the nodes.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+# struct inotify_event: int wd, uint32 mask, uint32 cookie, uint32 len, name
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READ_SIZE = 64 * 1024
+
+class FileWatcher:
+    """
+    FileWatcher calls a callback when any of the files has been written,
+    created, replaced or removed. It uses inotify on the directories of the
+    files, so files which do not exist yet and files replaced by rename are
+    watched as well.
+    """
+    def __init__(self, path_list, on_change):
+        self.__on_change = on_change
+        # directory -> set of file names
+        self.__watched = {}
+        for path in path_list:
+            self.__watched.setdefault(
+                os.path.dirname(path), set()
+            ).add(os.path.basename(path))
+        # watch descriptor -> directory
+        self.__watch_descriptors = {}
+        self.__inotify_fd = None
+
+    def start(self):
+        """
+        Start watching, return False if inotify is not available
+        """
+        inotify_fd = None
+        try:
+            libc = ctypes.CDLL(find_library("c"), use_errno=True)
+            inotify_fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if inotify_fd < 0:
+                inotify_fd = None
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            for directory in self.__watched:
+                watch_descriptor = libc.inotify_add_watch(
+                    inotify_fd,
+                    directory.encode(),
+                    IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE,
+                )
+                if watch_descriptor < 0:
+                    raise OSError(
+                        ctypes.get_errno(),
+                        f"Unable to watch directory '{directory}'"
+                    )
+                self.__watch_descriptors[watch_descriptor] = directory
+        except (AttributeError, OSError) as e:
+            if inotify_fd is not None:
+                os.close(inotify_fd)
+            self.__watch_descriptors = {}
+            log.pcsd.warning(
+                "Unable to watch config files, changes are synchronized "
+                "periodically only: %s",
+                e
+            )
+            return False
+        self.__inotify_fd = inotify_fd
+        IOLoop.current().add_handler(
+            inotify_fd, self.__handle_events, IOLoop.READ
+        )
+        return True
+
+    def stop(self):
+        """
+        Stop watching and close the inotify file descriptor
+        """
+        if self.__inotify_fd is None:
+            return
+        IOLoop.current().remove_handler(self.__inotify_fd)
+        os.close(self.__inotify_fd)
+        self.__inotify_fd = None
+        self.__watch_descriptors = {}
+
+    def __handle_events(self, inotify_fd, events):
+        # pylint: disable=unused-argument
+        try:
+            data = os.read(inotify_fd, INOTIFY_READ_SIZE)
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                log.pcsd.error("Unable to read inotify events: %s", e)
+            return
+        if any(
+            name in self.__watched.get(
+                self.__watch_descriptors.get(watch_descriptor), ()
+            )
+            for watch_descriptor, name in parse_inotify_events(data)
+        ):
+            self.__on_change()
+
+def parse_inotify_events(data):
+    """
+    Return a list of tuples (watch descriptor, file name) from inotify events
+    """
+    event_list = []
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        watch_descriptor, dummy_mask, dummy_cookie, name_len = (
+            INOTIFY_EVENT.unpack_from(data, offset)
+        )
+        offset += INOTIFY_EVENT.size
+        name = data[offset:offset + name_len].rstrip(b"\0").decode(
+            errors="replace"
+        )
+        offset += name_len
+        event_list.append((watch_descriptor, name))
+    return event_list
+
+def get_content_hashes(path_list):
+    hashes = []
+    for path in path_list:
+        try:
+            with open(path, "rb") as config_file:
+                hashes.append(hashlib.sha256(config_file.read()).hexdigest())
+        except OSError:
+            hashes.append(None)
+    return hashes
+
+class PeerConfigs:
+    """
+    PeerConfigs records content hashes of config files saved on request of
+    other nodes. The record is kept in a file shared by all pcsd processes and
+    it is accessed only with the sync_config_lock held.
+    """
+    def __init__(self, record_path, path_list):
+        """
+        string record_path -- the file keeping the record
+        list path_list -- synchronized config files
+        """
+        self.__record_path = record_path
+        self.__path_list = path_list
+
+    @property
+    def path_list(self):
+        return self.__path_list
+
+    def get_hashes(self):
+        return get_content_hashes(self.__path_list)
+
+    def record_changes(self, hashes_before):
+        """
+        Record the files which have changed since their hashes were taken
+
+        list hashes_before -- hashes of the files before the configs were saved
+        """
+        record = self.__load()
+        for path, before, after in zip(
+            self.__path_list, hashes_before, self.get_hashes()
+        ):
+            if after != before:
+                record[path] = after
+        if not record:
+            return
+        try:
+            with open(self.__record_path, "w") as record_file:
+                json.dump(record, record_file)
+        except OSError as e:
+            log.pcsd.error(
+                "Unable to write config files sent by other nodes to '%s': %s",
+                self.__record_path,
+                e
+            )
+
+    def take(self):
+        """
+        Return the recorded hashes keyed by file paths and clear the record
+        """
+        record = self.__load()
+        if record:
+            try:
+                os.remove(self.__record_path)
+            except OSError as e:
+                log.pcsd.error(
+                    "Unable to remove '%s': %s", self.__record_path, e
+                )
+        return record
+
+    def __load(self):
+        try:
+            with open(self.__record_path) as record_file:
+                return json.load(record_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.pcsd.error("Unable to read '%s': %s", self.__record_path, e)
+            return {}
+
+class ConfigSync:
+    """
+    ConfigSync runs the synchronization of config files periodically and when
+    the files change locally
+    """
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self, sync_config_lock, ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
+        peer_configs: PeerConfigs, trigger_delay=2
+    ):
+        """
+        sync_config_lock -- held while the fetched configs are saved
+        peer_configs -- config files triggering the synchronization and the
+            record of their content sent by other nodes
+        number trigger_delay -- seconds to wait for more changes of the files
+        """
+        self.__sync_config_lock = sync_config_lock
+        self.__ruby_pcsd_wrapper = ruby_pcsd_wrapper
+        self.__peer_configs = peer_configs
+        self.__trigger_delay = trigger_delay
+        self.__running = False
+        self.__scheduled = None
+        self.__file_watcher = FileWatcher(
+            peer_configs.path_list,
+            lambda: IOLoop.current().spawn_callback(self.on_files_changed),
+        )
+        # Hashes of the content of the files when they were seen last time.
+        # Changes written by the synchronization itself and writes not changing
+        # the content do not trigger the synchronization.
+        self.__hashes = peer_configs.get_hashes()
+
+    def start(self):
+        self.__file_watcher.start()
+        IOLoop.current().add_callback(self.run)
+
+    def stop(self):
+        self.__file_watcher.stop()
+        if self.__scheduled is not None:
+            IOLoop.current().remove_timeout(self.__scheduled)
+            self.__scheduled = None
+
+    async def on_files_changed(self):
+        if self.__running:
+            # The files are checked when the synchronization finishes.
+            return
+        # Configs sent by other nodes are recorded before the lock is released.
+        async with self.__sync_config_lock:
+            hashes = self.__peer_configs.get_hashes()
+            changed_locally = self.__changed_locally(hashes)
+        self.__hashes = hashes
+        if changed_locally:
+            self.__schedule_push()
+
+    async def run(self, push=False):
+        """
+        bool push -- send local configs to nodes which have older ones
+        """
+        if self.__running:
+            return
+        self.__running = True
+        try:
+            next_run_time, configs = (
+                await self.__ruby_pcsd_wrapper.sync_configs(push=push)
+            )
+            # Files changed while the configs were fetched have been changed
+            # locally or by other nodes. Changes made while the configs are
+            # saved cannot be told apart from the saved configs.
+            async with self.__sync_config_lock:
+                hashes = self.__peer_configs.get_hashes()
+                changed_locally = self.__changed_locally(hashes)
+                if configs:
+                    await self.__ruby_pcsd_wrapper.save_synced_configs(configs)
+                    hashes = self.__peer_configs.get_hashes()
+            self.__hashes = hashes
+        finally:
+            self.__running = False
+        if changed_locally:
+            self.__schedule_push()
+        else:
+            self.__schedule(next_run_time)
+
+    def __changed_locally(self, hashes):
+        # Configs sent by other nodes have been sent to all the nodes already.
+        peer_hashes = self.__peer_configs.take()
+        return any(
+            new_hash != old_hash
+            and
+            (path not in peer_hashes or peer_hashes[path] != new_hash)
+            for path, old_hash, new_hash in zip(
+                self.__peer_configs.path_list, self.__hashes, hashes
+            )
+        )
+
+    def __schedule_push(self):
+        self.__schedule(
+            IOLoop.current().time() + self.__trigger_delay, push=True
+        )
+
+    def __schedule(self, run_time, push=False):
+        if self.__scheduled is not None:
+            IOLoop.current().remove_timeout(self.__scheduled)
+        self.__scheduled = IOLoop.current().call_at(run_time, self.run, push)
@@ -26,6 +26,11 @@ NOTIFY_SOCKET = "NOTIFY_SOCKET"
 PCSD_DEBUG = "PCSD_DEBUG"
 PCSD_DISABLE_GUI = "PCSD_DISABLE_GUI"
 PCSD_SESSION_LIFETIME = "PCSD_SESSION_LIFETIME"
+PCSD_SESSION_STORAGE = "PCSD_SESSION_STORAGE"
+PCSD_RUBY_WORKERS = "PCSD_RUBY_WORKERS"
+PCSD_RUBY_WORKER_MAX_REQUESTS = "PCSD_RUBY_WORKER_MAX_REQUESTS"
+PCSD_MAX_BODY_SIZE = "PCSD_MAX_BODY_SIZE"
+PCSD_WORKERS = "PCSD_WORKERS"
 GEM_HOME = "GEM_HOME"
 PCSD_DEV = "PCSD_DEV"
 PCSD_CMDLINE_ENTRY = "PCSD_CMDLINE_ENTRY"
@@ -33,6 +38,10 @@ PCSD_STATIC_FILES_DIR = "PCSD_STATIC_FILES_DIR"
 HTTPS_PROXY = "HTTPS_PROXY"
 NO_PROXY = "NO_PROXY"
 
+SESSION_STORAGE_MEMORY = "memory"
+SESSION_STORAGE_FILE = "file"
+SESSION_STORAGE_LIST = [SESSION_STORAGE_MEMORY, SESSION_STORAGE_FILE]
+
 Env = namedtuple("Env", [
     PCSD_PORT,
     PCSD_SSL_CIPHERS,
@@ -42,6 +51,11 @@ Env = namedtuple("Env", [
     PCSD_DEBUG,
     PCSD_DISABLE_GUI,
     PCSD_SESSION_LIFETIME,
+    PCSD_SESSION_STORAGE,
+    PCSD_RUBY_WORKERS,
+    PCSD_RUBY_WORKER_MAX_REQUESTS,
+    PCSD_MAX_BODY_SIZE,
+    PCSD_WORKERS,
     GEM_HOME,
     PCSD_CMDLINE_ENTRY,
     PCSD_STATIC_FILES_DIR,
@@ -62,6 +76,11 @@ def prepare_env(environ, logger=None):
         loader.pcsd_debug(),
         loader.pcsd_disable_gui(),
         loader.session_lifetime(),
+        loader.session_storage(),
+        loader.ruby_workers(),
+        loader.ruby_worker_max_requests(),
+        loader.max_body_size(),
+        loader.workers(),
         loader.gem_home(),
         loader.pcsd_cmdline_entry(),
         loader.pcsd_static_files_dir(),
@@ -170,6 +189,43 @@ class EnvLoader:
             )
             return session_lifetime
 
+    def session_storage(self):
+        session_storage = self.environ.get(
+            PCSD_SESSION_STORAGE,
+            settings.pcsd_session_storage
+        )
+        if session_storage not in SESSION_STORAGE_LIST:
+            storage_list = " or ".join(SESSION_STORAGE_LIST)
+            self.errors.append(
+                f"Invalid PCSD_SESSION_STORAGE value '{session_storage}'"
+                f" (use {storage_list})"
+            )
+        return session_storage
+
+    def ruby_workers(self):
+        return self.__non_negative_integer(
+            PCSD_RUBY_WORKERS,
+            settings.pcsd_ruby_workers,
+        )
+
+    def ruby_worker_max_requests(self):
+        return self.__non_negative_integer(
+            PCSD_RUBY_WORKER_MAX_REQUESTS,
+            settings.pcsd_ruby_worker_max_requests,
+        )
+
+    def max_body_size(self):
+        return self.__non_negative_integer(
+            PCSD_MAX_BODY_SIZE,
+            settings.pcsd_max_body_size,
+        )
+
+    def workers(self):
+        return self.__non_negative_integer(
+            PCSD_WORKERS,
+            settings.pcsd_workers,
+        )
+
     def pcsd_debug(self):
         return self.__has_true_in_environ(PCSD_DEBUG)
 
@@ -217,5 +273,19 @@ class EnvLoader:
             self.errors.append(f"{description} '{in_pcsd_path}' does not exist")
         return in_pcsd_path
 
+    def __non_negative_integer(self, environ_key, default):
+        value = self.environ.get(environ_key, default)
+        try:
+            number = int(value)
+            if number >= 0:
+                return number
+        except ValueError:
+            pass
+        self.errors.append(
+            f"Invalid {environ_key} value '{value}'"
+            " (it must be a non-negative integer)"
+        )
+        return value
+
     def __has_true_in_environ(self, environ_key):
         return self.environ.get(environ_key, "").lower() == "true"
@@ -19,16 +19,30 @@ class HttpsServerManage:
     # For this purpose an application, which handles http requests, gets
     # a reference to the HttpsServerManage instance. When new certificates
     # arrive via a request the application asks the HttpsServerManage instance
-    # for necessary steps (it stops listening of the current HTTPServer and
-    # starts a new one with updated certificates).
+    # for necessary steps (it loads the updated certificates into the ssl
+    # context of the running HTTPServer). The server keeps listening and
+    # running requests are not interrupted.
 
-    def __init__(self, make_app, port, bind_addresses, ssl: PcsdSSL):
+    # The server settings are kept to be able to create a new server.
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self, make_app, port, bind_addresses, ssl: PcsdSSL, max_body_size=None,
+        reuse_port=False, body_timeout=None
+    ):
+        """
+        bool reuse_port -- allow other processes to bind the same port, so more
+            pcsd workers can listen on it
+        """
         self.__make_app = make_app
         self.__port = port
         self.__bind_addresses = bind_addresses
+        self.__max_body_size = max_body_size
+        self.__body_timeout = body_timeout
+        self.__reuse_port = reuse_port
 
         self.__server = None
         self.__ssl = ssl
+        self.__ssl_context = None
         self.__server_is_running = False
 
     @property
@@ -44,9 +58,12 @@ class HttpsServerManage:
 
         log.pcsd.info("Starting server...")
 
+        self.__ssl_context = self.__ssl.create_context()
         self.__server = HTTPServer(
             self.__make_app(self),
-            ssl_options=self.__ssl.create_context()
+            ssl_options=self.__ssl_context,
+            max_body_size=self.__max_body_size,
+            body_timeout=self.__body_timeout,
         )
 
         # It is necessary to bind sockets for every new HTTPServer since
@@ -58,7 +75,9 @@ class HttpsServerManage:
                 address if address is not None else "*",
                 self.__port
             )
-            sockets.extend(bind_sockets(self.__port, address))
+            sockets.extend(
+                bind_sockets(self.__port, address, reuse_port=self.__reuse_port)
+            )
 
         self.__server.add_sockets(sockets)
 
@@ -71,6 +90,10 @@ class HttpsServerManage:
             raise HttpsServerManageException(
                 "Could not reload certificates, server is not running"
             )
-        log.pcsd.info("Stopping server to reload ssl certificates...")
-        self.stop()
-        self.start()
+        log.pcsd.info("Reloading ssl certificates...")
+        self.__ssl.guarantee_valid_certs()
+        # Make sure the files can be loaded before touching the live context.
+        # A failed load could leave it with a certificate not matching its key.
+        self.__ssl.create_context()
+        self.__ssl.load_cert_chain(self.__ssl_context)
+        log.pcsd.info("Ssl certificates reloaded")
@@ -1,4 +1,9 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
+import queue
+import threading
 
 LOGGER_NAMES = [
     "pcs.daemon",
@@ -7,6 +12,14 @@ LOGGER_NAMES = [
     "tornado.general",
 ]
 
+# Records are written to the log file in a background thread. When the thread
+# cannot keep up and the queue is full, new records are dropped (and counted)
+# instead of blocking request handling.
+LOG_QUEUE_SIZE = 10000
+# The log file is flushed when the queue is empty or after this number of
+# records at the latest.
+LOG_BATCH_SIZE = 100
+
 #pylint:disable=invalid-name
 pcsd = logging.getLogger("pcs.daemon")
 
@@ -59,13 +72,145 @@ class Formatter(logging.Formatter):
             record.pcsd_group_id = "00000"
         return super().format(record)
 
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler puts records to a bounded queue. It never blocks, records
+    which do not fit in the queue are dropped and counted.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.__dropped_count = 0
+        self.__dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.__dropped_lock:
+                self.__dropped_count += 1
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        # The message already contains the exception and the stack info, they
+        # must not be appended again when the record is written.
+        record.exc_text = None
+        record.stack_info = None
+        return record
+
+    def pop_dropped_count(self):
+        with self.__dropped_lock:
+            dropped_count = self.__dropped_count
+            self.__dropped_count = 0
+        return dropped_count
+
+class BatchFileHandler(logging.handlers.WatchedFileHandler):
+    """
+    BatchFileHandler does not flush the file after each record. The file is
+    flushed by flush_batch when a batch of records has been written.
+    """
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+class QueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener writes records from the queue in a background thread. It
+    flushes the file once per batch of records and reports dropped records.
+    """
+    def __init__(self, queue_handler, handler, batch_size=LOG_BATCH_SIZE):
+        super().__init__(queue_handler.queue, handler)
+        self.__queue_handler = queue_handler
+        self.__handler = handler
+        self.__batch_size = batch_size
+        self.__unflushed_count = 0
+
+    def handle(self, record):
+        super().handle(record)
+        self.__unflushed_count += 1
+        if (
+            self.__unflushed_count >= self.__batch_size
+            or
+            self.queue.empty()
+        ):
+            self.__flush()
+
+    def enqueue_sentinel(self):
+        # The queue may be full, wait for the thread to make room for the
+        # sentinel instead of failing.
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        super().stop()
+        self.__flush()
+
+    def __flush(self):
+        dropped_count = self.__queue_handler.pop_dropped_count()
+        if dropped_count:
+            self.__handler.handle(pcsd.makeRecord(
+                name=pcsd.name,
+                level=logging.WARNING,
+                fn="(log)",
+                lno=0,
+                msg="%s log messages dropped, the log queue was full",
+                args=(dropped_count,),
+                exc_info=None,
+            ))
+        self.__handler.flush_batch()
+        self.__unflushed_count = 0
+
+class _ParentHandler(logging.Handler):
+    # Records from child processes are handled by the loggers of this process,
+    # so they are written by its logging thread.
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+class ChildProcessLog:
+    """
+    ChildProcessLog collects records logged in forked worker processes. The
+    workers inherit the queue handler, but not the thread writing the queue to
+    the log file. Their records are passed to this process through a process
+    safe queue instead.
+    """
+    def __init__(self):
+        self.queue = multiprocessing.Queue(LOG_QUEUE_SIZE)
+        self.__listener = logging.handlers.QueueListener(
+            self.queue, _ParentHandler()
+        )
+        self.__listener.start()
+
+    def stop(self):
+        """
+        Handle the remaining records, call it after the workers have exited
+        """
+        self.__listener.stop()
+        self.queue.close()
+
+def setup_child_process(log_queue):
+    """
+    Send records logged in a forked worker process to the parent process
+
+    multiprocessing.Queue log_queue -- the queue of a ChildProcessLog
+    """
+    for logger_name in LOGGER_NAMES:
+        pcsd_log = logging.getLogger(logger_name)
+        for handler in list(pcsd_log.handlers):
+            pcsd_log.removeHandler(handler)
+        pcsd_log.addHandler(QueueHandler(log_queue))
+
 def setup(log_file):
-    handler = logging.handlers.WatchedFileHandler(log_file, encoding="utf8")
+    handler = BatchFileHandler(log_file, encoding="utf8")
     handler.setFormatter(Formatter())
+    queue_handler = QueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    listener = QueueListener(queue_handler, handler)
+    listener.start()
+    # Write records waiting in the queue when the daemon exits.
+    atexit.register(listener.stop)
 
     for logger_name in LOGGER_NAMES:
         pcsd_log = logging.getLogger(logger_name)
-        pcsd_log.addHandler(handler)
+        pcsd_log.addHandler(queue_handler)
         pcsd_log.setLevel(logging.INFO)
 
 def enable_debug():
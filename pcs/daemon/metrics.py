@@ -0,0 +1,256 @@
+import threading
+from contextlib import contextmanager
+from time import monotonic
+
+from tornado.ioloop import IOLoop
+
+# Metrics of the daemon rendered in the Prometheus text exposition format.
+# Metrics are updated from the IOLoop as well as from executor threads, so all
+# updates are done under a lock. Each pcsd process keeps its own metrics. With
+# PCSD_WORKERS > 0, /metrics provides the metrics of the worker which happened
+# to get the request.
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{{{0}}}".format(",".join(
+        '{0}="{1}"'.format(
+            name,
+            str(value)
+                .replace("\\", "\\\\")
+                .replace("\n", "\\n")
+                .replace('"', '\\"')
+        )
+        for name, value in pairs
+    ))
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, description, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ] + self._render_samples()
+
+    def _render_samples(self):
+        raise NotImplementedError()
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name, description, label_names=()):
+        super().__init__(name, description, label_names)
+        self.__values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.__values[label_values] = (
+                self.__values.get(label_values, 0) + amount
+            )
+
+    def _render_samples(self):
+        with self._lock:
+            values = sorted(self.__values.items())
+        return [
+            "{0}{1} {2}".format(
+                self.name,
+                _format_labels(self.label_names, label_values),
+                _format_value(value),
+            )
+            for label_values, value in values
+        ]
+
+class Gauge(_Metric):
+    """
+    Gauge holds a value which is either set or provided by a function when the
+    metrics are rendered.
+    """
+    metric_type = "gauge"
+
+    def __init__(self, name, description):
+        super().__init__(name, description)
+        self.__value = 0
+        self.__get_value = None
+
+    def set(self, value):
+        with self._lock:
+            self.__value = value
+
+    def set_function(self, get_value):
+        self.__get_value = get_value
+
+    def _render_samples(self):
+        if self.__get_value is not None:
+            value = self.__get_value()
+        else:
+            with self._lock:
+                value = self.__value
+        return [f"{self.name} {_format_value(value)}"]
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self, name, description, label_names=(), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description, label_names)
+        self.__buckets = tuple(buckets) + (float("inf"),)
+        # label values -> [bucket counts, sum, count]
+        self.__values = {}
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            if label_values not in self.__values:
+                self.__values[label_values] = [[0] * len(self.__buckets), 0, 0]
+            entry = self.__values[label_values]
+            for i, bound in enumerate(self.__buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.observe(monotonic() - start, *label_values)
+
+    def _render_samples(self):
+        with self._lock:
+            values = sorted(
+                (label_values, (list(bucket_counts), total, count))
+                for label_values, (bucket_counts, total, count)
+                in self.__values.items()
+            )
+        samples = []
+        for label_values, (bucket_counts, total, count) in values:
+            for bound, bucket_count in zip(self.__buckets, bucket_counts):
+                samples.append("{0}_bucket{1} {2}".format(
+                    self.name,
+                    _format_labels(
+                        self.label_names,
+                        label_values,
+                        [("le", _format_value(bound))]
+                    ),
+                    bucket_count,
+                ))
+            labels = _format_labels(self.label_names, label_values)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {count}")
+        return samples
+
+class TimedLock:
+    """
+    TimedLock wraps a tornado lock and measures how long it is waited for
+    """
+    def __init__(self, lock, wait_histogram: Histogram):
+        self.__lock = lock
+        self.__wait_histogram = wait_histogram
+
+    async def acquire(self):
+        with self.__wait_histogram.time():
+            await self.__lock.acquire()
+
+    def release(self):
+        self.__lock.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class IOLoopLagMonitor:
+    """
+    IOLoopLagMonitor measures how late a callback scheduled in the IOLoop runs.
+    A big lag means that something blocks the IOLoop.
+    """
+    def __init__(self, lag_gauge: Gauge, interval=1):
+        self.__lag_gauge = lag_gauge
+        self.__interval = interval
+
+    def start(self):
+        self.__schedule()
+
+    def __schedule(self):
+        expected_time = IOLoop.current().time() + self.__interval
+        IOLoop.current().call_at(expected_time, self.__check, expected_time)
+
+    def __check(self, expected_time):
+        self.__lag_gauge.set(max(0, IOLoop.current().time() - expected_time))
+        self.__schedule()
+
+http_requests = Counter(
+    "pcsd_http_requests_total",
+    "Number of handled http requests",
+    ["route", "method", "code"],
+)
+http_request_duration = Histogram(
+    "pcsd_http_request_duration_seconds",
+    "Time of handling http requests",
+    ["route", "method"],
+)
+ruby_spawn_duration = Histogram(
+    "pcsd_ruby_spawn_duration_seconds",
+    "Time from starting a ruby worker until it is ready to handle requests",
+    ["kind"],
+)
+ruby_run_duration = Histogram(
+    "pcsd_ruby_run_duration_seconds",
+    "Time of running requests in ruby",
+    ["type"],
+)
+sync_config_lock_wait = Histogram(
+    "pcsd_sync_config_lock_wait_seconds",
+    "Time of waiting for the config synchronization lock",
+)
+auth_duration = Histogram(
+    "pcsd_auth_duration_seconds",
+    "Time of authenticating users and checking their groups",
+    ["kind"],
+)
+sessions = Gauge(
+    "pcsd_sessions",
+    "Number of web UI sessions",
+)
+ioloop_lag = Gauge(
+    "pcsd_ioloop_lag_seconds",
+    "How late the last periodic check in the IOLoop ran",
+)
+
+METRIC_LIST = [
+    http_requests,
+    http_request_duration,
+    ruby_spawn_duration,
+    ruby_run_duration,
+    sync_config_lock_wait,
+    auth_duration,
+    sessions,
+    ioloop_lag,
+]
+
+def render(metric_list=None):
+    return "".join(
+        line + "\n"
+        for metric in (METRIC_LIST if metric_list is None else metric_list)
+        for line in metric.render()
+    )
@@ -0,0 +1,107 @@
+import json
+import os
+import os.path
+
+from pcs import settings
+from pcs.cli.common.reports import build_report_message
+from pcs.daemon import log
+from pcs.daemon.auth import login_by_token_sync, SUPERUSER
+from pcs.daemon.permissions import get_local_permissions, READ
+from pcs.lib.corosync.live import get_local_corosync_conf
+from pcs.lib.errors import LibraryError
+from pcs.lib.external import CommandRunner, is_service_running
+from pcs.lib.pacemaker.live import get_local_node_status
+
+# Read-only remote actions frequently called by other nodes and the GUI are
+# served without the Sinatra. Their responses are the same as the ones of the
+# Sinatra remote actions in pcsd/remote.rb.
+
+NOT_AUTHORIZED = (401, '{"notauthorized":"true"}')
+PERMISSION_DENIED = (403, "Permission denied")
+
+
+class _ReportLogger:
+    # pylint: disable=too-few-public-methods
+    @staticmethod
+    def process(report_item):
+        log.pcsd.debug(build_report_message(report_item))
+
+
+def _get_runner(user):
+    env_vars = dict(os.environ)
+    env_vars.update({
+        "CIB_user": user.name,
+        "CIB_user_groups": " ".join(user.groups),
+        "LC_ALL": "C",
+    })
+    return CommandRunner(log.pcsd, _ReportLogger(), env_vars)
+
+
+def _is_allowed(user, action):
+    return get_local_permissions().allows(user.name, user.groups, action)
+
+
+def run_action(action, cookies):
+    """
+    Authenticate the request and run the action. Return a tuple (status code,
+    response body). It blocks, so it is meant to be run in an executor.
+
+    callable action -- one of the actions below, gets UserAuthInfo
+    dict cookies -- cookies of the request
+    """
+    user = login_by_token_sync(cookies)
+    if not user.is_authorized:
+        return NOT_AUTHORIZED
+    return action(user)
+
+
+def check_auth(user):
+    # pylint: disable=unused-argument
+    # If we get here, the user has been already authenticated.
+    return 200, '{"success":true}'
+
+
+def check_metrics_access(user):
+    # Metrics do not contain cluster data, but they tell a lot about the node.
+    if not _is_allowed(user, READ):
+        return PERMISSION_DENIED
+    return 200, ""
+
+
+def get_corosync_conf(user):
+    if not _is_allowed(user, READ):
+        return PERMISSION_DENIED
+    try:
+        return 200, get_local_corosync_conf()
+    except LibraryError:
+        return 200, ""
+
+
+def get_quorum_info(user):
+    if not _is_allowed(user, READ):
+        return PERMISSION_DENIED
+    # The Sinatra runs the tool as the superuser as well.
+    runner = _get_runner(user._replace(name=SUPERUSER, groups=[]))
+    stdout, stderr, dummy_retval = runner.run([
+        os.path.join(settings.corosync_binaries, "corosync-quorumtool"),
+        "-p",
+        "-s",
+    ])
+    # retval is 0 on success if node is not in partition with quorum
+    # retval is 1 on error OR on success if node has quorum
+    return 200, stderr if stderr else stdout
+
+
+def pacemaker_node_status(user):
+    runner = _get_runner(user)
+    if not is_service_running(runner, "pacemaker"):
+        return 200, '{"pacemaker_not_running":true}'
+    if not _is_allowed(user, READ):
+        return PERMISSION_DENIED
+    try:
+        return 200, json.dumps(get_local_node_status(runner))
+    except LibraryError as e:
+        return 400, "".join(
+            "Error: {0}\n".format(build_report_message(report))
+            for report in e.args
+        )
@@ -0,0 +1,114 @@
+import json
+from collections import defaultdict
+
+from pcs import settings
+from pcs.daemon import log
+
+# The same permissions as in pcsd/permissions.rb
+
+TYPE_USER = "user"
+TYPE_GROUP = "group"
+
+READ = "read"
+WRITE = "write"
+GRANT = "grant"
+FULL = "full"
+
+ALSO_ALLOWS = {
+    WRITE: [READ],
+    FULL: [READ, WRITE, GRANT],
+}
+
+# All members of the admin group have access to pacemaker anyway. Those are the
+# permissions when there is no pcs_settings file (a new cluster or an old one
+# without permissions support).
+DEFAULT_PERMISSIONS = [
+    {"type": TYPE_GROUP, "name": "haclient", "allow": [READ, WRITE, GRANT]},
+]
+
+CURRENT_FORMAT = 2
+
+
+class PermissionsSet:
+    def __init__(self, entity_permissions_list):
+        """
+        list entity_permissions_list -- dicts with keys type, name, allow
+        """
+        self.__allow_map = {
+            TYPE_USER: defaultdict(set),
+            TYPE_GROUP: defaultdict(set),
+        }
+        for entity in entity_permissions_list:
+            if entity.get("type") in self.__allow_map:
+                self.__allow_map[entity["type"]][entity.get("name")].update(
+                    entity.get("allow") or []
+                )
+
+    def allows(self, username, group_list, action):
+        if username == settings.pacemaker_uname:
+            return True
+        return (
+            self.__entity_allows(TYPE_USER, username, action)
+            or
+            any(
+                self.__entity_allows(TYPE_GROUP, group, action)
+                for group in group_list
+            )
+        )
+
+    def __entity_allows(self, entity_type, name, action):
+        allow_set = self.__allow_map[entity_type].get(name, set())
+        return action in allow_set or any(
+            action in ALSO_ALLOWS.get(allowed, []) for allowed in allow_set
+        )
+
+
+def get_local_permissions(path=None):
+    """
+    Return PermissionsSet of the local cluster read from the pcs_settings file
+    the same way ruby pcsd does it
+
+    string path -- path of the pcs_settings file, the default one if None
+    """
+    path = path or settings.pcsd_settings_conf_location
+    try:
+        with open(path) as settings_file:
+            text = settings_file.read()
+    except FileNotFoundError:
+        return PermissionsSet(DEFAULT_PERMISSIONS)
+    except EnvironmentError as e:
+        log.pcsd.error("Unable to read pcs_settings file: %s", e)
+        return PermissionsSet([])
+    if not text.strip():
+        return PermissionsSet([])
+    try:
+        return PermissionsSet(_parse_permissions(json.loads(text)))
+    except (ValueError, TypeError, AttributeError) as e:
+        log.pcsd.error("Unable to parse pcs_settings file: %s", e)
+        return PermissionsSet([])
+
+
+def _parse_permissions(data):
+    if isinstance(data, list):
+        # format version 1, there were no permissions
+        return DEFAULT_PERMISSIONS
+    if not (
+        isinstance(data, dict)
+        and
+        isinstance(data.get("format_version"), int)
+    ):
+        raise ValueError("invalid file format")
+    format_version = data["format_version"]
+    if format_version > CURRENT_FORMAT:
+        log.pcsd.warning(
+            "pcs_settings file format version is %s, newest fully supported "
+            "version is %s",
+            format_version,
+            CURRENT_FORMAT,
+        )
+    if format_version >= 2:
+        return (data.get("permissions") or {}).get("local_cluster", [])
+    if format_version == 1:
+        return DEFAULT_PERMISSIONS
+    log.pcsd.error("Unable to parse pcs_settings file")
+    return []
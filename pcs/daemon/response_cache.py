@@ -0,0 +1,63 @@
+from time import time as now
+
+from tornado.concurrent import Future
+
+class ResponseCache:
+    """
+    ResponseCache keeps results of idempotent requests for a short time.
+
+    Identical requests running at the same time share one call of the backend.
+    A key must identify everything the result depends on including the user
+    and their groups (i.e. their permissions), so a result is never returned to
+    a user it was not produced for.
+    """
+    def __init__(self):
+        # key -> (expiration time, result)
+        self.__cache = {}
+        # key -> future of a running backend call
+        self.__pending = {}
+
+    async def get(self, key, ttl, produce, is_cacheable=lambda result: True):
+        """
+        Return a cached result for the key or the result of produce.
+
+        hashable key -- identification of the request
+        number ttl -- how long to keep the result in seconds, 0 disables cache
+        callable produce -- coroutine function returning a fresh result
+        callable is_cacheable -- tells if a fresh result can be kept
+        """
+        if ttl <= 0:
+            return await produce()
+
+        self.drop_expired()
+        if key in self.__cache:
+            return self.__cache[key][1]
+        if key in self.__pending:
+            return await self.__pending[key]
+
+        future = Future()
+        self.__pending[key] = future
+        try:
+            result = await produce()
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting for the future. Mark the exception as
+            # retrieved, it is raised here anyway.
+            future.exception()
+            raise
+        finally:
+            del self.__pending[key]
+
+        if is_cacheable(result):
+            self.__cache[key] = (now() + ttl, result)
+        future.set_result(result)
+        return result
+
+    def drop_expired(self):
+        current_time = now()
+        obsolete_key_list = [
+            key for key, (expiration, _) in self.__cache.items()
+            if expiration <= current_time
+        ]
+        for key in obsolete_key_list:
+            del self.__cache[key]
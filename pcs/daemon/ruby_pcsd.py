@@ -1,23 +1,29 @@
 import json
 import logging
 import os.path
+import socket
 from base64 import b64decode
 from collections import namedtuple
 from time import time as now
 
 from tornado.gen import Task, multi, convert_yielded
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.locks import Event
 from tornado.web import HTTPError
 from tornado.httputil import split_host_and_port, HTTPServerRequest
 from tornado.process import Subprocess
 
-from pcs.daemon import log
+from pcs.daemon import log, metrics
 
 
 SINATRA_GUI = "sinatra_gui"
 SINATRA_REMOTE = "sinatra_remote"
 SYNC_CONFIGS = "sync_configs"
+SYNC_CONFIGS_SAVE = "sync_configs_save"
 
 DEFAULT_SYNC_CONFIG_DELAY = 5
+WORKER_STDERR_CHUNK_SIZE = 64 * 1024
 RUBY_LOG_LEVEL_MAP = {
     "UNKNOWN": logging.NOTSET,
     "FATAL": logging.CRITICAL,
@@ -63,11 +69,244 @@ def log_communication(request_json, stdout, stderr):
     log.pcsd.debug("Response stdout from ruby pcsd wrapper: '%s'", stdout)
     log.pcsd.debug("Response stderr from ruby pcsd wrapper: '%s'", stderr)
 
+class RubyWorker:
+    """
+    RubyWorker is a long-lived ruby process which handles many requests.
+
+    Requests and responses are exchanged via stdin and stdout of the process.
+    Each message is framed: a line with the length of the json document in
+    bytes followed by the json document itself. A request with a streamed body
+    is followed by body chunks framed the same way and terminated by an empty
+    frame. The first frame sent by the worker tells it has loaded pcsd and is
+    ready to handle requests.
+    """
+    def __init__(self, cmdline, env):
+        self.__start_time = now()
+        self.__process = Subprocess(
+            cmdline,
+            stdin=Subprocess.STREAM,
+            stdout=Subprocess.STREAM,
+            stderr=Subprocess.STREAM,
+            env={**env, "PCSD_RUBY_WORKER": "true"},
+        )
+        self.__returncode = None
+        self.__process.set_exit_callback(self.__on_exit)
+        self.__stderr = []
+        self.handled_requests = 0
+        self.__ready = Event()
+        IOLoop.current().spawn_callback(self.__collect_stderr)
+        IOLoop.current().spawn_callback(self.__wait_until_ready)
+
+    @property
+    def is_alive(self):
+        return (
+            self.__returncode is None
+            and
+            not self.__process.stdin.closed()
+            and
+            not self.__process.stdout.closed()
+        )
+
+    def stop(self):
+        # The worker finishes when it reaches the end of its input.
+        if not self.__process.stdin.closed():
+            self.__process.stdin.close()
+
+    def kill(self):
+        self.stop()
+        if self.__returncode is None:
+            try:
+                self.__process.proc.kill()
+            except ProcessLookupError:
+                # the process has already exited, it just has not been
+                # reaped yet
+                pass
+
+    async def communicate(self, request_json):
+        """
+        Send a request to the worker and return (stdout, stderr, status) in the
+        same form as a one-shot ruby process does.
+
+        string request_json -- json encoded request
+        """
+        await self.send_request(request_json)
+        return await self.receive_response()
+
+    async def send_request(self, request_json):
+        self.handled_requests += 1
+        await self.__write_frame(str.encode(request_json))
+
+    async def send_body_chunk(self, chunk):
+        # An empty frame would terminate the body.
+        if chunk:
+            await self.__write_frame(chunk)
+
+    async def send_body_end(self):
+        await self.__write_frame(b"")
+
+    async def receive_response(self):
+        await self.__ready.wait()
+        # The response is read even if the worker has already exited, it may
+        # have written the response before exiting.
+        try:
+            stdout = await self.__read_frame()
+        except (StreamClosedError, ValueError):
+            # The worker crashed or broke the protocol. An empty response is
+            # treated as an invalid one by the caller.
+            self.kill()
+            stdout = b""
+        stderr = b"".join(self.__stderr)
+        self.__stderr.clear()
+        return stdout, stderr, self.__returncode
+
+    async def __read_frame(self):
+        length = int(await self.__process.stdout.read_until(b"\n"))
+        return await self.__process.stdout.read_bytes(length)
+
+    async def __wait_until_ready(self):
+        try:
+            process_response_logs(json.loads(await self.__read_frame())["logs"])
+            metrics.ruby_spawn_duration.observe(
+                now() - self.__start_time, "worker"
+            )
+        except (StreamClosedError, ValueError, KeyError, TypeError):
+            # Requests sent to the worker get an empty response.
+            self.kill()
+        finally:
+            self.__ready.set()
+
+    async def __write_frame(self, data):
+        if not self.is_alive:
+            return
+        try:
+            await self.__process.stdin.write(
+                str.encode(f"{len(data)}\n") + data
+            )
+        except StreamClosedError:
+            self.kill()
+
+    def __on_exit(self, returncode):
+        self.__returncode = returncode
+
+    async def __collect_stderr(self):
+        try:
+            while True:
+                self.__stderr.append(
+                    await self.__process.stderr.read_bytes(
+                        WORKER_STDERR_CHUNK_SIZE,
+                        partial=True
+                    )
+                )
+        except StreamClosedError:
+            pass
+
+class RubyWorkerPool:
+    """
+    RubyWorkerPool keeps up to `size` long-lived ruby workers.
+
+    A worker is recycled after it handled `max_requests` requests or when it
+    crashed. When all workers are busy, no worker is returned and the caller is
+    expected to fall back to a one-shot ruby process. Requests are never queued
+    since ruby handlers may call (via other nodes) the local pcsd again and
+    waiting for a free worker could deadlock.
+    """
+    def __init__(self, start_worker, size=0, max_requests=0):
+        self.__start_worker = start_worker
+        self.__size = size
+        self.__max_requests = max_requests
+        self.__idle_workers = []
+        self.__busy_workers = set()
+        self.__outdated_workers = set()
+
+    def acquire(self):
+        while self.__idle_workers:
+            worker = self.__idle_workers.pop()
+            if worker.is_alive:
+                self.__busy_workers.add(worker)
+                return worker
+            worker.kill()
+        if len(self.__busy_workers) >= self.__size:
+            return None
+        worker = self.__start_worker()
+        self.__busy_workers.add(worker)
+        return worker
+
+    def release(self, worker):
+        self.__busy_workers.discard(worker)
+        if worker in self.__outdated_workers:
+            self.__outdated_workers.discard(worker)
+            worker.stop()
+        elif (
+            worker.is_alive
+            and
+            (
+                not self.__max_requests
+                or
+                worker.handled_requests < self.__max_requests
+            )
+        ):
+            self.__idle_workers.append(worker)
+        else:
+            worker.stop()
+
+    def restart(self):
+        """
+        Replace all workers. Busy workers are replaced once they are released.
+        """
+        for worker in self.__idle_workers:
+            worker.stop()
+        self.__idle_workers = []
+        self.__outdated_workers.update(self.__busy_workers)
+
+class RubyRequestStream:
+    """
+    RubyRequestStream is a request handed over to a ruby worker before its body
+    has been received. Body chunks are passed to the worker as they come, so
+    the body is never held as a whole in the daemon.
+    """
+    def __init__(self, worker, release_worker, parse_response):
+        self.__worker = worker
+        self.__release_worker = release_worker
+        self.__parse_response = parse_response
+        self.__is_open = True
+
+    async def write(self, chunk):
+        await self.__worker.send_body_chunk(chunk)
+
+    async def finish(self) -> SinatraResult:
+        try:
+            await self.__worker.send_body_end()
+            stdout, stderr, dummy_status = (
+                await self.__worker.receive_response()
+            )
+        finally:
+            self.__close()
+        return SinatraResult.from_response(
+            self.__parse_response(stdout, stderr)
+        )
+
+    def abort(self):
+        """
+        Drop an unfinished request, e.g. when the client went away
+        """
+        if self.__is_open:
+            # The worker is in the middle of reading the body, it cannot be
+            # used for other requests.
+            self.__worker.kill()
+            self.__close()
+
+    def __close(self):
+        if self.__is_open:
+            self.__is_open = False
+            self.__release_worker()
+
 class Wrapper:
     # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-arguments
     def __init__(
         self, pcsd_cmdline_entry, gem_home=None, debug=False,
-        ruby_executable="ruby", https_proxy=None, no_proxy=None
+        ruby_executable="ruby", https_proxy=None, no_proxy=None,
+        worker_pool_size=0, worker_max_requests=0, worker_max_overflow=0
     ):
         self.__gem_home = gem_home
         self.__pcsd_cmdline_entry = pcsd_cmdline_entry
@@ -76,11 +315,24 @@ class Wrapper:
         self.__debug = debug
         self.__https_proxy = https_proxy
         self.__no_proxy = no_proxy
+        self.__worker_pool = RubyWorkerPool(
+            self.__start_worker,
+            size=worker_pool_size,
+            max_requests=worker_max_requests,
+        )
+        self.__worker_node_state = None
+        self.__worker_max_overflow = worker_max_overflow
+        self.__overflow_workers = 0
 
     @staticmethod
-    def get_sinatra_request(request: HTTPServerRequest):
+    def get_sinatra_request(request: HTTPServerRequest, body_stream=False):
+        """
+        Translate a tornado request to a request for the Sinatra
+
+        bool body_stream -- the body is sent to ruby separately as a stream
+        """
         host, port = split_host_and_port(request.host)
-        return {"env": {
+        sinatra_request = {"env": {
             "PATH_INFO": request.path,
             "QUERY_STRING": request.query,
             "REMOTE_ADDR": request.remote_ip,
@@ -99,10 +351,14 @@ class Wrapper:
             "HTTPS": "on" if request.protocol == "https" else "off",
             "HTTP_VERSION": request.version,
             "REQUEST_PATH": request.path,
-            "rack.input": request.body.decode("utf8"),
         }}
+        if body_stream:
+            sinatra_request["body_stream"] = True
+        else:
+            sinatra_request["env"]["rack.input"] = request.body.decode("utf8")
+        return sinatra_request
 
-    async def send_to_ruby(self, request_json):
+    def __get_ruby_env(self):
         env = {
             "PCSD_DEBUG": "true" if self.__debug else "false"
         }
@@ -113,17 +369,72 @@ class Wrapper:
             env["NO_PROXY"] = self.__no_proxy
         if self.__https_proxy is not None:
             env["HTTPS_PROXY"] = self.__https_proxy
+        return env
+
+    def __get_ruby_cmdline(self):
+        return [
+            self.__ruby_executable, "-I",
+            self.__pcsd_dir,
+            self.__pcsd_cmdline_entry
+        ]
+
+    def __start_worker(self):
+        log.pcsd.debug("Starting ruby pcsd worker")
+        return RubyWorker(self.__get_ruby_cmdline(), self.__get_ruby_env())
+
+    def __get_node_state(self):
+        # Ruby loads the node name and pcsd capabilities once when it starts.
+        try:
+            capabilities_mtime = os.stat(
+                os.path.join(self.__pcsd_dir, "capabilities.xml")
+            ).st_mtime
+        except OSError:
+            capabilities_mtime = None
+        return socket.gethostname(), capabilities_mtime
+
+    def __acquire_worker(self):
+        node_state = self.__get_node_state()
+        if node_state != self.__worker_node_state:
+            if self.__worker_node_state is not None:
+                log.pcsd.info(
+                    "Node name or pcsd capabilities changed, restarting ruby "
+                    "pcsd workers"
+                )
+                self.__worker_pool.restart()
+            self.__worker_node_state = node_state
+        return self.__worker_pool.acquire()
+
+    def __start_overflow_worker(self):
+        if self.__overflow_workers >= self.__worker_max_overflow:
+            log.pcsd.warning(
+                "All %d extra ruby pcsd workers are busy, refusing request",
+                self.__worker_max_overflow
+            )
+            raise HTTPError(503)
+        worker = self.__start_worker()
+        self.__overflow_workers += 1
+        return worker
 
+    def __stop_overflow_worker(self, worker):
+        self.__overflow_workers -= 1
+        worker.stop()
+
+    async def send_to_ruby(self, request_json):
+        worker = self.__acquire_worker()
+        if worker is None:
+            return await self.__send_to_oneshot_ruby(request_json)
+        try:
+            return await worker.communicate(request_json)
+        finally:
+            self.__worker_pool.release(worker)
+
+    async def __send_to_oneshot_ruby(self, request_json):
         pcsd_ruby = Subprocess(
-            [
-                self.__ruby_executable, "-I",
-                self.__pcsd_dir,
-                self.__pcsd_cmdline_entry
-            ],
+            self.__get_ruby_cmdline(),
             stdin=Subprocess.STREAM,
             stdout=Subprocess.STREAM,
             stderr=Subprocess.STREAM,
-            env=env
+            env=self.__get_ruby_env()
         )
         await Task(pcsd_ruby.stdin.write, str.encode(request_json))
         pcsd_ruby.stdin.close()
@@ -137,7 +448,13 @@ class Wrapper:
         request = request or {}
         request.update({"type": request_type})
         request_json = json.dumps(request)
-        stdout, stderr, dummy_status = await self.send_to_ruby(request_json)
+        with metrics.ruby_run_duration.time(request_type):
+            stdout, stderr, dummy_status = await self.send_to_ruby(
+                request_json
+            )
+        return self.__parse_response(request_json, stdout, stderr)
+
+    def __parse_response(self, request_json, stdout, stderr):
         try:
             response = json.loads(stdout)
         except json.JSONDecodeError as e:
@@ -179,13 +496,59 @@ class Wrapper:
         ))
         return SinatraResult.from_response(response)
 
-    async def sync_configs(self):
+    async def start_remote_request(
+        self, request: HTTPServerRequest
+    ) -> RubyRequestStream:
+        """
+        Hand the request over to a ruby worker and return a stream for its
+        body. The body has not been received yet.
+        """
+        request_json = json.dumps({
+            **self.get_sinatra_request(request, body_stream=True),
+            "type": SINATRA_REMOTE,
+        })
+        worker = self.__acquire_worker()
+        if worker is None:
+            # A one-shot ruby process cannot read a streamed body. A worker
+            # handling just this request is used instead.
+            worker = self.__start_overflow_worker()
+            release_worker = lambda: self.__stop_overflow_worker(worker)
+        else:
+            release_worker = lambda: self.__worker_pool.release(worker)
+        stream = RubyRequestStream(
+            worker,
+            release_worker,
+            lambda stdout, stderr: self.__parse_response(
+                request_json, stdout, stderr
+            ),
+        )
+        await worker.send_request(request_json)
+        return stream
+
+    async def sync_configs(self, push=False):
+        """
+        Fetch configs from the cluster nodes. Return a tuple: the time of the
+        next synchronization, dict of configs (name -> text) newer in the
+        cluster which are to be saved by save_synced_configs.
+
+        bool push -- send local configs to nodes which have older ones
+        """
         try:
-            response = await convert_yielded(self.run_ruby(SYNC_CONFIGS))
-            return response["next"]
+            response = await convert_yielded(
+                self.run_ruby(SYNC_CONFIGS, {"push": push})
+            )
+            return response["next"], response.get("configs") or {}
         except HTTPError:
             log.pcsd.error("Config synchronization failed")
-            return int(now()) + DEFAULT_SYNC_CONFIG_DELAY
+            return int(now()) + DEFAULT_SYNC_CONFIG_DELAY, {}
+
+    async def save_synced_configs(self, configs):
+        try:
+            await convert_yielded(
+                self.run_ruby(SYNC_CONFIGS_SAVE, {"configs": configs})
+            )
+        except HTTPError:
+            log.pcsd.error("Saving of synchronized configs failed")
 
     def __log_bad_response(self, error_message, request_json, stdout, stderr):
         log.pcsd.error(error_message)
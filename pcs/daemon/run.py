@@ -1,60 +1,97 @@
 import os
 import signal
 import socket
+import sys
 from pathlib import Path
 
-from tornado.ioloop import IOLoop
+from tornado.ioloop import IOLoop, PeriodicCallback
 from tornado.locks import Lock
-from tornado.web import Application
 
 from pcs import settings
 from pcs.common.system import is_systemd
 from pcs.daemon import (
     app_gui,
     app_remote,
+    config_sync,
     log,
+    metrics,
     ruby_pcsd,
     session,
     ssl,
     systemd,
+    workers,
+)
+from pcs.daemon.app_common import Application
+from pcs.daemon.env import (
+    prepare_env,
+    NOTIFY_SOCKET,
+    SESSION_STORAGE_FILE,
 )
-from pcs.daemon.env import prepare_env
 from pcs.daemon.http_server import HttpsServerManage
+from pcs.daemon.response_cache import ResponseCache
 
 class SignalInfo:
     #pylint: disable=too-few-public-methods
     server_manage = None
+    worker_supervisor = None
+    config_sync = None
     ioloop_started = False
 
 def handle_signal(incomming_signal, frame):
     #pylint: disable=unused-argument
-    log.pcsd.warning('Caught signal: %s, shutting down', incomming_signal)
-    if SignalInfo.server_manage:
-        SignalInfo.server_manage.stop()
     if SignalInfo.ioloop_started:
-        IOLoop.current().stop()
+        # The signal can interrupt the main thread while it holds a lock (e.g.
+        # the one of the log queue). Logging or stopping the server right here
+        # could deadlock, so the shutdown is done by the IOLoop.
+        IOLoop.current().add_callback_from_signal(shutdown, incomming_signal)
+        return
+    log.pcsd.warning('Caught signal: %s, shutting down', incomming_signal)
     raise SystemExit(0)
 
+def shutdown(incomming_signal):
+    log.pcsd.warning('Caught signal: %s, shutting down', incomming_signal)
+    if SignalInfo.server_manage and SignalInfo.server_manage.server_is_running:
+        SignalInfo.server_manage.stop()
+    if SignalInfo.worker_supervisor:
+        SignalInfo.worker_supervisor.stop()
+    if SignalInfo.config_sync:
+        SignalInfo.config_sync.stop()
+    IOLoop.current().stop()
+
 def sign_ioloop_started():
     SignalInfo.ioloop_started = True
 
-def config_sync(
-    sync_config_lock: Lock, ruby_pcsd_wrapper: ruby_pcsd.Wrapper
+def create_peer_configs():
+    return config_sync.PeerConfigs(
+        settings.pcsd_sync_config_peers_location,
+        [
+            settings.pcsd_known_hosts_location,
+            settings.pcsd_settings_conf_location,
+        ],
+    )
+
+def create_config_sync(
+    sync_config_lock, ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
+    peer_configs: config_sync.PeerConfigs
 ):
-    async def config_synchronization():
-        async with sync_config_lock:
-            next_run_time = await ruby_pcsd_wrapper.sync_configs()
-        IOLoop.current().call_at(next_run_time, config_synchronization)
-    return config_synchronization
+    return config_sync.ConfigSync(
+        sync_config_lock,
+        ruby_pcsd_wrapper,
+        peer_configs,
+        trigger_delay=settings.pcsd_config_sync_trigger_delay,
+    )
 
 def configure_app(
     session_storage: session.Storage,
     ruby_pcsd_wrapper: ruby_pcsd.Wrapper,
     sync_config_lock: Lock,
+    peer_configs: config_sync.PeerConfigs,
     public_dir,
     disable_gui=False,
     debug=False
 ):
+    # The cache is shared by all applications created by make_app.
+    response_cache = ResponseCache()
     def make_app(https_server_manage: HttpsServerManage):
         """
         https_server_manage -- allows to controll the server (specifically
@@ -65,6 +102,8 @@ def configure_app(
             ruby_pcsd_wrapper,
             sync_config_lock,
             https_server_manage,
+            response_cache,
+            peer_configs,
         )
 
         if not disable_gui:
@@ -72,6 +111,7 @@ def configure_app(
                 app_gui.get_routes(
                     session_storage,
                     ruby_pcsd_wrapper,
+                    response_cache,
                     public_dir
                 )
             )
@@ -79,6 +119,34 @@ def configure_app(
         return Application(routes, debug=debug)
     return make_app
 
+def create_ruby_pcsd_wrapper(env):
+    return ruby_pcsd.Wrapper(
+        pcsd_cmdline_entry=env.PCSD_CMDLINE_ENTRY,
+        gem_home=env.GEM_HOME,
+        debug=env.PCSD_DEBUG,
+        ruby_executable=settings.ruby_executable,
+        https_proxy=env.HTTPS_PROXY,
+        no_proxy=env.NO_PROXY,
+        worker_pool_size=env.PCSD_RUBY_WORKERS,
+        worker_max_requests=env.PCSD_RUBY_WORKER_MAX_REQUESTS,
+        worker_max_overflow=settings.pcsd_ruby_overflow_workers,
+    )
+
+def create_pcsd_ssl(env):
+    return ssl.PcsdSSL(
+        server_name=socket.gethostname(),
+        cert_location=settings.pcsd_cert_location,
+        key_location=settings.pcsd_key_location,
+        ssl_options=env.PCSD_SSL_OPTIONS,
+        ssl_ciphers=env.PCSD_SSL_CIPHERS,
+    )
+
+def exit_on_invalid_certs(error):
+    for message in error.args:
+        log.pcsd.error(message)
+    log.pcsd.error("Invalid SSL certificate and/or key, exiting")
+    raise SystemExit(1)
+
 def main():
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
@@ -93,36 +161,95 @@ def main():
     if env.PCSD_DEBUG:
         log.enable_debug()
 
-    sync_config_lock = Lock()
-    ruby_pcsd_wrapper = ruby_pcsd.Wrapper(
-        pcsd_cmdline_entry=env.PCSD_CMDLINE_ENTRY,
-        gem_home=env.GEM_HOME,
-        debug=env.PCSD_DEBUG,
-        ruby_executable=settings.ruby_executable,
-        https_proxy=env.HTTPS_PROXY,
-        no_proxy=env.NO_PROXY,
+    worker_id = workers.get_worker_id(os.environ)
+    if env.PCSD_WORKERS and worker_id is None:
+        run_coordinator(env)
+    else:
+        run_server(env, is_worker=worker_id is not None)
+
+def run_coordinator(env):
+    """
+    Start the pcsd workers serving requests and synchronize the configuration
+    """
+    # Workers would generate different certificates if there were none.
+    try:
+        create_pcsd_ssl(env).guarantee_valid_certs()
+    except ssl.SSLCertKeyException as e:
+        exit_on_invalid_certs(e)
+
+    sync_config_lock = metrics.TimedLock(
+        workers.InterProcessLock(settings.pcsd_sync_config_lock_location),
+        metrics.sync_config_lock_wait
+    )
+    ruby_pcsd_wrapper = create_ruby_pcsd_wrapper(env)
+    SignalInfo.worker_supervisor = workers.WorkerSupervisor(
+        env.PCSD_WORKERS,
+        [sys.executable] + sys.argv,
+        # Only the coordinator reports to systemd.
+        {
+            key: value for key, value in os.environ.items()
+            if key != NOTIFY_SOCKET
+        },
+    )
+
+    ioloop = IOLoop.current()
+    ioloop.add_callback(sign_ioloop_started)
+    ioloop.add_callback(SignalInfo.worker_supervisor.start)
+    if is_systemd() and env.NOTIFY_SOCKET:
+        ioloop.add_callback(systemd.notify, env.NOTIFY_SOCKET)
+    SignalInfo.config_sync = create_config_sync(
+        sync_config_lock, ruby_pcsd_wrapper, create_peer_configs()
+    )
+    ioloop.add_callback(SignalInfo.config_sync.start)
+    ioloop.start()
+
+def run_server(env, is_worker=False):
+    """
+    Serve pcsd requests
+
+    bool is_worker -- this process is one of more pcsd workers started by
+        the coordinator
+    """
+    if is_worker:
+        sync_config_lock = metrics.TimedLock(
+            workers.InterProcessLock(settings.pcsd_sync_config_lock_location),
+            metrics.sync_config_lock_wait
+        )
+    else:
+        sync_config_lock = metrics.TimedLock(
+            Lock(), metrics.sync_config_lock_wait
+        )
+    # Sessions in memory would not be shared by the workers.
+    if is_worker or env.PCSD_SESSION_STORAGE == SESSION_STORAGE_FILE:
+        session_backend = session.SqliteBackend(
+            settings.pcsd_sessions_db_location
+        )
+    else:
+        session_backend = session.MemoryBackend()
+    session_storage = session.Storage(
+        env.PCSD_SESSION_LIFETIME, session_backend
     )
+    metrics.sessions.set_function(session_storage.count)
+    ruby_pcsd_wrapper = create_ruby_pcsd_wrapper(env)
+    peer_configs = create_peer_configs()
     make_app = configure_app(
-        session.Storage(env.PCSD_SESSION_LIFETIME),
+        session_storage,
         ruby_pcsd_wrapper,
         sync_config_lock,
+        peer_configs,
         env.PCSD_STATIC_FILES_DIR,
         disable_gui=env.PCSD_DISABLE_GUI,
         debug=env.PCSD_DEV,
     )
-    pcsd_ssl = ssl.PcsdSSL(
-        server_name=socket.gethostname(),
-        cert_location=settings.pcsd_cert_location,
-        key_location=settings.pcsd_key_location,
-        ssl_options=env.PCSD_SSL_OPTIONS,
-        ssl_ciphers=env.PCSD_SSL_CIPHERS,
-    )
     try:
         SignalInfo.server_manage = HttpsServerManage(
             make_app,
             port=env.PCSD_PORT,
             bind_addresses=env.PCSD_BIND_ADDR,
-            ssl=pcsd_ssl,
+            ssl=create_pcsd_ssl(env),
+            max_body_size=env.PCSD_MAX_BODY_SIZE,
+            reuse_port=is_worker,
+            body_timeout=settings.pcsd_body_timeout,
         ).start()
     except socket.gaierror as e:
         log.pcsd.error(
@@ -134,14 +261,30 @@ def main():
         log.pcsd.error("Unable to start pcsd daemon, exiting: %s ", e)
         raise SystemExit(1)
     except ssl.SSLCertKeyException as e:
-        for error in e.args:
-            log.pcsd.error(error)
-        log.pcsd.error("Invalid SSL certificate and/or key, exiting")
-        raise SystemExit(1)
+        exit_on_invalid_certs(e)
 
     ioloop = IOLoop.current()
     ioloop.add_callback(sign_ioloop_started)
-    if is_systemd() and env.NOTIFY_SOCKET:
-        ioloop.add_callback(systemd.notify, env.NOTIFY_SOCKET)
-    ioloop.add_callback(config_sync(sync_config_lock, ruby_pcsd_wrapper))
+    if is_worker:
+        # New certificates are loaded only by the worker which received them.
+        ioloop.add_callback(
+            workers.CertificateWatcher(
+                SignalInfo.server_manage,
+                [settings.pcsd_cert_location, settings.pcsd_key_location],
+            ).start
+        )
+    else:
+        if is_systemd() and env.NOTIFY_SOCKET:
+            ioloop.add_callback(systemd.notify, env.NOTIFY_SOCKET)
+        SignalInfo.config_sync = create_config_sync(
+            sync_config_lock, ruby_pcsd_wrapper, peer_configs
+        )
+        ioloop.add_callback(SignalInfo.config_sync.start)
+    ioloop.add_callback(
+        PeriodicCallback(
+            session_storage.drop_expired,
+            settings.pcsd_session_sweep_interval * 1000,
+        ).start
+    )
+    ioloop.add_callback(metrics.IOLoopLagMonitor(metrics.ioloop_lag).start)
     ioloop.start()
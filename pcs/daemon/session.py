@@ -1,11 +1,15 @@
+import heapq
+import json
+import os
 import random
+import sqlite3
 import string
 from time import time as now
 
 class Session:
     def __init__(
         self, sid, username=None, groups=None, is_authenticated=False,
-        ajax_id=None
+        ajax_id=None, last_access=None
     ):
         # Session id propageted via cookies.
         self.__sid = sid
@@ -27,7 +31,10 @@ class Session:
         # user is authenticated when the groups are loaded.
         self.__groups = groups or []
         # The moment of the last access. The only muttable attribute.
-        self.refresh()
+        if last_access is None:
+            self.refresh()
+        else:
+            self.__last_access = last_access
 
     @property
     def is_authenticated(self):
@@ -54,6 +61,10 @@ class Session:
         self.refresh()
         return self.__groups
 
+    @property
+    def last_access(self):
+        return self.__last_access
+
     def refresh(self):
         """
         Set the time of last access to now.
@@ -65,26 +76,39 @@ class Session:
         return now() > self.__last_access + seconds
 
 class Storage:
-    def __init__(self, lifetime_seconds):
-        self.__sessions = {}
+    """
+    Storage provides sessions of the web UI. The sessions are kept by
+    a backend (MemoryBackend or SqliteBackend).
+    """
+    def __init__(self, lifetime_seconds, backend=None):
         self.__lifetime_seconds = lifetime_seconds
+        self.__backend = backend if backend is not None else MemoryBackend()
 
     def provide(self, sid=None) -> Session:
-        if self.__is_valid_sid(sid):
-            return self.__sessions[sid].refresh()
+        session = self.__get_valid(sid)
+        if session is not None:
+            previous_access = session.last_access
+            self.__backend.refresh(
+                session.refresh(),
+                previous_access,
+                # Expired sessions are found by the recorded last access. Do
+                # not let a session in use expire much sooner.
+                max_delay=self.__lifetime_seconds / 10,
+            )
+            return session
         return self.__register(self.__generate_sid())
 
+    def count(self):
+        """
+        Return the number of sessions which have not expired
+        """
+        return self.__backend.count_used_since(self.__oldest_valid_access())
+
     def drop_expired(self):
-        obsolete_sid_list = [
-            sid for sid, session in self.__sessions.items()
-            if session.was_unused_last(self.__lifetime_seconds)
-        ]
-        for sid in obsolete_sid_list:
-            del self.__sessions[sid]
+        self.__backend.drop_unused_before(self.__oldest_valid_access())
 
     def destroy(self, sid):
-        if sid in self.__sessions:
-            del self.__sessions[sid]
+        self.__backend.delete(sid)
         return self
 
     def login(self, sid, username, groups, ajax_id=None) -> Session:
@@ -99,22 +123,30 @@ class Storage:
     def rejected_user(self, sid, username) -> Session:
         return self.__register(self.__valid_sid(sid), username=username)
 
-    def __is_valid_sid(self, sid):
-        return not (
-            sid is None
-            or
-            # Do not let a user (an attacker?) to force us to use their sid.
-            sid not in self.__sessions
+    def __oldest_valid_access(self):
+        return now() - self.__lifetime_seconds
+
+    def __get_valid(self, sid):
+        if sid is None:
+            return None
+        # Do not let a user (an attacker?) to force us to use their sid.
+        session = self.__backend.get(sid)
+        if (
+            session is None
             or
-            self.__sessions[sid].was_unused_last(self.__lifetime_seconds)
-        )
+            session.was_unused_last(self.__lifetime_seconds)
+        ):
+            return None
+        return session
 
     def __valid_sid(self, sid):
-        return sid if self.__is_valid_sid(sid) else self.__generate_sid()
+        return sid if self.__get_valid(sid) is not None else (
+            self.__generate_sid()
+        )
 
     def __register(self, *args, **kwargs) -> Session:
         session = Session(*args, **kwargs)
-        self.__sessions[session.sid] = session
+        self.__backend.save(session)
         return session
 
     def __generate_sid(self):
@@ -125,7 +157,186 @@ class Storage:
                     k=64
                 )
             )
-            if sid not in self.__sessions:
+            if self.__backend.get(sid) is None:
                 return sid
         #TODO what to do?
         raise Exception("Cannot generate unique sid")
+
+# A session backend keeps sessions for Storage. It provides methods:
+# get(sid) -- return the session (even an expired one) or None
+# save(session) -- keep a new session or replace the one with the same sid
+# refresh(session, previous_access, max_delay) -- record the last access of
+#     the session, previous_access is the last access the backend provided the
+#     session with, the recorded last access may be at most max_delay seconds
+#     older than the real one
+# delete(sid) -- forget the session if it exists
+# drop_unused_before(timestamp) -- forget sessions accessed before timestamp
+# count_used_since(timestamp) -- number of sessions accessed since timestamp
+
+class MemoryBackend:
+    """
+    MemoryBackend keeps sessions in the pcsd process. Expired sessions are
+    found via a heap ordered by the last access of the sessions, so dropping
+    them does not go through all sessions.
+    """
+    def __init__(self):
+        self.__sessions = {}
+        # (last access, sid), one entry for each sid. Sessions are refreshed on
+        # each access without the heap being updated, so an entry can be older
+        # than its session. Such entry is pushed again with the current last
+        # access when it is popped.
+        self.__last_access_heap = []
+        self.__sid_in_heap = set()
+
+    def get(self, sid):
+        return self.__sessions.get(sid)
+
+    def save(self, session):
+        sid = session.sid
+        self.__sessions[sid] = session
+        if sid not in self.__sid_in_heap:
+            self.__sid_in_heap.add(sid)
+            heapq.heappush(self.__last_access_heap, (session.last_access, sid))
+
+    def refresh(self, session, previous_access, max_delay):
+        # The session itself holds its last access.
+        pass
+
+    def delete(self, sid):
+        # The heap entry is dropped when it is popped.
+        self.__sessions.pop(sid, None)
+
+    def drop_unused_before(self, timestamp):
+        while (
+            self.__last_access_heap
+            and
+            self.__last_access_heap[0][0] < timestamp
+        ):
+            dummy_last_access, sid = heapq.heappop(self.__last_access_heap)
+            session = self.__sessions.get(sid)
+            if session is not None and session.last_access >= timestamp:
+                heapq.heappush(
+                    self.__last_access_heap, (session.last_access, sid)
+                )
+                continue
+            self.__sid_in_heap.discard(sid)
+            self.__sessions.pop(sid, None)
+
+    def count_used_since(self, timestamp):
+        return sum(
+            1 for session in self.__sessions.values()
+            if session.last_access >= timestamp
+        )
+
+class SqliteBackend:
+    """
+    SqliteBackend keeps sessions in an sqlite database file. The sessions
+    survive a restart of pcsd and they are shared by all pcsd worker processes.
+
+    The database is accessed from the IOLoop. Reads do not wait for writers in
+    the WAL mode, so the last access of a session is written at most once per
+    refresh_interval seconds (or per max_delay given by Storage if shorter) to
+    keep writes rare.
+    """
+    def __init__(self, path, refresh_interval=60):
+        self.__path = path
+        self.__refresh_interval = refresh_interval
+        self.__connection = None
+
+    def get(self, sid):
+        row = self.__execute(
+            """
+            SELECT username, groups, is_authenticated, ajax_id, last_access
+            FROM sessions WHERE sid = ?
+            """,
+            (sid,)
+        ).fetchone()
+        if row is None:
+            return None
+        username, groups, is_authenticated, ajax_id, last_access = row
+        return Session(
+            sid,
+            username=username,
+            groups=json.loads(groups),
+            is_authenticated=bool(is_authenticated),
+            ajax_id=ajax_id,
+            last_access=last_access,
+        )
+
+    def save(self, session):
+        self.__execute(
+            """
+            INSERT OR REPLACE INTO sessions
+                (sid, username, groups, is_authenticated, ajax_id, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                session.sid,
+                session.username,
+                json.dumps(session.groups),
+                int(session.is_authenticated),
+                session.ajax_id,
+                session.last_access,
+            )
+        )
+
+    def refresh(self, session, previous_access, max_delay):
+        if (
+            session.last_access - previous_access
+            <
+            min(self.__refresh_interval, max_delay)
+        ):
+            return
+        self.__execute(
+            "UPDATE sessions SET last_access = ? WHERE sid = ?",
+            (session.last_access, session.sid)
+        )
+
+    def delete(self, sid):
+        self.__execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def drop_unused_before(self, timestamp):
+        self.__execute(
+            "DELETE FROM sessions WHERE last_access < ?", (timestamp,)
+        )
+
+    def count_used_since(self, timestamp):
+        return self.__execute(
+            "SELECT count(*) FROM sessions WHERE last_access >= ?",
+            (timestamp,)
+        ).fetchone()[0]
+
+    def __execute(self, sql, parameters=()):
+        if self.__connection is None:
+            self.__connection = self.__connect()
+        return self.__connection.execute(sql, parameters)
+
+    def __connect(self):
+        # Session ids allow to act as the logged in users, nobody else may read
+        # them. Sqlite creates its auxiliary files with the same permissions.
+        os.close(os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o600))
+        # Autocommit mode, each statement is a transaction. Other workers can
+        # hold the database for a moment, so wait for it.
+        connection = sqlite3.connect(
+            self.__path, timeout=10, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                username TEXT,
+                groups TEXT,
+                is_authenticated INTEGER,
+                ajax_id TEXT,
+                last_access REAL
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS sessions_last_access
+            ON sessions (last_access)
+            """
+        )
+        return connection
@@ -104,11 +104,18 @@ class PcsdSSL:
         ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
         ssl_context.set_ciphers(self.__ssl_ciphers)
         ssl_context.options = self.__ssl_options
+        self.load_cert_chain(ssl_context)
+        return ssl_context
+
+    def load_cert_chain(self, ssl_context: ssl.SSLContext):
+        """
+        Load the certificate and the key into the context. Connections accepted
+        after that use them, already established connections are not affected.
+        """
         ssl_context.load_cert_chain(
             self.__ck_pair.cert_location,
             self.__ck_pair.key_location
         )
-        return ssl_context
 
     def guarantee_valid_certs(self):
         if not self.__ck_pair.exists():
@@ -4,14 +4,30 @@ from urllib.parse import urlencode
 
 from tornado.httputil import HTTPHeaders
 from tornado.testing import AsyncHTTPTestCase
-from tornado.web import Application
 
 from pcs.daemon import ruby_pcsd, auth
+from pcs.daemon.app_common import Application
 
 USER = "user"
 GROUPS = ["group1", "group2"]
 PASSWORD = "password"
 
+class RubyRequestStream:
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+        self.is_aborted = False
+
+    async def write(self, chunk):
+        self.wrapper.received_body += chunk
+
+    async def finish(self):
+        return ruby_pcsd.SinatraResult.from_response(
+            await self.wrapper.run_ruby(ruby_pcsd.SINATRA_REMOTE)
+        )
+
+    def abort(self):
+        self.is_aborted = True
+
 class RubyPcsdWrapper(ruby_pcsd.Wrapper):
     def __init__(self, request_type):
         #pylint: disable=super-init-not-called
@@ -19,6 +35,12 @@ class RubyPcsdWrapper(ruby_pcsd.Wrapper):
         self.status_code = 200
         self.headers = {"Some": "value"}
         self.body = b"Success action"
+        self.received_body = b""
+        self.request_stream_list = []
+
+    async def start_remote_request(self, request):
+        self.request_stream_list.append(RubyRequestStream(self))
+        return self.request_stream_list[-1]
 
     async def run_ruby(self, request_type, request=None):
         if request_type != self.request_type:
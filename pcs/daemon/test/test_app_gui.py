@@ -5,6 +5,7 @@ from tornado.httputil import parse_cookie
 
 from pcs.daemon import session, app_session
 from pcs.daemon import app_gui, auth, ruby_pcsd
+from pcs.daemon.response_cache import ResponseCache
 from pcs.test.tools.misc import(
     create_setup_patch_mixin,
     get_test_resource as rc,
@@ -53,6 +54,7 @@ class AppTest(
         return app_gui.get_routes(
             self.session_storage,
             self.wrapper,
+            ResponseCache(),
             PUBLIC_DIR,
         )
 
@@ -183,6 +185,37 @@ class SinatraAjaxProtected(AppTest):
         self.assert_wrappers_response(response)
         self.assert_session_in_response(response, session1.sid)
 
+class CachedSinatraAjaxProtected(AppTest):
+    # pylint: disable=too-many-ancestors
+    def get_status(self, session1):
+        return self.get("/clusters_overview", sid=session1.sid, is_ajax=True)
+
+    def test_deal_without_authentication(self):
+        self.assert_unauth_ajax(self.get("/clusters_overview", is_ajax=True))
+
+    def test_take_result_from_cache(self):
+        session1 = self.create_login_session()
+        self.assert_wrappers_response(self.get_status(session1))
+        expected_body = self.wrapper.body
+        self.wrapper.body = b"Changed"
+        response = self.get_status(session1)
+        self.assertEqual(response.body, expected_body)
+        self.assert_session_in_response(response, session1.sid)
+
+    def test_not_share_result_with_different_groups(self):
+        session1 = self.create_login_session()
+        self.assert_wrappers_response(self.get_status(session1))
+        self.wrapper.body = b"Changed"
+        self.user_auth_info.groups = ["haclient"]
+        self.assert_wrappers_response(self.get_status(session1))
+
+    def test_not_cache_failures(self):
+        session1 = self.create_login_session()
+        self.wrapper.status_code = 400
+        self.assert_wrappers_response(self.get_status(session1))
+        self.wrapper.status_code = 200
+        self.assert_wrappers_response(self.get_status(session1))
+
 class LoginStatus(AppTest):
     # pylint: disable=too-many-ancestors
     def test_not_authenticated(self):
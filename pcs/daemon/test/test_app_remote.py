@@ -5,10 +5,22 @@ from unittest import mock
 
 from tornado.locks import Lock
 
-from pcs.daemon import ruby_pcsd, app_remote, http_server
+from pcs.daemon import (
+    app_remote,
+    auth,
+    config_sync,
+    http_server,
+    metrics,
+    native_remote,
+    permissions,
+    ruby_pcsd,
+)
+from pcs.daemon.response_cache import ResponseCache
 from pcs.daemon.test import fixtures_app
 from pcs.test.tools.misc import create_setup_patch_mixin
 
+MAX_BODY_SIZE = 64 * 1024
+
 # Don't write errors to test output.
 logging.getLogger("tornado.access").setLevel(logging.CRITICAL)
 
@@ -19,13 +31,27 @@ class AppTest(fixtures_app.AppTest):
             spec_set=http_server.HttpsServerManage
         )
         self.lock = Lock()
+        self.peer_configs = mock.MagicMock(spec_set=config_sync.PeerConfigs)
+        self.peer_configs.get_hashes.return_value = ["hash"]
+        patcher = mock.patch.object(
+            native_remote,
+            "login_by_token_sync",
+            return_value=auth.UserAuthInfo("hacluster", [], True),
+        )
+        self.addCleanup(patcher.stop)
+        self.login_by_token_sync = patcher.start()
         super().setUp()
 
+    def get_httpserver_options(self):
+        return dict(max_body_size=MAX_BODY_SIZE)
+
     def get_routes(self):
         return app_remote.get_routes(
             self.wrapper,
             self.lock,
             self.https_server_manage,
+            ResponseCache(),
+            self.peer_configs,
         )
 
 class SetCerts(AppTest):
@@ -69,6 +95,144 @@ class SinatraRemote(AppTest):
     def test_take_result_from_ruby(self):
         self.assert_wrappers_response(self.get("/remote/"))
 
+    def test_stream_body_to_ruby(self):
+        body = {"key": "value" * 1000}
+        self.assert_wrappers_response(self.post("/remote/some", body=body))
+        self.assertEqual(urlencode(body).encode(), self.wrapper.received_body)
+
+    def test_refuse_too_big_body(self):
+        response = self.post(
+            "/remote/some", body={"key": "v" * MAX_BODY_SIZE}
+        )
+        self.assertEqual(b"", self.wrapper.received_body)
+        self.assertNotEqual(200, response.code)
+        self.assertTrue(all(
+            stream.is_aborted for stream in self.wrapper.request_stream_list
+        ))
+
+    def test_refuse_unauthorized_without_ruby(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            None, [], False
+        )
+        response = self.post(
+            "/remote/some",
+            body={"key": "value"},
+            headers={"Cookie": "token=abcd"}
+        )
+        self.assertEqual(401, response.code)
+        self.assertEqual(b'{"notauthorized":"true"}', response.body)
+        self.assertEqual([], self.wrapper.request_stream_list)
+        self.login_by_token_sync.assert_called_once_with({"token": "abcd"})
+
+class RequestMetrics(AppTest):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(metrics, "http_requests")
+        self.addCleanup(patcher.stop)
+        self.http_requests = patcher.start()
+
+    def assert_counted(self, route, code=200):
+        self.http_requests.inc.assert_called_once_with(route, "GET", code)
+
+    def test_count_sinatra_routes_by_path(self):
+        self.get("/remote/some")
+        self.assert_counted("/remote/some")
+
+    def test_count_unknown_sinatra_routes_by_pattern(self):
+        self.wrapper.status_code = 404
+        self.get("/remote/unknown")
+        self.assert_counted("/remote/.*", 404)
+
+    def test_count_routes_by_pattern(self):
+        self.get("/remote/check_auth")
+        self.assert_counted("/remote/check_auth")
+
+    def test_count_unauthorized_sinatra_routes_by_pattern(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            None, [], False
+        )
+        self.get("/remote/some")
+        self.assert_counted("/remote/.*", 401)
+
+class NativeRemote(AppTest):
+    def test_refuse_unauthorized(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            None, [], False
+        )
+        response = self.get("/remote/check_auth")
+        self.assertEqual(401, response.code)
+        self.assertEqual(b'{"notauthorized":"true"}', response.body)
+
+    def test_run_action_without_ruby(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            "hacluster", [], True
+        )
+        response = self.post(
+            "/remote/check_auth",
+            body={},
+            headers={"Cookie": "token=abcd"}
+        )
+        self.assertEqual(200, response.code)
+        self.assertEqual(b'{"success":true}', response.body)
+        self.login_by_token_sync.assert_called_once_with({"token": "abcd"})
+
+    def test_refuse_user_without_permissions(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            "user", [], True
+        )
+        with mock.patch.object(
+            native_remote,
+            "get_local_permissions",
+            return_value=permissions.PermissionsSet([]),
+        ):
+            response = self.get("/remote/get_corosync_conf")
+        self.assertEqual(403, response.code)
+        self.assertEqual(b"Permission denied", response.body)
+
+class CachedSinatraRemote(AppTest):
+    def get_status(self, token="abcd"):
+        return self.get(
+            "/remote/status?version=2",
+            headers={"Cookie": f"token={token}"}
+        )
+
+    def test_take_result_from_cache(self):
+        self.assert_wrappers_response(self.get_status())
+        expected_body = self.wrapper.body
+        self.wrapper.body = b"Changed"
+        self.assertEqual(expected_body, self.get_status().body)
+
+    def test_not_share_result_with_other_token(self):
+        self.assert_wrappers_response(self.get_status())
+        self.wrapper.body = b"Changed"
+        self.assert_wrappers_response(self.get_status(token="efgh"))
+
+    def test_not_cache_post(self):
+        self.assert_wrappers_response(self.post("/remote/status", body={}))
+        self.wrapper.body = b"Changed"
+        self.assert_wrappers_response(self.post("/remote/status", body={}))
+
+class Metrics(AppTest):
+    def test_refuse_unauthorized(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            None, [], False
+        )
+        response = self.get("/metrics")
+        self.assertEqual(401, response.code)
+        self.assertEqual(b'{"notauthorized":"true"}', response.body)
+
+    def test_provide_metrics(self):
+        self.login_by_token_sync.return_value = auth.UserAuthInfo(
+            "hacluster", [], True
+        )
+        response = self.get(
+            "/metrics",
+            headers={"Authorization": "Bearer abcd"}
+        )
+        self.assertEqual(200, response.code)
+        self.assertIn(b"# TYPE pcsd_http_requests_total counter", response.body)
+        self.login_by_token_sync.assert_called_once_with({"token": "abcd"})
+
 class SyncConfigMutualExclusive(AppTest):
     def fetch_set_sync_options(self, method):
         kwargs = (
@@ -114,3 +278,7 @@ class SyncConfigMutualExclusive(AppTest):
 
     def test_post_locked(self):
         self.check_locked("POST")
+
+    def test_record_configs_sent_by_peer(self):
+        self.check_call_wrapper_without_lock("POST")
+        self.peer_configs.record_changes.assert_called_once_with(["hash"])
@@ -74,7 +74,9 @@ class MixinTest(
     @property
     def session_dict(self):
         # pylint: disable=protected-access
-        return self.storage._Storage__sessions
+        return (
+            self.storage._Storage__backend._MemoryBackend__sessions
+        )
 
     def sid_from_body(self, response):
         self.assertIn("Set-Cookie", response.headers)
@@ -1,5 +1,8 @@
-from unittest import TestCase
+from unittest import mock, TestCase
+import json
 import logging
+import os
+import tempfile
 
 from pcs.daemon import auth
 from pcs.test.tools.misc import create_setup_patch_mixin
@@ -37,3 +40,146 @@ class AuthorizeUserSync(TestCase, create_setup_patch_mixin(auth)):
         user_auth_info = auth.authorize_user_sync(USER, PASSWORD)
         self.assertEqual(user_auth_info.name, USER)
         self.assertFalse(user_auth_info.is_authorized)
+
+class LoginByTokenSync(TestCase, create_setup_patch_mixin(auth)):
+    def setUp(self):
+        self.get_username_by_token_sync = self.setup_patch(
+            "get_username_by_token_sync"
+        )
+        self.get_user_groups_sync = self.setup_patch("get_user_groups_sync")
+
+    def test_unknown_token(self):
+        self.get_username_by_token_sync.return_value = None
+        user_auth_info = auth.login_by_token_sync({"token": "token"})
+        self.assertFalse(user_auth_info.is_authorized)
+        self.get_username_by_token_sync.assert_called_once_with("token")
+
+    def test_user(self):
+        self.get_username_by_token_sync.return_value = USER
+        self.get_user_groups_sync.return_value = ("group1", "group2")
+        self.assertEqual(
+            auth.UserAuthInfo(USER, ["group1", "group2"], True),
+            auth.login_by_token_sync({"token": "token", "CIB_user": "other"})
+        )
+
+    def test_superuser(self):
+        self.get_username_by_token_sync.return_value = auth.SUPERUSER
+        self.assertEqual(
+            auth.UserAuthInfo(auth.SUPERUSER, [], True),
+            auth.login_by_token_sync({"token": "token"})
+        )
+
+    def test_superuser_on_behalf_of_user(self):
+        self.get_username_by_token_sync.return_value = auth.SUPERUSER
+        self.assertEqual(
+            auth.UserAuthInfo(USER, ["group1", "group2"], True),
+            auth.login_by_token_sync({
+                "token": "token",
+                "CIB_user": USER,
+                # base64 of "group1 group2"
+                "CIB_user_groups": "Z3JvdXAxIGdyb3VwMg==",
+            })
+        )
+
+class GetUsernameByTokenSync(TestCase):
+    def setUp(self):
+        users_file = tempfile.NamedTemporaryFile("w", suffix=".conf")
+        self.addCleanup(users_file.close)
+        json.dump(
+            [
+                {"username": "user1", "token": "token1"},
+                {"username": "user2", "token": "token2"},
+            ],
+            users_file
+        )
+        users_file.flush()
+        patcher = mock.patch.object(
+            auth.settings, "pcsd_users_conf_location", users_file.name
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_known_token(self):
+        self.assertEqual("user2", auth.get_username_by_token_sync("token2"))
+
+    def test_unknown_token(self):
+        self.assertIsNone(auth.get_username_by_token_sync("token3"))
+
+    def test_no_token(self):
+        self.assertIsNone(auth.get_username_by_token_sync(None))
+
+class UserGroupsCache(TestCase, create_setup_patch_mixin(auth)):
+    def setUp(self):
+        self.now = self.setup_patch("now", return_value=0)
+        group_file = tempfile.NamedTemporaryFile("w")
+        self.addCleanup(group_file.close)
+        self.group_file = group_file
+        self.cache = auth.UserGroupsCache(
+            ttl=10,
+            watched_files=(group_file.name, "/nonexistent/passwd"),
+        )
+        self.load_groups = mock.Mock(side_effect=[("group1",), ("group2",)])
+
+    def test_cache_groups(self):
+        self.assertEqual(("group1",), self.cache.get(USER, self.load_groups))
+        self.now.return_value = 9
+        self.assertEqual(("group1",), self.cache.get(USER, self.load_groups))
+        self.load_groups.assert_called_once_with(USER)
+
+    def test_expire_groups(self):
+        self.assertEqual(("group1",), self.cache.get(USER, self.load_groups))
+        self.now.return_value = 10
+        self.assertEqual(("group2",), self.cache.get(USER, self.load_groups))
+
+    def test_drop_groups_on_file_change(self):
+        self.assertEqual(("group1",), self.cache.get(USER, self.load_groups))
+        self.group_file.write("haclient:x:189:user\n")
+        self.group_file.flush()
+        self.assertEqual(("group2",), self.cache.get(USER, self.load_groups))
+
+    def test_not_cache_errors(self):
+        self.load_groups.side_effect = [KeyError(USER), ("group1",)]
+        self.assertRaises(KeyError, self.cache.get, USER, self.load_groups)
+        self.assertEqual(("group1",), self.cache.get(USER, self.load_groups))
+
+def get_pid():
+    return os.getpid()
+
+def kill_self():
+    os._exit(1) # pylint: disable=protected-access
+
+class ProcessPool(TestCase):
+    def setUp(self):
+        self.pool = auth.ProcessPool(max_workers=1)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_reuse_process(self):
+        pid = self.pool.submit(get_pid).result()
+        self.assertNotEqual(os.getpid(), pid)
+        self.assertEqual(pid, self.pool.submit(get_pid).result())
+
+    def test_restart_broken_pool(self):
+        pid = self.pool.submit(get_pid).result()
+        with self.assertRaises(auth.BrokenProcessPool):
+            self.pool.submit(kill_self).result()
+        with mock.patch.object(auth.log, "pcsd"):
+            self.assertNotEqual(pid, self.pool.submit(get_pid).result())
+
+    def test_log_from_worker(self):
+        with mock.patch.object(
+            auth, "authenticate_by_pam", return_value=False
+        ), self.assertLogs("pcs.daemon", logging.INFO) as logs:
+            self.assertFalse(
+                self.pool.submit(
+                    auth.authenticate_user_sync, USER, PASSWORD
+                ).result()
+            )
+            # the records are passed to this process until the workers exit
+            self.pool.shutdown()
+        self.assertEqual(
+            [
+                f"Attempting login by '{USER}'",
+                f"Failed login by '{USER}' (bad username or password)",
+            ],
+            [record.getMessage() for record in logs.records],
+        )
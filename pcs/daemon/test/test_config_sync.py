@@ -0,0 +1,263 @@
+import logging
+import os.path
+import struct
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from tornado.gen import sleep
+from tornado.ioloop import IOLoop
+from tornado.testing import AsyncTestCase, gen_test
+
+from pcs.daemon import config_sync
+
+# Don't write errors to test output.
+logging.getLogger("pcs.daemon").setLevel(logging.CRITICAL)
+
+def inotify_event(watch_descriptor, name):
+    name = name.encode() + b"\0" * (16 - len(name))
+    return struct.pack("iIII", watch_descriptor, 0, 0, len(name)) + name
+
+class ParseInotifyEvents(TestCase):
+    def test_parse_more_events(self):
+        self.assertEqual(
+            [(1, "known-hosts"), (2, "pcs_settings.conf"), (1, "")],
+            config_sync.parse_inotify_events(
+                inotify_event(1, "known-hosts")
+                +
+                inotify_event(2, "pcs_settings.conf")
+                +
+                struct.pack("iIII", 1, 0, 0, 0)
+            )
+        )
+
+    def test_ignore_incomplete_event(self):
+        self.assertEqual(
+            [(1, "known-hosts")],
+            config_sync.parse_inotify_events(
+                inotify_event(1, "known-hosts") + b"\x01\x00"
+            )
+        )
+
+class Lock:
+    def __init__(self):
+        self.locked = False
+
+    async def __aenter__(self):
+        self.locked = True
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.locked = False
+
+class RubyPcsdWrapper:
+    def __init__(self, lock):
+        self.lock = lock
+        self.push_list = []
+        self.saved = []
+        self.locked_while_saving = []
+        self.configs = {}
+        self.on_sync = lambda: None
+
+    async def sync_configs(self, push=False):
+        self.push_list.append(push)
+        self.on_sync()
+        return 0, self.configs
+
+    async def save_synced_configs(self, configs):
+        self.locked_while_saving.append(self.lock.locked)
+        self.saved.append(configs)
+
+class PeerConfigsTest(TestCase):
+    def setUp(self):
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path_list = [
+            os.path.join(tmp_dir.name, name)
+            for name in ("known-hosts", "pcs_settings.conf")
+        ]
+        self.write(0, "hosts")
+        self.write(1, "settings")
+        self.peer_configs = config_sync.PeerConfigs(
+            os.path.join(tmp_dir.name, "peers.json"), self.path_list
+        )
+
+    def write(self, index, content):
+        with open(self.path_list[index], "w") as config_file:
+            config_file.write(content)
+
+    def test_record_changed_files_only(self):
+        hashes = self.peer_configs.get_hashes()
+        self.write(1, "new settings")
+        self.peer_configs.record_changes(hashes)
+        self.assertEqual(
+            {self.path_list[1]: self.peer_configs.get_hashes()[1]},
+            self.peer_configs.take()
+        )
+
+    def test_records_are_merged(self):
+        hashes = self.peer_configs.get_hashes()
+        self.write(0, "new hosts")
+        self.peer_configs.record_changes(hashes)
+        hashes = self.peer_configs.get_hashes()
+        self.write(1, "new settings")
+        self.peer_configs.record_changes(hashes)
+        self.assertEqual(
+            dict(zip(self.path_list, self.peer_configs.get_hashes())),
+            self.peer_configs.take()
+        )
+
+    def test_take_clears_record(self):
+        hashes = self.peer_configs.get_hashes()
+        self.write(0, "new hosts")
+        self.peer_configs.record_changes(hashes)
+        self.peer_configs.take()
+        self.assertEqual({}, self.peer_configs.take())
+
+class ConfigSyncTest(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "known-hosts")
+        self.write("hosts")
+        self.lock = Lock()
+        self.wrapper = RubyPcsdWrapper(self.lock)
+        self.peer_configs = config_sync.PeerConfigs(
+            os.path.join(tmp_dir.name, "peers.json"), [self.path]
+        )
+        self.config_sync = config_sync.ConfigSync(
+            self.lock, self.wrapper, self.peer_configs, trigger_delay=0
+        )
+        self.ioloop = Mock(spec_set=["call_at", "remove_timeout", "time"])
+        self.ioloop.time.return_value = 100
+        ioloop_patcher = patch.object(config_sync, "IOLoop")
+        ioloop_patcher.start().current.return_value = self.ioloop
+        self.addCleanup(ioloop_patcher.stop)
+
+    def write(self, content):
+        with open(self.path, "w") as config_file:
+            config_file.write(content)
+
+    def write_by_peer(self, content):
+        hashes = self.peer_configs.get_hashes()
+        self.write(content)
+        self.peer_configs.record_changes(hashes)
+
+    @gen_test
+    async def test_lock_only_while_saving(self):
+        self.wrapper.configs = {"known-hosts": "new hosts"}
+        await self.config_sync.run()
+        self.assertEqual([False], self.wrapper.push_list)
+        self.assertEqual([{"known-hosts": "new hosts"}], self.wrapper.saved)
+        self.assertEqual([True], self.wrapper.locked_while_saving)
+        self.assertFalse(self.lock.locked)
+        self.ioloop.call_at.assert_called_once_with(
+            0, self.config_sync.run, False
+        )
+
+    @gen_test
+    async def test_do_not_save_nothing(self):
+        await self.config_sync.run()
+        self.assertEqual([], self.wrapper.saved)
+
+    @gen_test
+    async def test_skip_unchanged_content(self):
+        self.write("hosts")
+        await self.config_sync.on_files_changed()
+        self.ioloop.call_at.assert_not_called()
+
+    @gen_test
+    async def test_push_changed_content(self):
+        self.write("new hosts")
+        await self.config_sync.on_files_changed()
+        await self.config_sync.on_files_changed()
+        self.ioloop.call_at.assert_called_once_with(
+            100, self.config_sync.run, True
+        )
+
+    @gen_test
+    async def test_push_content_changed_while_running(self):
+        def change_locally():
+            self.write("new hosts")
+            IOLoop.current().spawn_callback(self.config_sync.on_files_changed)
+        self.wrapper.on_sync = change_locally
+        await self.config_sync.run()
+        self.ioloop.call_at.assert_called_once_with(
+            100, self.config_sync.run, True
+        )
+
+    @gen_test
+    async def test_synced_content_does_not_trigger_sync(self):
+        # The synchronization itself writes the files.
+        self.write("synced hosts")
+        await self.config_sync.run()
+        self.ioloop.call_at.reset_mock()
+        await self.config_sync.on_files_changed()
+        self.ioloop.call_at.assert_not_called()
+
+    @gen_test
+    async def test_content_sent_by_peer_is_not_pushed(self):
+        self.write_by_peer("peer hosts")
+        await self.config_sync.on_files_changed()
+        self.ioloop.call_at.assert_not_called()
+        # The content is not pushed later either.
+        await self.config_sync.on_files_changed()
+        self.ioloop.call_at.assert_not_called()
+
+    @gen_test
+    async def test_push_content_changed_after_sent_by_peer(self):
+        self.write_by_peer("peer hosts")
+        self.write("new hosts")
+        await self.config_sync.on_files_changed()
+        self.ioloop.call_at.assert_called_once_with(
+            100, self.config_sync.run, True
+        )
+
+    @gen_test
+    async def test_content_sent_by_peer_while_running_is_not_pushed(self):
+        self.wrapper.on_sync = lambda: self.write_by_peer("peer hosts")
+        await self.config_sync.run()
+        self.ioloop.call_at.assert_called_once_with(
+            0, self.config_sync.run, False
+        )
+
+class FileWatcherTest(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.dir = tmp_dir.name
+        self.on_change = Mock()
+        self.watcher = config_sync.FileWatcher(
+            [os.path.join(self.dir, "known-hosts")], self.on_change
+        )
+        if not self.watcher.start():
+            self.skipTest("inotify is not available")
+
+    def tearDown(self):
+        # The watcher must be stopped before the loop is closed.
+        self.watcher.stop()
+        super().tearDown()
+
+    def write(self, name):
+        with open(os.path.join(self.dir, name), "w") as config_file:
+            config_file.write("content")
+
+    @gen_test
+    async def test_watched_file_changed(self):
+        self.write("known-hosts")
+        await sleep(0.2)
+        self.on_change.assert_called()
+
+    @gen_test
+    async def test_other_file_changed(self):
+        self.write("other")
+        await sleep(0.2)
+        self.on_change.assert_not_called()
+
+    @gen_test
+    async def test_stopped(self):
+        self.watcher.stop()
+        self.write("known-hosts")
+        await sleep(0.2)
+        self.on_change.assert_not_called()
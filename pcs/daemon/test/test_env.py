@@ -40,6 +40,13 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
             env.PCSD_DEBUG: False,
             env.PCSD_DISABLE_GUI: False,
             env.PCSD_SESSION_LIFETIME: settings.gui_session_lifetime_seconds,
+            env.PCSD_RUBY_WORKERS: settings.pcsd_ruby_workers,
+            env.PCSD_RUBY_WORKER_MAX_REQUESTS: (
+                settings.pcsd_ruby_worker_max_requests
+            ),
+            env.PCSD_MAX_BODY_SIZE: settings.pcsd_max_body_size,
+            env.PCSD_WORKERS: settings.pcsd_workers,
+            env.PCSD_SESSION_STORAGE: settings.pcsd_session_storage,
             env.GEM_HOME: pcsd_dir(settings.pcsd_gem_path),
             env.PCSD_CMDLINE_ENTRY: pcsd_dir(env.PCSD_CMDLINE_ENTRY_RB_SCRIPT),
             env.PCSD_STATIC_FILES_DIR: pcsd_dir(env.PCSD_STATIC_FILES_DIR_NAME),
@@ -75,6 +82,11 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
             env.PCSD_DEBUG: "true",
             env.PCSD_DISABLE_GUI: "true",
             env.PCSD_SESSION_LIFETIME: str(session_lifetime),
+            env.PCSD_RUBY_WORKERS: "0",
+            env.PCSD_RUBY_WORKER_MAX_REQUESTS: "10",
+            env.PCSD_MAX_BODY_SIZE: "1024",
+            env.PCSD_WORKERS: "3",
+            env.PCSD_SESSION_STORAGE: "file",
             env.PCSD_DEV: "true",
             env.HTTPS_PROXY: "proxy1",
             env.NO_PROXY: "host",
@@ -91,6 +103,11 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
                 env.PCSD_DEBUG: True,
                 env.PCSD_DISABLE_GUI: True,
                 env.PCSD_SESSION_LIFETIME: session_lifetime,
+                env.PCSD_RUBY_WORKERS: 0,
+                env.PCSD_RUBY_WORKER_MAX_REQUESTS: 10,
+                env.PCSD_MAX_BODY_SIZE: 1024,
+                env.PCSD_WORKERS: 3,
+                env.PCSD_SESSION_STORAGE: "file",
                 env.GEM_HOME: pcsd_dir(settings.pcsd_gem_path),
                 env.PCSD_CMDLINE_ENTRY: pcsd_dir(
                     env.PCSD_CMDLINE_ENTRY_RB_SCRIPT
@@ -115,6 +132,51 @@ class Prepare(TestCase, create_setup_patch_mixin(env)):
             ]
         )
 
+    def test_error_on_invalid_session_storage(self):
+        environ = {env.PCSD_SESSION_STORAGE: "disk"}
+        self.assert_environ_produces_modified_pcsd_env(
+            environ,
+            specific_env_values={**environ, "has_errors": True},
+            errors=[
+                "Invalid PCSD_SESSION_STORAGE value 'disk' (use memory or file)"
+            ]
+        )
+
+    def test_error_on_session_storage_with_braces(self):
+        environ = {env.PCSD_SESSION_STORAGE: "{x}"}
+        self.assert_environ_produces_modified_pcsd_env(
+            environ,
+            specific_env_values={**environ, "has_errors": True},
+            errors=[
+                "Invalid PCSD_SESSION_STORAGE value '{x}' (use memory or file)"
+            ]
+        )
+
+    def test_error_on_invalid_ruby_workers(self):
+        environ = {
+            env.PCSD_RUBY_WORKERS: "-1",
+            env.PCSD_RUBY_WORKER_MAX_REQUESTS: "many",
+            env.PCSD_MAX_BODY_SIZE: "1M",
+            env.PCSD_WORKERS: "all",
+        }
+        self.assert_environ_produces_modified_pcsd_env(
+            environ,
+            specific_env_values={**environ, "has_errors": True},
+            errors=[
+                "Invalid PCSD_RUBY_WORKERS value '-1'"
+                    " (it must be a non-negative integer)"
+                ,
+                "Invalid PCSD_RUBY_WORKER_MAX_REQUESTS value 'many'"
+                    " (it must be a non-negative integer)"
+                ,
+                "Invalid PCSD_MAX_BODY_SIZE value '1M'"
+                    " (it must be a non-negative integer)"
+                ,
+                "Invalid PCSD_WORKERS value 'all'"
+                    " (it must be a non-negative integer)"
+                ,
+            ]
+        )
 
     def test_report_invalid_ssl_ciphers(self):
         environ = {env.PCSD_SSL_CIPHERS: "invalid ;@{}+ ciphers"}
@@ -5,10 +5,12 @@ from unittest.mock import Mock, MagicMock
 from tornado.httpserver import HTTPServer
 from pcs.daemon import http_server
 from pcs.test.tools.misc import create_setup_patch_mixin
-from pcs.daemon.ssl import PcsdSSL
+from pcs.daemon.ssl import PcsdSSL, SSLCertKeyException
 
 PORT = 1234
 BIND_ADDRESSES = ["addr1", "addr2"]
+MAX_BODY_SIZE = 1024
+BODY_TIMEOUT = 60
 
 def addr2sock(addr_list):
     return [f"sock:{addr}" for addr in addr_list]
@@ -25,22 +27,36 @@ class ManageTest(TestCase, create_setup_patch_mixin(http_server)):
 
         self.setup_patch("HTTPServer", self.HTTPServer)
         # self.setup_patch("PcsdSSL", Mock(return_value=self.pcsd_ssl))
-        self.setup_patch("bind_sockets", lambda port, addr: addr2sock([addr]))
+        self.reuse_port_list = []
+        self.setup_patch("bind_sockets", self.bind_sockets)
 
         self.app = MagicMock()
-        self.https_server_manage = http_server.HttpsServerManage(
+        self.https_server_manage = self.create_server_manage()
+        self.assertEqual(0, len(self.server_list))
+        self.assertFalse(self.https_server_manage.server_is_running)
+
+    def create_server_manage(self, **kwargs):
+        return http_server.HttpsServerManage(
             Mock(return_value=self.app),
             PORT,
             BIND_ADDRESSES,
             self.pcsd_ssl,
+            max_body_size=MAX_BODY_SIZE,
+            body_timeout=BODY_TIMEOUT,
+            **kwargs
         )
-        self.assertEqual(0, len(self.server_list))
-        self.assertFalse(self.https_server_manage.server_is_running)
 
-    def HTTPServer(self, app, ssl_options):
+    def bind_sockets(self, port, addr, reuse_port):
+        self.assertEqual(PORT, port)
+        self.reuse_port_list.append(reuse_port)
+        return addr2sock([addr])
+
+    def HTTPServer(self, app, ssl_options, max_body_size, body_timeout):
         # pylint: disable=invalid-name
         self.assertEqual(self.app, app)
         self.assertEqual(self.pcsd_ssl.create_context.return_value, ssl_options)
+        self.assertEqual(MAX_BODY_SIZE, max_body_size)
+        self.assertEqual(BODY_TIMEOUT, body_timeout)
         self.server_list.append(MagicMock(spec_set=HTTPServer))
         return self.server_list[-1]
 
@@ -53,15 +69,40 @@ class ManageTest(TestCase, create_setup_patch_mixin(http_server)):
         self.server_list[0].stop.assert_called_once()
         self.assertFalse(self.https_server_manage.server_is_running)
 
+    def test_reuse_port_disabled_by_default(self):
+        self.https_server_manage.start()
+        self.assertEqual([False, False], self.reuse_port_list)
+
+    def test_reuse_port(self):
+        self.create_server_manage(reuse_port=True).start()
+        self.server_list[0].add_sockets.assert_called_once_with(BIND_SOCKETS)
+        self.assertEqual([True, True], self.reuse_port_list)
+
     def test_reload_certs_raises_when_server_not_started(self):
         self.assertRaises(
             http_server.HttpsServerManageException,
             self.https_server_manage.reload_certs,
         )
 
-    def test_reload_certs_exchanges_servers(self):
+    def test_reload_certs_keeps_server_running(self):
         self.https_server_manage.start()
         self.https_server_manage.reload_certs()
-        self.server_list[0].stop.assert_called_once()
-        self.server_list[1].add_sockets.assert_called_once_with(BIND_SOCKETS)
+        self.assertEqual(1, len(self.server_list))
+        self.server_list[0].stop.assert_not_called()
+        self.server_list[0].add_sockets.assert_called_once_with(BIND_SOCKETS)
+        self.pcsd_ssl.load_cert_chain.assert_called_once_with(
+            self.pcsd_ssl.create_context.return_value
+        )
+        self.assertTrue(self.https_server_manage.server_is_running)
+
+    def test_reload_certs_keeps_old_certs_on_invalid_ones(self):
+        self.https_server_manage.start()
+        self.pcsd_ssl.guarantee_valid_certs.side_effect = (
+            SSLCertKeyException("invalid")
+        )
+        self.assertRaises(
+            SSLCertKeyException,
+            self.https_server_manage.reload_certs,
+        )
+        self.pcsd_ssl.load_cert_chain.assert_not_called()
         self.assertTrue(self.https_server_manage.server_is_running)
@@ -0,0 +1,65 @@
+import logging
+import queue
+import tempfile
+from unittest import TestCase
+
+from pcs.daemon import log
+
+class QueuePipeline(TestCase):
+    def setUp(self):
+        log_file = tempfile.NamedTemporaryFile("r")
+        self.addCleanup(log_file.close)
+        self.log_file = log_file
+        self.handler = log.BatchFileHandler(log_file.name, encoding="utf8")
+        self.addCleanup(self.handler.close)
+        self.handler.setFormatter(log.Formatter())
+        self.queue_handler = log.QueueHandler(queue.Queue(2))
+        self.logger = logging.getLogger("pcs.daemon.test.log")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.queue_handler)
+        self.addCleanup(self.logger.removeHandler, self.queue_handler)
+        self.listener = log.QueueListener(self.queue_handler, self.handler)
+
+    def read_log(self):
+        return self.log_file.read().splitlines()
+
+    def test_write_formatted_records(self):
+        self.listener.start()
+        self.logger.info("message %s", 1)
+        try:
+            raise ValueError("error")
+        except ValueError:
+            self.logger.exception("failed")
+        self.listener.stop()
+        lines = self.read_log()
+        self.assertRegex(
+            lines[0], r"^I, \[\S+ #00000\]     INFO -- : message 1$"
+        )
+        self.assertRegex(lines[1], r"^E, \[\S+ #00000\]    ERROR -- : failed$")
+        self.assertEqual(1, lines.count("ValueError: error"))
+
+    def test_keep_group_id_of_external_records(self):
+        self.listener.start()
+        record = self.logger.makeRecord(
+            self.logger.name, logging.INFO, "(external)", 0, "ruby", [], None
+        )
+        record.pcsd_group_id = "00042"
+        self.logger.handle(record)
+        self.listener.stop()
+        self.assertRegex(
+            self.read_log()[0], r"^I, \[\S+ #00042\]     INFO -- : ruby$"
+        )
+
+    def test_drop_records_when_queue_is_full(self):
+        for i in range(5):
+            self.logger.info("message %s", i)
+        self.listener.start()
+        self.listener.stop()
+        lines = self.read_log()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].endswith("message 0"))
+        self.assertTrue(lines[1].endswith("message 1"))
+        self.assertTrue(
+            lines[2].endswith("3 log messages dropped, the log queue was full")
+        )
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from tornado.locks import Lock
+from tornado.testing import AsyncTestCase, gen_test
+
+from pcs.daemon import metrics
+
+class Render(TestCase):
+    def test_counter(self):
+        counter = metrics.Counter("requests_total", "Requests", ["code"])
+        counter.inc("200")
+        counter.inc("200")
+        counter.inc('4"0\\4', amount=3)
+        self.assertEqual(
+            metrics.render([counter]),
+            "# HELP requests_total Requests\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{code="200"} 2\n'
+            'requests_total{code="4\\"0\\\\4"} 3\n'
+        )
+
+    def test_gauge(self):
+        gauge = metrics.Gauge("sessions", "Sessions")
+        gauge.set(2)
+        self.assertEqual(
+            metrics.render([gauge]),
+            "# HELP sessions Sessions\n# TYPE sessions gauge\nsessions 2\n"
+        )
+        gauge.set_function(lambda: 5)
+        self.assertTrue(metrics.render([gauge]).endswith("sessions 5\n"))
+
+    def test_histogram(self):
+        histogram = metrics.Histogram(
+            "duration_seconds", "Duration", ["kind"], buckets=(0.1, 1)
+        )
+        histogram.observe(0.05, "a")
+        histogram.observe(0.5, "a")
+        histogram.observe(2, "a")
+        self.assertEqual(
+            metrics.render([histogram]),
+            "# HELP duration_seconds Duration\n"
+            "# TYPE duration_seconds histogram\n"
+            'duration_seconds_bucket{kind="a",le="0.1"} 1\n'
+            'duration_seconds_bucket{kind="a",le="1"} 2\n'
+            'duration_seconds_bucket{kind="a",le="+Inf"} 3\n'
+            'duration_seconds_sum{kind="a"} 2.55\n'
+            'duration_seconds_count{kind="a"} 3\n'
+        )
+
+class TimedLock(AsyncTestCase):
+    @gen_test
+    async def test_measure_waiting(self):
+        histogram = metrics.Histogram("wait_seconds", "Wait")
+        lock = metrics.TimedLock(Lock(), histogram)
+        async with lock:
+            pass
+        await lock.acquire()
+        lock.release()
+        self.assertIn("wait_seconds_count 2\n", metrics.render([histogram]))
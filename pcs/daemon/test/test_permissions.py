@@ -0,0 +1,87 @@
+import json
+import tempfile
+from unittest import mock, TestCase
+
+from pcs.daemon import permissions
+
+USER = "user"
+GROUP = "group"
+
+class PermissionsSetAllows(TestCase):
+    def setUp(self):
+        self.permissions = permissions.PermissionsSet([
+            {"type": "user", "name": USER, "allow": ["read"]},
+            {"type": "group", "name": GROUP, "allow": ["full"]},
+            {"type": "unknown", "name": "other", "allow": ["full"]},
+        ])
+
+    def test_superuser_is_allowed_anything(self):
+        self.assertTrue(
+            self.permissions.allows("hacluster", [], permissions.GRANT)
+        )
+
+    def test_user_allowed(self):
+        self.assertTrue(self.permissions.allows(USER, [], permissions.READ))
+
+    def test_user_not_allowed(self):
+        self.assertFalse(self.permissions.allows(USER, [], permissions.WRITE))
+
+    def test_allowed_by_group(self):
+        self.assertTrue(
+            self.permissions.allows(USER, ["other", GROUP], permissions.GRANT)
+        )
+
+    def test_unknown_entity(self):
+        self.assertFalse(
+            self.permissions.allows("other", ["other"], permissions.READ)
+        )
+
+class GetLocalPermissions(TestCase):
+    def setUp(self):
+        log_patcher = mock.patch.object(permissions.log, "pcsd")
+        self.log = log_patcher.start()
+        self.addCleanup(log_patcher.stop)
+
+    @staticmethod
+    def get_permissions(content):
+        with tempfile.NamedTemporaryFile("w") as settings_file:
+            settings_file.write(content)
+            settings_file.flush()
+            return permissions.get_local_permissions(settings_file.name)
+
+    def assert_haclient_allowed(self, permission_set, allowed=True):
+        self.assertEqual(
+            allowed,
+            permission_set.allows(USER, ["haclient"], permissions.WRITE)
+        )
+
+    def test_missing_file(self):
+        self.assert_haclient_allowed(
+            permissions.get_local_permissions("/nonexistent/pcs_settings")
+        )
+
+    def test_empty_file(self):
+        self.assert_haclient_allowed(self.get_permissions(""), allowed=False)
+
+    def test_format_1(self):
+        self.assert_haclient_allowed(self.get_permissions("[]"))
+
+    def test_format_2(self):
+        permission_set = self.get_permissions(json.dumps({
+            "format_version": 2,
+            "permissions": {
+                "local_cluster": [
+                    {"type": "user", "name": USER, "allow": ["write"]},
+                ],
+            },
+        }))
+        self.assertTrue(permission_set.allows(USER, [], permissions.READ))
+        self.assertFalse(
+            permission_set.allows("other", ["haclient"], permissions.READ)
+        )
+
+    def test_invalid_file(self):
+        self.assert_haclient_allowed(
+            self.get_permissions("{not json"), allowed=False
+        )
+        self.log.error.assert_called_once()
@@ -0,0 +1,89 @@
+from tornado.gen import multi
+from tornado.locks import Event
+from tornado.testing import AsyncTestCase, gen_test
+
+from pcs.daemon import response_cache
+from pcs.test.tools.misc import create_setup_patch_mixin
+
+KEY = ("GET", "/status", "user", ("group",))
+
+class ResponseCacheTest(
+    AsyncTestCase, create_setup_patch_mixin(response_cache)
+):
+    def setUp(self):
+        super().setUp()
+        self.now = self.setup_patch("now", return_value=0)
+        self.cache = response_cache.ResponseCache()
+        self.call_count = 0
+
+    async def produce(self):
+        self.call_count += 1
+        return f"result {self.call_count}"
+
+    @gen_test
+    async def test_cache_result_for_ttl(self):
+        self.assertEqual("result 1", await self.cache.get(KEY, 2, self.produce))
+        self.now.return_value = 1.9
+        self.assertEqual("result 1", await self.cache.get(KEY, 2, self.produce))
+        self.now.return_value = 2
+        self.assertEqual("result 2", await self.cache.get(KEY, 2, self.produce))
+
+    @gen_test
+    async def test_keys_are_separated(self):
+        self.assertEqual("result 1", await self.cache.get(KEY, 2, self.produce))
+        self.assertEqual(
+            "result 2",
+            await self.cache.get(KEY[:3] + (("other",),), 2, self.produce)
+        )
+
+    @gen_test
+    async def test_zero_ttl_disables_cache(self):
+        self.assertEqual("result 1", await self.cache.get(KEY, 0, self.produce))
+        self.assertEqual("result 2", await self.cache.get(KEY, 0, self.produce))
+
+    @gen_test
+    async def test_not_cacheable_result(self):
+        def is_cacheable(result):
+            return result != "result 1"
+        for expected in ["result 1", "result 2", "result 2"]:
+            self.assertEqual(
+                expected,
+                await self.cache.get(
+                    KEY, 2, self.produce, is_cacheable=is_cacheable
+                )
+            )
+
+    @gen_test
+    async def test_coalesce_concurrent_requests(self):
+        released = Event()
+        async def produce():
+            await released.wait()
+            return await self.produce()
+        async def release():
+            released.set()
+        result_list = await multi([
+            self.cache.get(KEY, 2, produce),
+            self.cache.get(KEY, 2, produce),
+            release(),
+        ])
+        self.assertEqual(["result 1", "result 1", None], result_list)
+        self.assertEqual(1, self.call_count)
+
+    @gen_test
+    async def test_propagate_error_to_waiting_requests(self):
+        released = Event()
+        async def produce():
+            await released.wait()
+            raise ValueError("failed")
+        async def get():
+            try:
+                return await self.cache.get(KEY, 2, produce)
+            except ValueError as e:
+                return str(e)
+        async def release():
+            released.set()
+        self.assertEqual(
+            ["failed", "failed", None],
+            await multi([get(), get(), release()])
+        )
+        self.assertEqual("result 1", await self.cache.get(KEY, 2, self.produce))
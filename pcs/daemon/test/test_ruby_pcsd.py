@@ -1,9 +1,11 @@
 import json
 import logging
+import sys
 from base64 import b64encode
 from unittest import TestCase, mock
 from urllib.parse import urlencode
 
+from tornado.gen import sleep
 from tornado.httputil import HTTPServerRequest
 from tornado.testing import AsyncTestCase, gen_test
 from tornado.web import HTTPError
@@ -58,6 +60,14 @@ class GetSinatraRequest(TestCase):
             }
         )
 
+    def test_translate_request_with_body_stream(self):
+        sinatra_request = create_wrapper().get_sinatra_request(
+            create_http_request(),
+            body_stream=True,
+        )
+        self.assertTrue(sinatra_request["body_stream"])
+        self.assertNotIn("rack.input", sinatra_request["env"])
+
 patch_ruby_pcsd = create_patcher(ruby_pcsd)
 
 class RunRuby(AsyncTestCase):
@@ -107,16 +117,29 @@ class RunRuby(AsyncTestCase):
     @gen_test
     def test_sync_config_shortcut_success(self):
         _next = 10
-        self.set_run_result({"next": _next})
-        result = yield self.wrapper.sync_configs()
-        self.assertEqual(result, _next)
+        configs = {"pcs_settings.conf": "text"}
+        self.request = {**self.create_request(), "push": True}
+        self.set_run_result({"next": _next, "configs": configs})
+        result = yield self.wrapper.sync_configs(push=True)
+        self.assertEqual(result, (_next, configs))
 
     @patch_ruby_pcsd("now", return_value=0)
     @gen_test
     def test_sync_config_shorcut_fail(self, now):
         # pylint: disable=unused-argument
+        self.request = {**self.create_request(), "push": False}
         result = yield self.wrapper.sync_configs()
-        self.assertEqual(result, ruby_pcsd.DEFAULT_SYNC_CONFIG_DELAY)
+        self.assertEqual(result, (ruby_pcsd.DEFAULT_SYNC_CONFIG_DELAY, {}))
+
+    @gen_test
+    def test_save_synced_configs(self):
+        configs = {"pcs_settings.conf": "text"}
+        self.request = {
+            **self.create_request(ruby_pcsd.SYNC_CONFIGS_SAVE),
+            "configs": configs,
+        }
+        self.set_run_result({})
+        yield self.wrapper.save_synced_configs(configs)
 
     @gen_test
     def test_request_remote(self):
@@ -169,6 +192,316 @@ class RunRuby(AsyncTestCase):
         )
         self.assert_sinatra_result(result, headers, status, body)
 
+class FakeWorker:
+    def __init__(self):
+        self.is_alive = True
+        self.handled_requests = 0
+        self.stopped = False
+        self.killed = False
+
+    def stop(self):
+        self.stopped = True
+
+    def kill(self):
+        self.killed = True
+
+class RubyWorkerPool(TestCase):
+    def setUp(self):
+        self.started_workers = []
+
+    def start_worker(self):
+        worker = FakeWorker()
+        self.started_workers.append(worker)
+        return worker
+
+    def create_pool(self, size=2, max_requests=0):
+        return ruby_pcsd.RubyWorkerPool(
+            self.start_worker,
+            size=size,
+            max_requests=max_requests,
+        )
+
+    def test_no_worker_when_pool_is_disabled(self):
+        self.assertIsNone(self.create_pool(size=0).acquire())
+        self.assertEqual(self.started_workers, [])
+
+    def test_no_worker_when_all_are_busy(self):
+        pool = self.create_pool()
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertIsNone(pool.acquire())
+        self.assertEqual(self.started_workers, [first, second])
+
+    def test_reuse_released_worker(self):
+        pool = self.create_pool()
+        worker = pool.acquire()
+        pool.release(worker)
+        self.assertIs(pool.acquire(), worker)
+        self.assertEqual(len(self.started_workers), 1)
+
+    def test_recycle_worker_after_max_requests(self):
+        pool = self.create_pool(max_requests=3)
+        worker = pool.acquire()
+        worker.handled_requests = 3
+        pool.release(worker)
+        self.assertTrue(worker.stopped)
+        self.assertIsNot(pool.acquire(), worker)
+
+    def test_replace_crashed_worker(self):
+        pool = self.create_pool(size=1)
+        worker = pool.acquire()
+        worker.is_alive = False
+        pool.release(worker)
+        self.assertTrue(worker.stopped)
+        self.assertIsNot(pool.acquire(), worker)
+
+    def test_replace_worker_died_while_idle(self):
+        pool = self.create_pool(size=1)
+        worker = pool.acquire()
+        pool.release(worker)
+        worker.is_alive = False
+        self.assertIsNot(pool.acquire(), worker)
+        self.assertTrue(worker.killed)
+
+    def test_restart_idle_workers(self):
+        pool = self.create_pool()
+        worker = pool.acquire()
+        pool.release(worker)
+        pool.restart()
+        self.assertTrue(worker.stopped)
+        self.assertIsNot(pool.acquire(), worker)
+
+    def test_restart_busy_workers_when_released(self):
+        pool = self.create_pool(size=1)
+        worker = pool.acquire()
+        pool.restart()
+        self.assertFalse(worker.stopped)
+        pool.release(worker)
+        self.assertTrue(worker.stopped)
+        self.assertIsNot(pool.acquire(), worker)
+
+class CommunicatingWorker(FakeWorker):
+    async def communicate(self, request_json):
+        self.handled_requests += 1
+        return request_json, "", 0
+
+@mock.patch("pcs.daemon.ruby_pcsd.socket.gethostname")
+class SendToRubyWorker(AsyncTestCase):
+    def setUp(self):
+        self.started_workers = []
+        patcher = mock.patch(
+            "pcs.daemon.ruby_pcsd.RubyWorker", self.start_worker
+        )
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.wrapper = ruby_pcsd.Wrapper(
+            rc("/path/to/pcsd/cmdline/entry"),
+            worker_pool_size=1,
+        )
+        super().setUp()
+
+    def start_worker(self, _cmdline, _env):
+        worker = CommunicatingWorker()
+        self.started_workers.append(worker)
+        return worker
+
+    @gen_test
+    def test_reuse_worker(self, mock_gethostname):
+        mock_gethostname.return_value = "node1"
+        yield self.wrapper.send_to_ruby("request")
+        yield self.wrapper.send_to_ruby("request")
+        self.assertEqual(len(self.started_workers), 1)
+        self.assertEqual(self.started_workers[0].handled_requests, 2)
+
+    @gen_test
+    def test_restart_workers_when_node_name_changed(self, mock_gethostname):
+        mock_gethostname.return_value = "node1"
+        yield self.wrapper.send_to_ruby("request")
+        mock_gethostname.return_value = "node2"
+        yield self.wrapper.send_to_ruby("request")
+        self.assertEqual(len(self.started_workers), 2)
+        self.assertTrue(self.started_workers[0].stopped)
+        self.assertEqual(self.started_workers[1].handled_requests, 1)
+
+class StreamingWorker(FakeWorker):
+    async def send_request(self, request_json):
+        pass
+
+class StartRemoteRequestOverflow(AsyncTestCase):
+    def setUp(self):
+        self.started_workers = []
+        patcher = mock.patch(
+            "pcs.daemon.ruby_pcsd.RubyWorker", self.start_worker
+        )
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.wrapper = ruby_pcsd.Wrapper(
+            rc("/path/to/pcsd/cmdline/entry"),
+            worker_pool_size=0,
+            worker_max_overflow=1,
+        )
+        super().setUp()
+
+    def start_worker(self, _cmdline, _env):
+        worker = StreamingWorker()
+        self.started_workers.append(worker)
+        return worker
+
+    @gen_test
+    def test_refuse_request_over_limit(self):
+        yield self.wrapper.start_remote_request(create_http_request())
+        with self.assertRaises(HTTPError) as cm:
+            yield self.wrapper.start_remote_request(create_http_request())
+        self.assertEqual(cm.exception.status_code, 503)
+        self.assertEqual(len(self.started_workers), 1)
+
+    @gen_test
+    def test_start_worker_when_previous_one_stopped(self):
+        stream = yield self.wrapper.start_remote_request(create_http_request())
+        stream.abort()
+        self.assertTrue(self.started_workers[0].stopped)
+        yield self.wrapper.start_remote_request(create_http_request())
+        self.assertEqual(len(self.started_workers), 2)
+
+# A python stand-in for the ruby worker loop in sinatra_cmdline_wrapper.rb.
+FAKE_WORKER_SCRIPT = """
+import json
+import sys
+sys.stdout.buffer.write(b'12\\n{"logs": []}')
+sys.stdout.buffer.flush()
+while True:
+    header = sys.stdin.buffer.readline()
+    if not header:
+        break
+    request = sys.stdin.buffer.read(int(header))
+    if request == b'"crash"':
+        sys.exit(1)
+    try:
+        json.loads(request)
+    except ValueError:
+        # respond with an error and stop as the framing cannot be trusted
+        sys.stdout.buffer.write(b'9\\n"invalid"')
+        sys.stdout.buffer.flush()
+        break
+    if request == b'"body_stream"':
+        # respond with the streamed body
+        request = b""
+        while True:
+            length = int(sys.stdin.buffer.readline())
+            if not length:
+                break
+            request += sys.stdin.buffer.read(length)
+    sys.stderr.write("handled\\n")
+    sys.stdout.buffer.write(str(len(request)).encode() + b"\\n" + request)
+    sys.stdout.buffer.flush()
+"""
+
+class RubyWorker(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = ruby_pcsd.RubyWorker(
+            [sys.executable, "-c", FAKE_WORKER_SCRIPT],
+            {}
+        )
+
+    def tearDown(self):
+        self.worker.kill()
+        # Let the worker finish reading its stderr before the loop is closed.
+        self.io_loop.run_sync(lambda: sleep(0.1))
+        super().tearDown()
+
+    @gen_test
+    def test_handle_more_requests(self):
+        for request in ['{"a": 1}', '{"b": "\\u010d\\n"}']:
+            stdout, dummy_stderr, status = yield self.worker.communicate(
+                request
+            )
+            self.assertEqual(stdout, str.encode(request))
+            self.assertIsNone(status)
+        self.assertTrue(self.worker.is_alive)
+        self.assertEqual(self.worker.handled_requests, 2)
+
+    @gen_test
+    def test_stream_body(self):
+        yield self.worker.send_request('"body_stream"')
+        for chunk in [b"first\n", b"", b"second"]:
+            yield self.worker.send_body_chunk(chunk)
+        yield self.worker.send_body_end()
+        stdout, dummy_stderr, dummy_status = (
+            yield self.worker.receive_response()
+        )
+        self.assertEqual(stdout, b"first\nsecond")
+        stdout, dummy_stderr, dummy_status = yield self.worker.communicate(
+            '{"a": 1}'
+        )
+        self.assertEqual(stdout, b'{"a": 1}')
+
+    @gen_test
+    def test_measure_spawn_until_ready(self):
+        with mock.patch.object(
+            ruby_pcsd.metrics.ruby_spawn_duration, "observe"
+        ) as observe:
+            yield self.worker.communicate('{"a": 1}')
+        observe.assert_called_once_with(mock.ANY, "worker")
+
+    @gen_test
+    def test_stop_on_invalid_request(self):
+        stdout, dummy_stderr, dummy_status = yield self.worker.communicate(
+            "invalid"
+        )
+        self.assertEqual(stdout, b'"invalid"')
+        while self.worker.is_alive:
+            yield sleep(0.01)
+        stdout, dummy_stderr, dummy_status = yield self.worker.communicate(
+            '{"a": 1}'
+        )
+        self.assertEqual(stdout, b"")
+
+    @gen_test
+    def test_crash(self):
+        stdout, dummy_stderr, dummy_status = yield self.worker.communicate(
+            '"crash"'
+        )
+        self.assertEqual(stdout, b"")
+        self.assertFalse(self.worker.is_alive)
+
+class RubyRequestStream(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = mock.Mock(spec_set=ruby_pcsd.RubyWorker)
+        self.release_worker = mock.Mock()
+        self.parse_response = mock.Mock(return_value={
+            "headers": {},
+            "status": 200,
+            "body": b64encode(b"body"),
+        })
+        self.stream = ruby_pcsd.RubyRequestStream(
+            self.worker,
+            self.release_worker,
+            self.parse_response,
+        )
+
+    @gen_test
+    def test_finish(self):
+        async def receive_response():
+            return b"stdout", b"stderr", None
+        async def send_body_end():
+            pass
+        self.worker.receive_response.side_effect = receive_response
+        self.worker.send_body_end.side_effect = send_body_end
+        result = yield self.stream.finish()
+        self.assertEqual(result.body, b"body")
+        self.parse_response.assert_called_once_with(b"stdout", b"stderr")
+        self.release_worker.assert_called_once_with()
+        self.stream.abort()
+        self.worker.kill.assert_not_called()
+
+    def test_abort(self):
+        self.stream.abort()
+        self.stream.abort()
+        self.worker.kill.assert_called_once_with()
+        self.release_worker.assert_called_once_with()
+
 class ProcessResponseLog(TestCase):
     @patch_ruby_pcsd("log.from_external_source")
     @patch_ruby_pcsd("next", mock.Mock(return_value=1))
@@ -1,5 +1,7 @@
+import os.path
 from unittest import TestCase
 from contextlib import contextmanager
+from tempfile import TemporaryDirectory
 
 from pcs.daemon.session import Session
 from pcs.daemon import session
@@ -97,6 +99,14 @@ class StorageTest(TestCase, AssertMixin, PatchSessionMixin):
         self.assertIsNot(session3, session1)
         self.assertIs(session4, session2)
 
+    def test_counts_not_expired_sessions(self):
+        self.storage.provide()
+        self.now.return_value = 5
+        self.storage.provide()
+        self.assertEqual(2, self.storage.count())
+        self.now.return_value = 12
+        self.assertEqual(1, self.storage.count())
+
     def test_can_drop_expired_session_implicitly(self):
         session1 = self.storage.provide()
         sid = session1.sid
@@ -128,3 +138,147 @@ class StorageTest(TestCase, AssertMixin, PatchSessionMixin):
         session2 = self.storage.rejected_user(session1.sid, USER)
         self.assert_login_failed_session(session2, USER)
         self.assertEqual(session1.sid, session2.sid)
+
+class StorageRefreshTest(TestCase, PatchSessionMixin):
+    def setUp(self):
+        self.now = self.setup_patch("now", return_value=0)
+        self.storage = session.Storage(lifetime_seconds=10)
+
+    def test_accessed_session_survives_drop_expired(self):
+        session1 = self.storage.provide()
+        session2 = self.storage.provide()
+        self.now.return_value = 8
+        # pylint: disable=pointless-statement
+        session1.username
+        self.now.return_value = 12
+        self.storage.drop_expired()
+        self.assertEqual(1, self.storage.count())
+        self.assertIs(session1, self.storage.provide(session1.sid))
+        self.assertIsNot(session2, self.storage.provide(session2.sid))
+
+    def test_relogged_session_is_kept_once(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 5
+        self.storage.login(session1.sid, USER, GROUPS)
+        self.now.return_value = 12
+        self.storage.drop_expired()
+        self.assertEqual(1, self.storage.count())
+        self.now.return_value = 16
+        self.storage.drop_expired()
+        self.assertEqual(0, self.storage.count())
+
+class SqliteBackendTest(TestCase, AssertMixin, PatchSessionMixin):
+    def setUp(self):
+        self.now = self.setup_patch("now", return_value=0)
+        self.tmp_dir = TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.storage = self.create_storage()
+
+    def create_storage(self, refresh_interval=0, lifetime_seconds=10):
+        return session.Storage(
+            lifetime_seconds=lifetime_seconds,
+            backend=session.SqliteBackend(
+                os.path.join(self.tmp_dir.name, "sessions.db"),
+                refresh_interval=refresh_interval,
+            ),
+        )
+
+    def test_creates_vanilla_session_when_sid_not_specified(self):
+        self.assert_vanila_session(self.storage.provide())
+
+    def test_does_not_accept_foreign_sid(self):
+        session1 = self.storage.provide("unknown_sid")
+        self.assertNotEqual(session1.sid, "unknown_sid")
+        self.assert_vanila_session(session1)
+
+    def test_database_is_readable_only_by_owner(self):
+        self.storage.provide()
+        self.assertEqual(
+            0o600,
+            os.stat(os.path.join(self.tmp_dir.name, "sessions.db")).st_mode
+                & 0o777
+        )
+
+    def test_sessions_are_shared_by_storages(self):
+        session1 = self.storage.login(sid=None, username=USER, groups=GROUPS)
+        session2 = self.create_storage().provide(session1.sid)
+        self.assertEqual(session1.sid, session2.sid)
+        self.assertEqual(session1.ajax_id, session2.ajax_id)
+        self.assert_authenticated_session(session2, USER, GROUPS)
+
+    def test_can_destroy_session(self):
+        session1 = self.storage.provide()
+        self.create_storage().destroy(session1.sid)
+        self.assertNotEqual(
+            session1.sid,
+            self.storage.provide(session1.sid).sid
+        )
+
+    def test_provide_refreshes_session(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 8
+        self.storage.provide(session1.sid)
+        self.now.return_value = 16
+        self.assertEqual(session1.sid, self.storage.provide(session1.sid).sid)
+
+    def test_refresh_session_once_per_interval(self):
+        self.storage = self.create_storage(
+            refresh_interval=5, lifetime_seconds=100
+        )
+        session1 = self.storage.provide()
+        self.now.return_value = 4
+        self.storage.provide(session1.sid)
+        self.now.return_value = 6
+        self.storage.provide(session1.sid)
+        # The access at 4 has not been written, the one at 6 has been.
+        self.now.return_value = 105
+        self.assertEqual(session1.sid, self.storage.provide(session1.sid).sid)
+        self.now.return_value = 206
+        self.assertNotEqual(
+            session1.sid,
+            self.storage.provide(session1.sid).sid
+        )
+
+    def test_refresh_interval_longer_than_lifetime(self):
+        self.storage = self.create_storage(refresh_interval=60)
+        session1 = self.storage.provide()
+        for access in (3, 6, 9, 18):
+            self.now.return_value = access
+            self.assertEqual(
+                session1.sid,
+                self.storage.provide(session1.sid).sid
+            )
+
+    def test_session_expires(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 11
+        self.assertNotEqual(
+            session1.sid,
+            self.storage.provide(session1.sid).sid
+        )
+
+    def test_can_drop_expired_sessions(self):
+        session1 = self.storage.provide()
+        self.now.return_value = 5
+        session2 = self.storage.provide()
+        self.assertEqual(2, self.storage.count())
+        self.now.return_value = 12
+        self.storage.drop_expired()
+        self.assertEqual(1, self.storage.count())
+        self.assertNotEqual(
+            session1.sid,
+            self.storage.provide(session1.sid).sid
+        )
+        self.assertEqual(session2.sid, self.storage.provide(session2.sid).sid)
+
+    def test_can_login_existing_session(self):
+        session1 = self.storage.provide()
+        session2 = self.storage.login(session1.sid, USER, GROUPS)
+        self.assert_authenticated_session(session2, USER, GROUPS)
+        self.assertEqual(session1.sid, session2.sid)
+
+    def test_can_sign_failed_login_attempt_existing_session(self):
+        session1 = self.storage.provide()
+        session2 = self.storage.rejected_user(session1.sid, USER)
+        self.assert_login_failed_session(session2, USER)
+        self.assertEqual(session1.sid, session2.sid)
@@ -0,0 +1,135 @@
+import logging
+import os.path
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+from tornado.gen import convert_yielded, sleep
+from tornado.process import Subprocess
+from tornado.testing import AsyncTestCase, gen_test
+
+from pcs.daemon import workers
+
+# Don't write errors to test output.
+logging.getLogger("pcs.daemon").setLevel(logging.CRITICAL)
+
+class GetWorkerId(TestCase):
+    def test_worker(self):
+        self.assertEqual("1", workers.get_worker_id({"PCSD_WORKER_ID": "1"}))
+
+    def test_not_worker(self):
+        self.assertIsNone(workers.get_worker_id({}))
+
+class InterProcessLockTest(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "lock")
+
+    @gen_test
+    async def test_lock_is_exclusive_for_lock_files(self):
+        # Each lock has its own open file description, so they lock the file
+        # the same way locks in different processes do.
+        lock1 = workers.InterProcessLock(self.path)
+        lock2 = workers.InterProcessLock(self.path)
+        await lock1.acquire()
+        acquiring = convert_yielded(lock2.acquire())
+        await sleep(0.2)
+        self.assertFalse(acquiring.done())
+        lock1.release()
+        await acquiring
+        lock2.release()
+
+    @gen_test
+    async def test_can_be_acquired_again(self):
+        lock = workers.InterProcessLock(self.path)
+        async with lock:
+            pass
+        async with lock:
+            pass
+
+class WorkerSupervisorTest(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(Subprocess.uninitialize)
+        self.path = os.path.join(tmp_dir.name, "started")
+
+    def create_supervisor(self, code):
+        return workers.WorkerSupervisor(
+            2,
+            [sys.executable, "-c", code],
+            {"STARTED_FILE": self.path},
+            restart_delay=0,
+        )
+
+    def read_started(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as started_file:
+            return started_file.read().split()
+
+    async def wait_for_started(self, count):
+        for _ in range(100):
+            if len(self.read_started()) >= count:
+                return
+            await sleep(0.05)
+        self.fail("Workers have not been started")
+
+    @gen_test(timeout=10)
+    async def test_restart_exited_workers(self):
+        supervisor = self.create_supervisor(
+            "import os;"
+            "open(os.environ['STARTED_FILE'], 'a')"
+            ".write(os.environ['PCSD_WORKER_ID'] + '\\n')"
+        ).start()
+        await self.wait_for_started(4)
+        supervisor.stop()
+        self.assertEqual({"0", "1"}, set(self.read_started()))
+
+    @gen_test(timeout=10)
+    async def test_stop_terminates_workers(self):
+        supervisor = self.create_supervisor(
+            "import os, time;"
+            "open(os.environ['STARTED_FILE'], 'a')"
+            ".write(os.environ['PCSD_WORKER_ID'] + '\\n');"
+            "time.sleep(60)"
+        ).start()
+        await self.wait_for_started(2)
+        supervisor.stop()
+        await sleep(0.5)
+        self.assertEqual(["0", "1"], sorted(self.read_started()))
+
+class CertificateWatcherTest(TestCase):
+    def setUp(self):
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "cert")
+        self.write("cert1")
+        self.server_manage = Mock(spec_set=["reload_certs"])
+        self.watcher = workers.CertificateWatcher(
+            self.server_manage, [self.path]
+        )
+
+    def write(self, content):
+        with open(self.path, "w") as cert_file:
+            cert_file.write(content)
+
+    def test_no_reload_without_change(self):
+        self.watcher.check()
+        self.server_manage.reload_certs.assert_not_called()
+
+    def test_reload_on_change(self):
+        self.write("new cert")
+        self.watcher.check()
+        self.watcher.check()
+        self.server_manage.reload_certs.assert_called_once_with()
+
+    def test_failed_reload_does_not_raise(self):
+        self.server_manage.reload_certs.side_effect = Exception("invalid")
+        os.remove(self.path)
+        self.watcher.check()
+        self.server_manage.reload_certs.assert_called_once_with()
@@ -0,0 +1,148 @@
+import fcntl
+import os
+import signal
+from functools import partial
+
+from tornado.ioloop import IOLoop, PeriodicCallback
+from tornado.locks import Lock
+from tornado.process import Subprocess
+
+from pcs.daemon import log
+
+# With PCSD_WORKERS > 0 the main pcsd process (the coordinator) does not serve
+# requests. It starts worker processes listening on the same port (via
+# SO_REUSEPORT), restarts them when they exit and runs the config
+# synchronization. A worker is the same pcsd program started again with the
+# worker id in its environment.
+
+PCSD_WORKER_ID = "PCSD_WORKER_ID"
+
+def get_worker_id(environ):
+    """
+    Return the id of this worker or None if this process is not a worker
+    """
+    return environ.get(PCSD_WORKER_ID, None)
+
+class InterProcessLock:
+    """
+    InterProcessLock is a tornado lock held by at most one pcsd process at
+    a time. The lock file is locked in an executor, so waiting for the other
+    processes does not block the IOLoop.
+    """
+    def __init__(self, path):
+        self.__path = path
+        self.__lock = Lock()
+        self.__file = None
+
+    async def acquire(self):
+        await self.__lock.acquire()
+        try:
+            if self.__file is None:
+                self.__file = open(self.__path, "a")
+            await IOLoop.current().run_in_executor(
+                None, fcntl.flock, self.__file.fileno(), fcntl.LOCK_EX
+            )
+        except BaseException:
+            self.__lock.release()
+            raise
+
+    def release(self):
+        fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+        self.__lock.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class WorkerSupervisor:
+    """
+    WorkerSupervisor keeps the pcsd worker processes running
+    """
+    def __init__(self, count, cmdline, environ, restart_delay=1):
+        """
+        int count -- number of the workers
+        list cmdline -- command starting pcsd
+        dict environ -- environment of the workers
+        number restart_delay -- seconds to wait before restarting a worker
+        """
+        self.__count = count
+        self.__cmdline = cmdline
+        self.__environ = environ
+        self.__restart_delay = restart_delay
+        # worker id -> Subprocess
+        self.__processes = {}
+        self.__stopping = False
+
+    def start(self):
+        for worker_id in range(self.__count):
+            self.__start(worker_id)
+        return self
+
+    def stop(self):
+        self.__stopping = True
+        for process in self.__processes.values():
+            try:
+                process.proc.send_signal(signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def __start(self, worker_id):
+        if self.__stopping:
+            return
+        log.pcsd.info("Starting pcsd worker %s", worker_id)
+        process = Subprocess(
+            self.__cmdline,
+            env={**self.__environ, PCSD_WORKER_ID: str(worker_id)},
+        )
+        process.set_exit_callback(partial(self.__on_exit, worker_id))
+        self.__processes[worker_id] = process
+
+    def __on_exit(self, worker_id, returncode):
+        del self.__processes[worker_id]
+        if self.__stopping:
+            return
+        log.pcsd.error(
+            "pcsd worker %s exited with code %s, restarting",
+            worker_id,
+            returncode,
+        )
+        IOLoop.current().call_later(
+            self.__restart_delay, self.__start, worker_id
+        )
+
+class CertificateWatcher:
+    """
+    CertificateWatcher reloads the certificates of a worker when they are
+    changed by another worker
+    """
+    def __init__(self, server_manage, path_list, interval=5):
+        self.__server_manage = server_manage
+        self.__path_list = path_list
+        self.__interval = interval
+        self.__state = self.__get_state()
+
+    def start(self):
+        PeriodicCallback(self.check, self.__interval * 1000).start()
+
+    def check(self):
+        state = self.__get_state()
+        if state == self.__state:
+            return
+        self.__state = state
+        try:
+            self.__server_manage.reload_certs()
+            # pylint: disable=broad-except
+        except Exception as e:
+            log.pcsd.error("Unable to reload ssl certificates: %s", e)
+
+    def __get_state(self):
+        state = []
+        for path in self.__path_list:
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                state.append(None)
+        return state
@@ -0,0 +1,208 @@
+from copy import deepcopy
+
+from lxml import etree
+
+# Generation of pacemaker patchsets (format 2) describing changes between two
+# CIBs, the same as `crm_diff --no-version` does. Pacemaker matches elements by
+# their name and id and applies changes in this order: deletes and modifies in
+# the order of the patchset, then creates sorted by their position. Changes
+# which cannot be described that way safely (moved elements, comments,
+# elements without an id which cannot be told apart) are not supported, crm_diff
+# is supposed to be used for them.
+
+# crm_diff --no-version copies these from the original CIB to the new one, so
+# they are never in the patchset.
+_VERSION_ATTRIBUTES = ("admin_epoch", "epoch", "num_updates")
+
+class _UnsupportedChange(Exception):
+    pass
+
+def create_patchset(cib_old, cib_new):
+    """
+    Return a patchset turning cib_old to cib_new or None if the changes are
+    not supported
+
+    etree cib_old -- the original CIB
+    etree cib_new -- the modified CIB
+    """
+    if cib_old.tag != cib_new.tag:
+        return None
+    try:
+        deletes, changes = _diff_element(
+            cib_old, cib_new, _get_path("", cib_old), is_root=True
+        )
+    except _UnsupportedChange:
+        return None
+    patchset = etree.Element("diff")
+    patchset.set("format", "2")
+    patchset.extend(deletes)
+    patchset.extend(changes)
+    return patchset
+
+def set_source_version(patchset, cib):
+    """
+    Put the version of a CIB to a patchset as its source version, pacemaker
+    then refuses to apply the patchset to a CIB changed in the meantime
+
+    etree patchset -- patchset in format 2
+    etree cib -- the CIB the patchset has been created from
+    """
+    # num_updates is left out, it grows with status changes which do not
+    # conflict with the patchset. Missing target version makes pacemaker
+    # increase the version of the CIB itself.
+    version = etree.Element("version")
+    source = etree.SubElement(version, "source")
+    for name in ("admin_epoch", "epoch"):
+        source.set(name, cib.get(name, "0"))
+    patchset.insert(0, version)
+
+def _get_path(parent_path, element):
+    element_id = element.get("id")
+    if element_id is None:
+        return "{0}/{1}".format(parent_path, element.tag)
+    if "'" in element_id:
+        raise _UnsupportedChange()
+    return "{0}/{1}[@id='{2}']".format(parent_path, element.tag, element_id)
+
+def _diff_element(old, new, path, is_root=False):
+    if _has_text(old) or _has_text(new):
+        raise _UnsupportedChange()
+    changes = []
+    modify = _diff_attributes(old, new, path, is_root)
+    if modify is not None:
+        changes.append(modify)
+    new_children = _index_children(new)
+    deletes, child_changes = _diff_children(
+        _index_children(old), new_children, path
+    )
+    changes.extend(_order_child_changes(new_children, child_changes, path))
+    return deletes, changes
+
+def _diff_children(old_children, new_children, path):
+    """
+    Return deletes of removed children and a dict of changes of the other
+    old children keyed by their name and id
+    """
+    if (
+        [key for key in old_children if key in new_children]
+        !=
+        [key for key in new_children if key in old_children]
+    ):
+        # moved elements
+        raise _UnsupportedChange()
+
+    deletes = []
+    child_changes = {}
+    for key, old_child in old_children.items():
+        child_path = _get_path(path, old_child)
+        if key not in new_children:
+            deletes.append(_create_change("delete", child_path))
+            continue
+        if _is_same(old_child, new_children[key]):
+            child_changes[key] = []
+            continue
+        child_deletes, child_changes[key] = _diff_element(
+            old_child, new_children[key], child_path
+        )
+        deletes.extend(child_deletes)
+    return deletes, child_changes
+
+def _order_child_changes(new_children, child_changes, path):
+    """
+    Return changes of the children in the order of the new children, creates
+    of the added children included
+    """
+    changes = []
+    for position, (key, new_child) in enumerate(new_children.items()):
+        if key in child_changes:
+            changes.extend(child_changes[key])
+            continue
+        create = _create_change("create", path)
+        create.set("position", str(position))
+        created = deepcopy(new_child)
+        created.tail = None
+        create.append(created)
+        changes.append(create)
+    return changes
+
+def _is_same(old, new):
+    # Most of the CIB is usually not changed. Comparing serialized subtrees is
+    # much faster than comparing them element by element.
+    return (
+        etree.tostring(old, with_tail=False)
+        ==
+        etree.tostring(new, with_tail=False)
+    )
+
+def _has_text(element):
+    return bool(element.text and element.text.strip()) or any(
+        child.tail and child.tail.strip() for child in element
+    )
+
+def _index_children(element):
+    """
+    Return children of an element in a dict keyed by their name and id
+    """
+    children = {}
+    names_without_id = set()
+    names = set()
+    for child in element:
+        if not isinstance(child.tag, str) or child.tag.startswith("{"):
+            # comments, processing instructions, namespaces
+            raise _UnsupportedChange()
+        key = (child.tag, child.get("id"))
+        # Pacemaker finds an element without an id by its name only.
+        if (
+            key in children
+            or
+            child.tag in names_without_id
+            or
+            (key[1] is None and child.tag in names)
+        ):
+            raise _UnsupportedChange()
+        if key[1] is None:
+            names_without_id.add(child.tag)
+        names.add(child.tag)
+        children[key] = child
+    return children
+
+def _diff_attributes(old, new, path, is_root):
+    old_attrs = dict(old.attrib)
+    new_attrs = dict(new.attrib)
+    if any(name.startswith("{") for name in list(old_attrs) + list(new_attrs)):
+        raise _UnsupportedChange()
+    if is_root:
+        for name in _VERSION_ATTRIBUTES:
+            if name in old_attrs:
+                new_attrs[name] = old_attrs[name]
+
+    change_attr_list = []
+    for name, value in new_attrs.items():
+        if old_attrs.get(name) != value:
+            change_attr_list.append(("set", name, value))
+    for name in old_attrs:
+        if name not in new_attrs:
+            change_attr_list.append(("unset", name, None))
+    if not change_attr_list:
+        return None
+
+    modify = _create_change("modify", path)
+    change_list = etree.SubElement(modify, "change-list")
+    for operation, name, value in change_attr_list:
+        change_attr = etree.SubElement(change_list, "change-attr")
+        change_attr.set("name", name)
+        change_attr.set("operation", operation)
+        if value is not None:
+            change_attr.set("value", value)
+    result = etree.SubElement(
+        etree.SubElement(modify, "change-result"), new.tag
+    )
+    for name, value in new_attrs.items():
+        result.set(name, value)
+    return modify
+
+def _create_change(operation, path):
+    change = etree.Element("change")
+    change.set("operation", operation)
+    change.set("path", path)
+    return change
@@ -0,0 +1,269 @@
+import logging
+import os.path
+from unittest import mock, skipUnless, TestCase
+
+from lxml import etree
+
+from pcs import settings
+from pcs.lib.cib.patchset import (
+    create_patchset,
+    set_source_version,
+)
+from pcs.lib.external import CommandRunner
+from pcs.lib.tools import write_tmpfile
+from pcs.test.tools.assertions import assert_xml_equal
+from pcs.test.tools.custom_mock import MockLibraryReportProcessor
+from pcs.test.tools.misc import get_test_resource as rc
+from pcs.test.tools.xml import etree_to_str
+
+
+CIB = """
+    <cib epoch="557" num_updates="122" admin_epoch="0"
+        validate-with="pacemaker-2.0" crm_feature_set="3.0.9"
+    >
+      <configuration>
+        <crm_config/>
+        <nodes/>
+        <resources>
+          <primitive id="R1" class="ocf" provider="pacemaker" type="Dummy">
+            <meta_attributes id="R1-meta">
+              <nvpair id="R1-meta-a" name="a" value="1"/>
+            </meta_attributes>
+          </primitive>
+          <primitive id="R2" class="ocf" provider="pacemaker" type="Dummy"/>
+        </resources>
+        <constraints/>
+      </configuration>
+      <status/>
+    </cib>
+"""
+
+R1_META_PATH = (
+    "/cib/configuration/resources/primitive[@id='R1']"
+    "/meta_attributes[@id='R1-meta']"
+)
+NVPAIR_PATH = R1_META_PATH + "/nvpair[@id='R1-meta-a']"
+
+def diff(change_xml=""):
+    return '<diff format="2">{0}</diff>'.format(change_xml)
+
+class CreatePatchset(TestCase):
+    def setUp(self):
+        self.cib_old = etree.fromstring(CIB)
+        self.cib_new = etree.fromstring(CIB)
+
+    def assert_patchset(self, expected_xml):
+        assert_xml_equal(
+            expected_xml,
+            etree_to_str(create_patchset(self.cib_old, self.cib_new))
+        )
+
+    def assert_not_supported(self):
+        self.assertIsNone(create_patchset(self.cib_old, self.cib_new))
+
+    def test_no_change(self):
+        self.assert_patchset(diff())
+
+    def test_versions_are_ignored(self):
+        self.cib_new.set("epoch", "558")
+        self.cib_new.set("num_updates", "0")
+        self.assert_patchset(diff())
+
+    def test_modify_attributes(self):
+        nvpair = self.cib_new.find(".//nvpair")
+        nvpair.set("value", "2")
+        del nvpair.attrib["name"]
+        nvpair.set("new", "attr")
+        self.assert_patchset(diff("""
+            <change operation="modify" path="{0}">
+              <change-list>
+                <change-attr name="value" operation="set" value="2"/>
+                <change-attr name="new" operation="set" value="attr"/>
+                <change-attr name="name" operation="unset"/>
+              </change-list>
+              <change-result>
+                <nvpair id="R1-meta-a" value="2" new="attr"/>
+              </change-result>
+            </change>
+        """.format(NVPAIR_PATH)))
+
+    def test_modify_root(self):
+        self.cib_new.set("validate-with", "pacemaker-3.0")
+        self.cib_new.set("epoch", "558")
+        self.assert_patchset(diff("""
+            <change operation="modify" path="/cib">
+              <change-list>
+                <change-attr name="validate-with" operation="set"
+                    value="pacemaker-3.0"
+                />
+              </change-list>
+              <change-result>
+                <cib epoch="557" num_updates="122" admin_epoch="0"
+                    validate-with="pacemaker-3.0" crm_feature_set="3.0.9"
+                />
+              </change-result>
+            </change>
+        """))
+
+    def test_create(self):
+        resources = self.cib_new.find(".//resources")
+        resources.insert(
+            1, etree.Element("primitive", id="R3", type="Dummy")
+        )
+        etree.SubElement(resources, "group", id="G")
+        self.assert_patchset(diff("""
+            <change operation="create" path="/cib/configuration/resources"
+                position="1"
+            >
+              <primitive id="R3" type="Dummy"/>
+            </change>
+            <change operation="create" path="/cib/configuration/resources"
+                position="3"
+            >
+              <group id="G"/>
+            </change>
+        """))
+
+    def test_delete(self):
+        self.cib_new.find(".//meta_attributes").getparent().remove(
+            self.cib_new.find(".//meta_attributes")
+        )
+        self.cib_new.find("configuration").remove(
+            self.cib_new.find(".//constraints")
+        )
+        self.assert_patchset(diff("""
+            <change operation="delete" path="{0}"/>
+            <change operation="delete" path="/cib/configuration/constraints"/>
+        """.format(R1_META_PATH)))
+
+    def test_deletes_go_first(self):
+        self.cib_new.find(".//resources").remove(
+            self.cib_new.find(".//primitive[@id='R2']")
+        )
+        self.cib_new.find(".//nvpair").set("value", "2")
+        self.assert_patchset(diff("""
+            <change operation="delete"
+                path="/cib/configuration/resources/primitive[@id='R2']"
+            />
+            <change operation="modify" path="{0}">
+              <change-list>
+                <change-attr name="value" operation="set" value="2"/>
+              </change-list>
+              <change-result>
+                <nvpair id="R1-meta-a" name="a" value="2"/>
+              </change-result>
+            </change>
+        """.format(NVPAIR_PATH)))
+
+    def test_moved_element_not_supported(self):
+        resources = self.cib_new.find(".//resources")
+        resources.append(resources[0])
+        self.assert_not_supported()
+
+    def test_comment_not_supported(self):
+        self.cib_new.find("configuration").append(etree.Comment("comment"))
+        self.assert_not_supported()
+
+    def test_ambiguous_elements_not_supported(self):
+        etree.SubElement(self.cib_new.find("configuration"), "nodes")
+        self.assert_not_supported()
+
+    def test_quote_in_id_not_supported(self):
+        for cib in (self.cib_old, self.cib_new):
+            cib.find(".//resources").append(
+                etree.Element("primitive", id="R'")
+            )
+        self.cib_new.find(".//resources")[-1].set("type", "Dummy")
+        self.assert_not_supported()
+
+    def test_different_root_not_supported(self):
+        self.cib_new.tag = "not-cib"
+        self.assert_not_supported()
+
+
+class SetSourceVersion(TestCase):
+    def setUp(self):
+        self.patchset = etree.fromstring(
+            diff('<change operation="delete" path="/cib/status"/>')
+        )
+
+    def assert_source_version(self, cib_xml, expected_source_xml):
+        set_source_version(self.patchset, etree.fromstring(cib_xml))
+        assert_xml_equal(
+            diff("""
+                <version>{0}</version>
+                <change operation="delete" path="/cib/status"/>
+            """.format(expected_source_xml)),
+            etree_to_str(self.patchset)
+        )
+
+    def test_success(self):
+        self.assert_source_version(
+            '<cib admin_epoch="1" epoch="557" num_updates="3"/>',
+            '<source admin_epoch="1" epoch="557"/>'
+        )
+
+    def test_missing_version(self):
+        self.assert_source_version(
+            "<cib/>", '<source admin_epoch="0" epoch="0"/>'
+        )
+
+
+CRM_DIFF = os.path.join(settings.pacemaker_binaries, "crm_diff")
+
+@skipUnless(os.path.exists(CRM_DIFF), "crm_diff is not installed")
+class CreatePatchsetCrmDiff(TestCase):
+    """
+    Patchsets are the same as those created by crm_diff
+    """
+    def setUp(self):
+        with open(rc("cib-large.xml")) as cib_file:
+            self.cib_old_xml = cib_file.read()
+        self.cib_old = etree.fromstring(self.cib_old_xml)
+        self.cib_new = etree.fromstring(self.cib_old_xml)
+
+    def assert_same_as_crm_diff(self):
+        old_file = write_tmpfile(self.cib_old_xml)
+        new_file = write_tmpfile(etree_to_str(self.cib_new))
+        stdout, stderr, retval = CommandRunner(
+            mock.MagicMock(logging.Logger), MockLibraryReportProcessor()
+        ).run([
+            CRM_DIFF,
+            "--original", old_file.name,
+            "--new", new_file.name,
+            "--no-version",
+        ])
+        self.assertIn(retval, (0, 1), stderr)
+        assert_xml_equal(
+            stdout if retval else diff(),
+            etree_to_str(create_patchset(self.cib_old, self.cib_new))
+        )
+
+    def test_modify(self):
+        for element in self.cib_new.iterfind(".//primitive"):
+            element.set("description", "changed")
+        self.assert_same_as_crm_diff()
+
+    def test_create_and_delete(self):
+        resources = self.cib_new.find(".//resources")
+        resources.remove(resources[0])
+        etree.SubElement(resources, "primitive", id="new-resource")
+        self.assert_same_as_crm_diff()
+
+    def test_create_at_nonzero_position(self):
+        resources = self.cib_new.find(".//resources")
+        resources.insert(2, etree.Element("primitive", id="new-resource"))
+        self.assert_same_as_crm_diff()
+
+    def test_nested_modify_and_create(self):
+        primitive = self.cib_new.find(".//primitive[@id='dummy1']")
+        primitive.set("description", "changed")
+        meta_attributes = primitive.find("meta_attributes")
+        meta_attributes.set("score", "10")
+        meta_attributes.insert(
+            0,
+            etree.Element(
+                "nvpair", id="dummy1-meta_attributes-a", name="a", value="1"
+            )
+        )
+        self.assert_same_as_crm_diff()
@@ -9,7 +9,9 @@ REQUIRED_CIB_VERSION = Version(2, 0, 0)
 
 @contextmanager
 def cib_acl_section(env):
-    yield get_acls(env.get_cib(REQUIRED_CIB_VERSION))
+    yield get_acls(
+        env.get_cib(REQUIRED_CIB_VERSION, sections=["configuration"])
+    )
     env.push_cib()
 
 def create_role(lib_env, role_id, permission_info_list, description):
@@ -249,7 +251,9 @@ def get_config(lib_env):
 
     lib_env -- LibraryEnvironment
     """
-    acl_section = get_acls(lib_env.get_cib(REQUIRED_CIB_VERSION))
+    acl_section = get_acls(
+        lib_env.get_cib(REQUIRED_CIB_VERSION, sections=["configuration"])
+    )
     return {
         "target_list": acl.get_target_list(acl_section),
         "group_list": acl.get_group_list(acl_section),
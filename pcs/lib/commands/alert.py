@@ -34,17 +34,19 @@ def create_alert(
     if not path:
         raise LibraryError(reports.required_option_is_missing(["path"]))
 
-    cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
-    id_provider = IdProvider(cib)
-    alert_el = alert.create_alert(cib, alert_id, path, description)
-    arrange_first_instance_attributes(
-        alert_el, instance_attribute_dict, id_provider
-    )
-    arrange_first_meta_attributes(
-        alert_el, meta_attribute_dict, id_provider
-    )
+    def modify(cib):
+        id_provider = IdProvider(cib)
+        alert_el = alert.create_alert(cib, alert_id, path, description)
+        arrange_first_instance_attributes(
+            alert_el, instance_attribute_dict, id_provider
+        )
+        arrange_first_meta_attributes(
+            alert_el, meta_attribute_dict, id_provider
+        )
 
-    lib_env.push_cib()
+    lib_env.modify_cib(
+        modify, REQUIRED_CIB_VERSION, sections=["configuration"]
+    )
 
 
 def update_alert(
@@ -67,17 +69,19 @@ def update_alert(
         deleted, if None old value will stay unchanged
     """
 
-    cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
-    id_provider = IdProvider(cib)
-    alert_el = alert.update_alert(cib, alert_id, path, description)
-    arrange_first_instance_attributes(
-        alert_el, instance_attribute_dict, id_provider
-    )
-    arrange_first_meta_attributes(
-        alert_el, meta_attribute_dict, id_provider
-    )
+    def modify(cib):
+        id_provider = IdProvider(cib)
+        alert_el = alert.update_alert(cib, alert_id, path, description)
+        arrange_first_instance_attributes(
+            alert_el, instance_attribute_dict, id_provider
+        )
+        arrange_first_meta_attributes(
+            alert_el, meta_attribute_dict, id_provider
+        )
 
-    lib_env.push_cib()
+    lib_env.modify_cib(
+        modify, REQUIRED_CIB_VERSION, sections=["configuration"]
+    )
 
 
 def remove_alert(lib_env, alert_id_list):
@@ -87,16 +91,19 @@ def remove_alert(lib_env, alert_id_list):
     lib_env -- LibraryEnvironment
     alert_id_list -- list of alerts ids which should be removed
     """
-    cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
-    report_list = []
-    for alert_id in alert_id_list:
-        try:
-            alert.remove_alert(cib, alert_id)
-        except LibraryError as e:
-            report_list += e.args
-
-    lib_env.report_processor.process_list(report_list)
-    lib_env.push_cib()
+    def modify(cib):
+        report_list = []
+        for alert_id in alert_id_list:
+            try:
+                alert.remove_alert(cib, alert_id)
+            except LibraryError as e:
+                report_list += e.args
+
+        lib_env.report_processor.process_list(report_list)
+
+    lib_env.modify_cib(
+        modify, REQUIRED_CIB_VERSION, sections=["configuration"]
+    )
 
 
 def add_recipient(
@@ -126,25 +133,27 @@ def add_recipient(
             reports.required_option_is_missing(["value"])
         )
 
-    cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
-    id_provider = IdProvider(cib)
-    recipient = alert.add_recipient(
-        lib_env.report_processor,
-        cib,
-        alert_id,
-        recipient_value,
-        recipient_id=recipient_id,
-        description=description,
-        allow_same_value=allow_same_value
-    )
-    arrange_first_instance_attributes(
-        recipient, instance_attribute_dict, id_provider
-    )
-    arrange_first_meta_attributes(
-        recipient, meta_attribute_dict, id_provider
-    )
+    def modify(cib):
+        id_provider = IdProvider(cib)
+        recipient = alert.add_recipient(
+            lib_env.report_processor,
+            cib,
+            alert_id,
+            recipient_value,
+            recipient_id=recipient_id,
+            description=description,
+            allow_same_value=allow_same_value
+        )
+        arrange_first_instance_attributes(
+            recipient, instance_attribute_dict, id_provider
+        )
+        arrange_first_meta_attributes(
+            recipient, meta_attribute_dict, id_provider
+        )
 
-    lib_env.push_cib()
+    lib_env.modify_cib(
+        modify, REQUIRED_CIB_VERSION, sections=["configuration"]
+    )
 
 
 def update_recipient(
@@ -173,24 +182,26 @@ def update_recipient(
         raise LibraryError(
             reports.cib_alert_recipient_invalid_value(recipient_value)
         )
-    cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
-    id_provider = IdProvider(cib)
-    recipient = alert.update_recipient(
-        lib_env.report_processor,
-        cib,
-        recipient_id,
-        recipient_value=recipient_value,
-        description=description,
-        allow_same_value=allow_same_value
-    )
-    arrange_first_instance_attributes(
-        recipient, instance_attribute_dict, id_provider
-    )
-    arrange_first_meta_attributes(
-        recipient, meta_attribute_dict, id_provider
-    )
+    def modify(cib):
+        id_provider = IdProvider(cib)
+        recipient = alert.update_recipient(
+            lib_env.report_processor,
+            cib,
+            recipient_id,
+            recipient_value=recipient_value,
+            description=description,
+            allow_same_value=allow_same_value
+        )
+        arrange_first_instance_attributes(
+            recipient, instance_attribute_dict, id_provider
+        )
+        arrange_first_meta_attributes(
+            recipient, meta_attribute_dict, id_provider
+        )
 
-    lib_env.push_cib()
+    lib_env.modify_cib(
+        modify, REQUIRED_CIB_VERSION, sections=["configuration"]
+    )
 
 
 def remove_recipient(lib_env, recipient_id_list):
@@ -200,15 +211,18 @@ def remove_recipient(lib_env, recipient_id_list):
     lib_env -- LibraryEnvironment
     recipient_id_list -- list of recipients ids to be removed
     """
-    cib = lib_env.get_cib(REQUIRED_CIB_VERSION)
-    report_list = []
-    for recipient_id in recipient_id_list:
-        try:
-            alert.remove_recipient(cib, recipient_id)
-        except LibraryError as e:
-            report_list += e.args
-    lib_env.report_processor.process_list(report_list)
-    lib_env.push_cib()
+    def modify(cib):
+        report_list = []
+        for recipient_id in recipient_id_list:
+            try:
+                alert.remove_recipient(cib, recipient_id)
+            except LibraryError as e:
+                report_list += e.args
+        lib_env.report_processor.process_list(report_list)
+
+    lib_env.modify_cib(
+        modify, REQUIRED_CIB_VERSION, sections=["configuration"]
+    )
 
 
 def get_all_alerts(lib_env):
@@ -218,4 +232,4 @@ def get_all_alerts(lib_env):
 
     lib_env -- LibraryEnvironment
     """
-    return alert.get_all_alerts(lib_env.get_cib())
+    return alert.get_all_alerts(lib_env.get_cib(sections=["configuration"]))
@@ -331,9 +331,11 @@ def setup(
     # Validation done. If errors occured, an exception has been raised and we
     # don't get below this line.
 
-    # Destroy cluster on all nodes.
+    # Destroy cluster on all nodes. Any error in this and the next step stops
+    # the setup, so there is no point in waiting for slow nodes.
     com_cmd = cluster.Destroy(env.report_processor)
     com_cmd.set_targets(target_list)
+    com_cmd.enable_fail_fast()
     run_and_raise(env.get_node_communicator(), com_cmd)
 
     # Distribute auth tokens.
@@ -345,6 +347,7 @@ def setup(
         known_hosts_to_remove=[],
     )
     com_cmd.set_targets(target_list)
+    com_cmd.enable_fail_fast()
     run_and_raise(env.get_node_communicator(), com_cmd)
 
     # TODO This should be in the file distribution call but so far we don't
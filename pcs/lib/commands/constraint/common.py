@@ -30,7 +30,7 @@ def create_with_set(
     callable duplicate_check takes two elements and decide if they are
         duplicates
     """
-    cib = env.get_cib()
+    cib = env.get_cib(sections=["configuration"])
 
     find_valid_resource_id = partial(
         constraint.find_valid_resource_id,
@@ -70,7 +70,10 @@ def show(tag_name, is_plain, env):
     env is library environment
     """
     constraints_info = {"plain": [], "with_resource_sets": []}
-    for element in get_constraints(env.get_cib()).findall(".//"+tag_name):
+    constraint_section = get_constraints(
+        env.get_cib(sections=["configuration"])
+    )
+    for element in constraint_section.findall(".//"+tag_name):
         if is_plain(element):
             constraints_info["plain"].append(constraint.export_plain(element))
         else:
@@ -35,7 +35,7 @@ def create(
     callable duplicate_check takes two elements and decide if they are
         duplicates
     """
-    cib = env.get_cib()
+    cib = env.get_cib(sections=["configuration"])
 
     options = ticket.prepare_options_plain(
         cib,
@@ -67,7 +67,9 @@ def remove(env, ticket_key, resource_id):
     ref is removed. If resource is alone in resource set whole constraint is
     removed.
     """
-    constraint_section = get_constraints(env.get_cib())
+    constraint_section = get_constraints(
+        env.get_cib(sections=["configuration"])
+    )
     any_plain_removed = ticket.remove_plain(
         constraint_section,
         ticket_key,
@@ -2446,6 +2446,21 @@ class Failures(RemoveCallsMixin, TestCase):
             ) for node in self.nodes_offline
         ]
 
+    def _get_fail_fast_reports(self, command):
+        # the first error stops waiting for the other nodes
+        return [
+            fixture.error(
+                report_codes.NODE_COMMUNICATION_COMMAND_UNSUCCESSFUL,
+                node=self.nodes_failed[0],
+                command=command,
+                reason=REASON,
+            ),
+            fixture.warn(
+                report_codes.NODE_COMMUNICATION_CANCELLED,
+                node_list=self.nodes_offline + self.nodes_success,
+            ),
+        ]
+
     def test_start_failure(self):
         (self.config
             .http.host.enable_cluster(NODE_LIST)
@@ -2941,7 +2956,7 @@ class Failures(RemoveCallsMixin, TestCase):
         self.env_assist.assert_reports(
             reports_success_minimal_fixture()[:-16]
             +
-            self._get_failure_reports("remote/known_hosts_change")
+            self._get_fail_fast_reports("remote/known_hosts_change")
         )
 
     def test_cluster_destroy_failure(self):
@@ -2962,15 +2977,7 @@ class Failures(RemoveCallsMixin, TestCase):
         self.env_assist.assert_reports(
             reports_success_minimal_fixture()[:-19]
             +
-            [
-                fixture.info(
-                    report_codes.CLUSTER_DESTROY_SUCCESS,
-                    node=node
-                )
-                for node in self.nodes_success
-            ]
-            +
-            self._get_failure_reports("remote/cluster_destroy")
+            self._get_fail_fast_reports("remote/cluster_destroy")
         )
 
 
@@ -19,7 +19,9 @@ class AclCommandsTest(TestCase, ExtendedAssertionsMixin):
         self.mock_env.get_cib.return_value = self.cib
 
     def assert_get_cib_called(self):
-        self.mock_env.get_cib.assert_called_once_with(REQUIRED_CIB_VERSION)
+        self.mock_env.get_cib.assert_called_once_with(
+            REQUIRED_CIB_VERSION, sections=["configuration"]
+        )
 
     def assert_same_cib_pushed(self):
         self.mock_env.push_cib.assert_called_once_with()
@@ -35,7 +37,9 @@ class CibAclSection(TestCase):
         env.get_cib = mock.Mock(return_value="cib")
         with cmd_acl.cib_acl_section(env):
             pass
-        env.get_cib.assert_called_once_with(cmd_acl.REQUIRED_CIB_VERSION)
+        env.get_cib.assert_called_once_with(
+            cmd_acl.REQUIRED_CIB_VERSION, sections=["configuration"]
+        )
         env.push_cib.assert_called_once_with()
 
     def test_does_not_push_cib_on_exception(self):
@@ -44,7 +48,9 @@ class CibAclSection(TestCase):
             with cmd_acl.cib_acl_section(env):
                 raise AssertionError()
         self.assertRaises(AssertionError, run)
-        env.get_cib.assert_called_once_with(cmd_acl.REQUIRED_CIB_VERSION)
+        env.get_cib.assert_called_once_with(
+            cmd_acl.REQUIRED_CIB_VERSION, sections=["configuration"]
+        )
         env.push_cib.assert_not_called()
 
 @mock.patch("pcs.lib.commands.acl.get_acls", mock.Mock(side_effect=lambda x: x))
@@ -65,7 +65,7 @@ class CreateAlertTest(TestCase):
 
     def test_create_no_upgrade(self):
         (self.config
-            .runner.cib.load()
+            .runner.cib.load_without_status()
             .env.push_cib(optional_in_conf=self.fixture_final_alerts)
         )
         cmd_alert.create_alert(
@@ -82,7 +82,7 @@ class CreateAlertTest(TestCase):
 
     def test_create_upgrade(self):
         (self.config
-            .runner.cib.load(
+            .runner.cib.load_without_status(
                 filename="cib-empty-2.0.xml",
                 name="load_cib_old_version"
             )
@@ -167,7 +167,9 @@ class UpdateAlertTest(TestCase):
         </alerts>
         """
         (self.config
-            .runner.cib.load(optional_in_conf=self.fixture_initial_alerts)
+            .runner.cib.load_without_status(
+                optional_in_conf=self.fixture_initial_alerts
+            )
             .env.push_cib(
                 replace={"./configuration/alerts": fixture_final_alerts}
             )
@@ -186,7 +188,9 @@ class UpdateAlertTest(TestCase):
 
     def test_update_instance_attribute(self):
         (self.config
-            .runner.cib.load(optional_in_conf=self.fixture_initial_alerts)
+            .runner.cib.load_without_status(
+                optional_in_conf=self.fixture_initial_alerts
+            )
             .env.push_cib(
                 replace={
                     './configuration/alerts/alert[@id="my-alert"]/'
@@ -212,7 +216,7 @@ class UpdateAlertTest(TestCase):
 
     def test_alert_doesnt_exist(self):
         (self.config
-            .runner.cib.load(
+            .runner.cib.load_without_status(
                 optional_in_conf="""
                     <alerts>
                         <alert id="alert" path="path"/>
@@ -243,7 +247,7 @@ class UpdateAlertTest(TestCase):
 class RemoveAlertTest(TestCase):
     def setUp(self):
         self.env_assist, self.config = get_env_tools(test_case=self)
-        self.config.runner.cib.load(
+        self.config.runner.cib.load_without_status(
             optional_in_conf="""
                 <alerts>
                     <alert id="alert1" path="path"/>
@@ -320,7 +324,7 @@ class RemoveAlertTest(TestCase):
 class AddRecipientTest(TestCase):
     def setUp(self):
         self.env_assist, self.config = get_env_tools(test_case=self)
-        self.config.runner.cib.load(
+        self.config.runner.cib.load_without_status(
             optional_in_conf="""
                 <alerts>
                     <alert id="alert" path="path">
@@ -331,6 +335,7 @@ class AddRecipientTest(TestCase):
         )
 
     def test_value_not_defined(self):
+        self.config.remove("runner.cib.load.root")
         self.config.remove("runner.cib.load")
         self.env_assist.assert_raise_library_error(
             lambda: cmd_alert.add_recipient(
@@ -458,7 +463,7 @@ class AddRecipientTest(TestCase):
 class UpdateRecipientTest(TestCase):
     def setUp(self):
         self.env_assist, self.config = get_env_tools(test_case=self)
-        self.config.runner.cib.load(
+        self.config.runner.cib.load_without_status(
             optional_in_conf="""
                 <alerts>
                     <alert id="alert" path="path">
@@ -496,6 +501,7 @@ class UpdateRecipientTest(TestCase):
         )
 
     def test_empty_value(self):
+        self.config.remove("runner.cib.load.root")
         self.config.remove("runner.cib.load")
         self.env_assist.assert_raise_library_error(
             lambda: cmd_alert.update_recipient(
@@ -600,7 +606,7 @@ class RemoveRecipientTest(TestCase):
 
     def setUp(self):
         self.env_assist, self.config = get_env_tools(test_case=self)
-        self.config.runner.cib.load(
+        self.config.runner.cib.load_without_status(
             optional_in_conf=self.fixture_initial_alerts
         )
 
@@ -21,7 +21,7 @@ class CreateTest(TestCase):
     def test_sucess_create(self):
         env_assist, config = get_env_tools(test_case=self)
         (config
-            .runner.cib.load(
+            .runner.cib.load_without_status(
                 resources="""
                     <resources>
                         <primitive id="resourceA" class="service" type="exim"/>
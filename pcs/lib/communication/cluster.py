@@ -1,3 +1,4 @@
+from pcs import settings
 from pcs.common.node_communicator import RequestData
 from pcs.lib import reports
 from pcs.lib.corosync import live as corosync_live
@@ -62,6 +63,15 @@ class GetQuorumStatus(AllSameDataMixin, OneByOneStrategyMixin, RunRemotelyBase):
     _quorum_status = None
     _has_failure = False
 
+    def __init__(self, report_processor):
+        super().__init__(report_processor)
+        # getting quorum status does not change anything, it is safe to ask
+        # more nodes at once
+        self._set_hedging(
+            settings.default_request_hedge_delay,
+            settings.default_request_hedge_max_duplicates
+        )
+
     def _get_request_data(self):
         return RequestData("remote/get_quorum_info")
 
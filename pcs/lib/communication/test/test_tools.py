@@ -0,0 +1,451 @@
+import asyncio
+from unittest import mock, TestCase
+
+from pcs.common import report_codes
+from pcs.common.node_communicator import Request, RequestData, RequestTarget
+from pcs.common.reports import SimpleReportProcessorInterface
+from pcs.lib.communication import tools
+from pcs.lib.errors import LibraryError, ReportItem
+from pcs.test.tools import fixture
+from pcs.test.tools.custom_mock import MockLibraryReportProcessor
+
+
+class FakeCommunicator:
+    def __init__(self):
+        self._queue = []
+        self.add_requests_call_list = []
+
+    def add_requests(self, request_list):
+        self.add_requests_call_list.append(
+            [request.action for request in request_list]
+        )
+        self._queue.extend(request_list)
+
+    def _get_response(self):
+        return mock.Mock(request=self._queue.pop(0))
+
+    def start_loop(self):
+        while self._queue:
+            yield self._get_response()
+
+    async def start_loop_async(self):
+        while self._queue:
+            await asyncio.sleep(0)
+            yield self._get_response()
+
+
+class FakeCommand(tools.CommunicationCommandInterface):
+    def __init__(self, name, node_list, call_list, error=False):
+        self._name = name
+        self._node_list = node_list
+        self._call_list = call_list
+        self._error = error
+
+    def before(self):
+        self._call_list.append(("before", self._name))
+
+    def get_initial_request_list(self):
+        return [
+            Request(
+                RequestTarget(node),
+                RequestData("{0}-{1}".format(self._name, node)),
+            )
+            for node in self._node_list
+        ]
+
+    def on_response(self, response):
+        self._call_list.append(("response", response.request.action))
+        return []
+
+    def on_complete(self):
+        self._call_list.append(("complete", self._name))
+        return self._name
+
+    @property
+    def error_list(self):
+        return ["error"] if self._error else []
+
+
+class FakeTimerCommunicator:
+    """
+    Runs a script of steps, a step is either "timer" to call the first waiting
+    callback or a host label of a running request to be answered
+    """
+    def __init__(self, script, response_data):
+        self._script = list(script)
+        self._response_data = response_data
+        self._running = []
+        self._timer_list = []
+        self.request_list = []
+        self.cancelled_list = []
+        self.delay_list = []
+
+    def add_requests(self, request_list):
+        self.request_list.extend(request_list)
+        self._running.extend(request_list)
+
+    def call_later(self, delay, callback):
+        self.delay_list.append(delay)
+        self._timer_list.append(callback)
+
+    def cancel_requests(self, request_list):
+        self.cancelled_list.extend(request_list)
+        for request in request_list:
+            self._running.remove(request)
+
+    def start_loop(self):
+        for step in self._script:
+            if step == "timer":
+                self._timer_list.pop(0)()
+                continue
+            request = [r for r in self._running if r.host_label == step][0]
+            self._running.remove(request)
+            yield mock.Mock(
+                request=request, data=self._response_data[step]
+            )
+
+
+class FakeOneByOneCommand(
+    tools.AllSameDataMixin, tools.OneByOneStrategyMixin, tools.RunRemotelyBase
+):
+    def __init__(self, report_processor, hedging=None):
+        super().__init__(report_processor)
+        self._answered_by = None
+        if hedging:
+            self._set_hedging(*hedging)
+
+    def _get_request_data(self):
+        return RequestData("action")
+
+    def _process_response(self, response):
+        if response.data != "ok":
+            return self._get_next_list()
+        self._answered_by = response.request.host_label
+        return []
+
+    def on_complete(self):
+        return self._answered_by
+
+
+class FakeAllAtOnceCommand(
+    tools.AllSameDataMixin, tools.AllAtOnceStrategyMixin, tools.RunRemotelyBase
+):
+    def _get_request_data(self):
+        return RequestData("action")
+
+    def _process_response(self, response):
+        if response.data != "ok":
+            self._report(ReportItem.error(
+                "FAILED", info={"node": response.request.host_label}
+            ))
+
+
+class RunAsync(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.call_list = []
+        self.communicator = FakeCommunicator()
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_run(self):
+        cmd = FakeCommand("a", ["n1", "n2"], self.call_list)
+        self.assertEqual(
+            "a",
+            self.loop.run_until_complete(
+                tools.run_async(self.communicator, cmd)
+            )
+        )
+        self.assertEqual(
+            [["a-n1", "a-n2"]], self.communicator.add_requests_call_list
+        )
+        self.assertEqual(
+            [
+                ("before", "a"),
+                ("response", "a-n1"),
+                ("response", "a-n2"),
+                ("complete", "a"),
+            ],
+            self.call_list
+        )
+
+    def test_run_and_raise_success(self):
+        cmd = FakeCommand("a", ["n1"], self.call_list)
+        self.assertEqual(
+            "a",
+            self.loop.run_until_complete(
+                tools.run_and_raise_async(self.communicator, cmd)
+            )
+        )
+
+    def test_run_and_raise_error(self):
+        cmd = FakeCommand("a", ["n1"], self.call_list, error=True)
+        self.assertRaises(
+            LibraryError,
+            self.loop.run_until_complete,
+            tools.run_and_raise_async(self.communicator, cmd)
+        )
+
+
+class RunMany(TestCase):
+    def setUp(self):
+        self.call_list = []
+        self.communicator = FakeCommunicator()
+
+    def fixture_cmd(self, name, node_list, error=False):
+        return FakeCommand(name, node_list, self.call_list, error)
+
+    def test_independent_commands(self):
+        cmd_a = self.fixture_cmd("a", ["n1", "n2"])
+        cmd_b = self.fixture_cmd("b", ["n1"])
+        self.assertEqual(
+            ["a", "b"],
+            tools.run_many(self.communicator, [cmd_a, cmd_b])
+        )
+        self.assertEqual(
+            [["a-n1", "a-n2", "b-n1"]],
+            self.communicator.add_requests_call_list
+        )
+        self.assertEqual(
+            [
+                ("before", "a"),
+                ("before", "b"),
+                ("response", "a-n1"),
+                ("response", "a-n2"),
+                ("complete", "a"),
+                ("response", "b-n1"),
+                ("complete", "b"),
+            ],
+            self.call_list
+        )
+
+    def test_per_node_chains(self):
+        stop_1 = self.fixture_cmd("stop", ["n1"])
+        stop_2 = self.fixture_cmd("stop", ["n2"])
+        start_1 = self.fixture_cmd("start", ["n1"])
+        start_2 = self.fixture_cmd("start", ["n2"])
+        self.assertEqual(
+            ["stop", "start", "stop", "start"],
+            tools.run_many(
+                self.communicator,
+                [stop_1, start_1, stop_2, start_2],
+                {start_1: [stop_1], start_2: [stop_2]}
+            )
+        )
+        self.assertEqual(
+            [["stop-n1", "stop-n2"], ["start-n1"], ["start-n2"]],
+            self.communicator.add_requests_call_list
+        )
+        self.assertEqual(
+            [
+                ("before", "stop"),
+                ("before", "stop"),
+                ("response", "stop-n1"),
+                ("complete", "stop"),
+                ("before", "start"),
+                ("response", "stop-n2"),
+                ("complete", "stop"),
+                ("before", "start"),
+                ("response", "start-n1"),
+                ("complete", "start"),
+                ("response", "start-n2"),
+                ("complete", "start"),
+            ],
+            self.call_list
+        )
+
+    def test_command_without_requests(self):
+        cmd_a = self.fixture_cmd("a", [])
+        cmd_b = self.fixture_cmd("b", ["n1"])
+        self.assertEqual(
+            ["a", "b"],
+            tools.run_many(self.communicator, [cmd_a, cmd_b], {cmd_b: [cmd_a]})
+        )
+        self.assertEqual([["b-n1"]], self.communicator.add_requests_call_list)
+
+    def test_no_commands(self):
+        self.assertEqual([], tools.run_many(self.communicator, []))
+        self.assertEqual([[]], self.communicator.add_requests_call_list)
+
+    def test_circular_dependency(self):
+        cmd_a = self.fixture_cmd("a", ["n1"])
+        cmd_b = self.fixture_cmd("b", ["n1"])
+        self.assertRaises(
+            AssertionError,
+            lambda: tools.run_many(
+                self.communicator,
+                [cmd_a, cmd_b],
+                {cmd_a: [cmd_b], cmd_b: [cmd_a]}
+            )
+        )
+
+    def test_unknown_dependency(self):
+        cmd_a = self.fixture_cmd("a", ["n1"])
+        cmd_b = self.fixture_cmd("b", ["n1"])
+        self.assertRaises(
+            AssertionError,
+            lambda: tools.run_many(
+                self.communicator, [cmd_a], {cmd_a: [cmd_b]}
+            )
+        )
+
+    def test_unexpected_response(self):
+        cmd_a = self.fixture_cmd("a", ["n1"])
+        original_add_requests = self.communicator.add_requests
+        def add_equal_requests(request_list):
+            original_add_requests([
+                Request(request.target, RequestData(request.action))
+                for request in request_list
+            ])
+        self.communicator.add_requests = add_equal_requests
+        self.assertRaises(
+            AssertionError,
+            lambda: tools.run_many(self.communicator, [cmd_a])
+        )
+
+    def test_run_and_raise(self):
+        cmd_a = self.fixture_cmd("a", ["n1"])
+        cmd_b = self.fixture_cmd("b", ["n1"], error=True)
+        self.assertRaises(
+            LibraryError,
+            lambda: tools.run_many_and_raise(self.communicator, [cmd_a, cmd_b])
+        )
+        self.assertEqual(
+            [("complete", "a"), ("complete", "b")],
+            [call for call in self.call_list if call[0] == "complete"]
+        )
+
+    def test_async(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        cmd_a = self.fixture_cmd("a", ["n1"])
+        cmd_b = self.fixture_cmd("b", ["n1"])
+        self.assertEqual(
+            ["a", "b"],
+            loop.run_until_complete(
+                tools.run_many_async(
+                    self.communicator, [cmd_a, cmd_b], {cmd_b: [cmd_a]}
+                )
+            )
+        )
+        self.assertEqual(
+            [["a-n1"], ["b-n1"]], self.communicator.add_requests_call_list
+        )
+
+
+class Hedging(TestCase):
+    def setUp(self):
+        self.report_processor = mock.Mock(
+            spec_set=SimpleReportProcessorInterface
+        )
+
+    def fixture_cmd(self, node_list, hedging=None):
+        cmd = FakeOneByOneCommand(self.report_processor, hedging)
+        cmd.set_targets([RequestTarget(node) for node in node_list])
+        return cmd
+
+    def assert_labels(self, label_list, request_list):
+        self.assertEqual(
+            label_list, [request.host_label for request in request_list]
+        )
+
+    def test_hedging_disabled(self):
+        communicator = FakeTimerCommunicator(
+            ["n1", "n2"], {"n1": "fail", "n2": "ok"}
+        )
+        cmd = self.fixture_cmd(["n1", "n2", "n3"])
+        self.assertEqual("n2", tools.run(communicator, cmd))
+        self.assert_labels(["n1", "n2"], communicator.request_list)
+        self.assertEqual([], communicator.delay_list)
+        self.assertEqual([], communicator.cancelled_list)
+
+    def test_first_answer_wins(self):
+        communicator = FakeTimerCommunicator(
+            ["timer", "n2"], {"n1": "ok", "n2": "ok"}
+        )
+        cmd = self.fixture_cmd(["n1", "n2", "n3"], (1.5, 1))
+        self.assertEqual("n2", tools.run(communicator, cmd))
+        self.assert_labels(["n1", "n2"], communicator.request_list)
+        self.assert_labels(["n1"], communicator.cancelled_list)
+        self.assertEqual([1.5, 1.5], communicator.delay_list)
+
+    def test_max_duplicates(self):
+        communicator = FakeTimerCommunicator(
+            ["timer", "timer", "n1", "n3"],
+            {"n1": "fail", "n2": "ok", "n3": "ok"}
+        )
+        cmd = self.fixture_cmd(["n1", "n2", "n3", "n4"], (1, 1))
+        self.assertEqual("n3", tools.run(communicator, cmd))
+        self.assert_labels(["n1", "n2", "n3"], communicator.request_list)
+        self.assert_labels(["n2"], communicator.cancelled_list)
+
+    def test_no_targets_left(self):
+        communicator = FakeTimerCommunicator(
+            ["timer", "timer", "n1", "n2"], {"n1": "fail", "n2": "fail"}
+        )
+        cmd = self.fixture_cmd(["n1", "n2"], (1, 2))
+        self.assertEqual(None, tools.run(communicator, cmd))
+        self.assert_labels(["n1", "n2"], communicator.request_list)
+        self.assertEqual([], communicator.cancelled_list)
+
+    def test_run_many(self):
+        communicator = FakeTimerCommunicator(
+            ["timer", "n2"], {"n1": "ok", "n2": "ok"}
+        )
+        cmd = self.fixture_cmd(["n1", "n2"], (1, 1))
+        self.assertEqual(["n2"], tools.run_many(communicator, [cmd]))
+        self.assert_labels(["n1", "n2"], communicator.request_list)
+        self.assert_labels(["n1"], communicator.cancelled_list)
+
+
+class FailFast(TestCase):
+    def setUp(self):
+        self.report_processor = MockLibraryReportProcessor()
+        self.cmd = FakeAllAtOnceCommand(self.report_processor)
+        self.cmd.set_targets(
+            [RequestTarget(node) for node in ["n1", "n2", "n3"]]
+        )
+
+    def test_disabled(self):
+        communicator = FakeTimerCommunicator(
+            ["n2", "n1", "n3"], {"n1": "ok", "n2": "fail", "n3": "ok"}
+        )
+        self.assertRaises(
+            LibraryError, lambda: tools.run_and_raise(communicator, self.cmd)
+        )
+        self.assertEqual([], communicator.cancelled_list)
+        self.report_processor.assert_reports([
+            fixture.error("FAILED", node="n2"),
+        ])
+
+    def test_cancel_on_error(self):
+        self.cmd.enable_fail_fast()
+        communicator = FakeTimerCommunicator(
+            ["n2"], {"n1": "ok", "n2": "fail", "n3": "ok"}
+        )
+        self.assertRaises(
+            LibraryError, lambda: tools.run_and_raise(communicator, self.cmd)
+        )
+        self.assertEqual(
+            ["n1", "n3"],
+            [request.host_label for request in communicator.cancelled_list]
+        )
+        self.report_processor.assert_reports([
+            fixture.error("FAILED", node="n2"),
+            fixture.warn(
+                report_codes.NODE_COMMUNICATION_CANCELLED,
+                node_list=["n1", "n3"],
+            ),
+        ])
+
+    def test_no_error(self):
+        self.cmd.enable_fail_fast()
+        communicator = FakeTimerCommunicator(
+            ["n2", "n1", "n3"], {"n1": "ok", "n2": "ok", "n3": "ok"}
+        )
+        tools.run_and_raise(communicator, self.cmd)
+        self.assertEqual([], communicator.cancelled_list)
+        self.report_processor.assert_reports([])
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from pcs.common import report_codes
 from pcs.common.node_communicator import Request
 from pcs.common.reports import SimpleReportProcessorInterface
@@ -17,13 +19,7 @@ def run(communicator, cmd):
     NodeCommunicator communicator -- object used for communication
     CommunicationCommandInterface cmd
     """
-    cmd.before()
-    communicator.add_requests(cmd.get_initial_request_list())
-    for response in communicator.start_loop():
-        extra_requests = cmd.on_response(response)
-        if extra_requests:
-            communicator.add_requests(extra_requests)
-    return cmd.on_complete()
+    return run_many(communicator, [cmd])[0]
 
 
 def run_and_raise(communicator, cmd):
@@ -42,6 +38,218 @@ def run_and_raise(communicator, cmd):
     return to_return
 
 
+async def run_async(communicator, cmd):
+    """
+    Run communication command as a coroutine on the current event loop.
+    Returns return value of method on_complete() of communcation command after
+    run.
+
+    AsyncCommunicatorMixin communicator -- object used for communication
+    CommunicationCommandInterface cmd
+    """
+    return (await run_many_async(communicator, [cmd]))[0]
+
+
+async def run_and_raise_async(communicator, cmd):
+    """
+    Run communication command as a coroutine on the current event loop.
+    Returns return value of method on_complete() of communcation command after
+    run.
+    Raises LibraryError (with no report item) when some errors occured while
+    running communication command.
+
+    AsyncCommunicatorMixin communicator -- object used for communication
+    CommunicationCommandInterface cmd
+    """
+    to_return = await run_async(communicator, cmd)
+    if cmd.error_list:
+        raise LibraryError()
+    return to_return
+
+
+def run_many(communicator, cmd_list, dependency_map=None):
+    """
+    Run several communication commands in one communicator loop. Returns a list
+    of return values of methods on_complete() of the commands in the order of
+    cmd_list.
+
+    A command is started once all the commands it depends on are complete.
+    Commands which do not depend on each other run concurrently. That allows
+    to create per-node chains of commands (e.g. a stop command followed by a
+    start command for each node) where a fast node does not have to wait for
+    the slowest node to finish the previous step.
+
+    NodeCommunicator communicator -- object used for communication
+    list cmd_list -- CommunicationCommandInterface instances to run
+    dict dependency_map -- {command: list of commands which must be complete
+        before the command starts}
+    """
+    graph = _CommandGraph(communicator, cmd_list, dependency_map)
+    graph.start()
+    for response in communicator.start_loop():
+        graph.on_response(response)
+    return graph.get_results()
+
+
+def run_many_and_raise(communicator, cmd_list, dependency_map=None):
+    """
+    Run several communication commands in one communicator loop, see run_many.
+    Raises LibraryError (with no report item) when some errors occured while
+    running any of the communication commands.
+
+    NodeCommunicator communicator -- object used for communication
+    list cmd_list -- CommunicationCommandInterface instances to run
+    dict dependency_map -- {command: list of commands which must be complete
+        before the command starts}
+    """
+    to_return = run_many(communicator, cmd_list, dependency_map)
+    if any(cmd.error_list for cmd in cmd_list):
+        raise LibraryError()
+    return to_return
+
+
+async def run_many_async(communicator, cmd_list, dependency_map=None):
+    """
+    Run several communication commands as a coroutine on the current event
+    loop, see run_many.
+
+    AsyncCommunicatorMixin communicator -- object used for communication
+    list cmd_list -- CommunicationCommandInterface instances to run
+    dict dependency_map -- {command: list of commands which must be complete
+        before the command starts}
+    """
+    graph = _CommandGraph(communicator, cmd_list, dependency_map)
+    graph.start()
+    async for response in communicator.start_loop_async():
+        graph.on_response(response)
+    return graph.get_results()
+
+
+class _CommandGraph:
+    """
+    Runs communication commands in the order defined by their dependencies
+    """
+    def __init__(self, communicator, cmd_list, dependency_map=None):
+        self._communicator = communicator
+        self._cmd_list = list(cmd_list)
+        dependency_map = dependency_map or {}
+        for cmd, prerequisite_list in dependency_map.items():
+            if cmd not in self._cmd_list or any(
+                prerequisite not in self._cmd_list
+                for prerequisite in prerequisite_list
+            ):
+                raise AssertionError(
+                    "All commands in dependency_map must be in cmd_list"
+                )
+        self._waiting_for = {
+            cmd: set(dependency_map.get(cmd, [])) for cmd in self._cmd_list
+        }
+        self._dependent_map = defaultdict(list)
+        for cmd in self._cmd_list:
+            for prerequisite in self._waiting_for[cmd]:
+                self._dependent_map[prerequisite].append(cmd)
+        self._results = {}
+        # Requests are hashed by identity, different requests may be equal.
+        # request: command owning the request, for all running requests
+        self._owner_map = {}
+        # command: running requests of the command in the order of adding
+        self._running_map = defaultdict(dict)
+
+    def start(self):
+        ready_list = [
+            cmd for cmd in self._cmd_list if not self._waiting_for[cmd]
+        ]
+        if self._cmd_list and not ready_list:
+            raise AssertionError("Circular dependency of commands")
+        request_list = []
+        for cmd in ready_list:
+            request_list.extend(self.__start_cmd(cmd))
+        # Add all the initial requests at once, as running a single command
+        # does. Empty request list is added as well to keep the behavior.
+        self._communicator.add_requests(request_list)
+
+    def on_response(self, response):
+        cmd = self.__pop_owner(response.request)
+        extra_requests = cmd.on_response(response) or []
+        request_list = []
+        if cmd.is_aborted():
+            self.__abort_cmd(cmd, extra_requests)
+        else:
+            request_list.extend(self.__register_requests(cmd, extra_requests))
+            self.__cancel_requests(cmd, cmd.get_cancelled_request_list())
+        if not self.__get_running_list(cmd):
+            request_list.extend(self.__complete_cmd(cmd))
+        if request_list:
+            self._communicator.add_requests(request_list)
+
+    def get_results(self):
+        if len(self._results) != len(self._cmd_list):
+            raise AssertionError("Circular dependency of commands")
+        return [self._results[cmd] for cmd in self._cmd_list]
+
+    def __start_cmd(self, cmd):
+        cmd.before()
+        request_list = self.__register_requests(
+            cmd, cmd.get_initial_request_list()
+        )
+        if not request_list:
+            request_list.extend(self.__complete_cmd(cmd))
+        else:
+            self.__schedule_hedging(cmd)
+        return request_list
+
+    def __complete_cmd(self, cmd):
+        self._results[cmd] = cmd.on_complete()
+        request_list = []
+        for dependent in self._dependent_map[cmd]:
+            self._waiting_for[dependent].discard(cmd)
+            if not self._waiting_for[dependent]:
+                request_list.extend(self.__start_cmd(dependent))
+        return request_list
+
+    def __abort_cmd(self, cmd, not_sent_request_list):
+        running_list = self.__get_running_list(cmd)
+        self.__cancel_requests(cmd, running_list)
+        cmd.on_abort(running_list + list(not_sent_request_list))
+
+    def __schedule_hedging(self, cmd):
+        delay = cmd.get_hedging_delay()
+        if delay is None:
+            return
+        def hedge():
+            if cmd in self._results:
+                return
+            self._communicator.add_requests(
+                self.__register_requests(cmd, cmd.get_hedged_request_list())
+            )
+            self.__schedule_hedging(cmd)
+        self._communicator.call_later(delay, hedge)
+
+    def __cancel_requests(self, cmd, request_list):
+        if not request_list:
+            return
+        for request in request_list:
+            self.__pop_owner(request, cmd)
+        self._communicator.cancel_requests(request_list)
+
+    def __register_requests(self, cmd, request_list):
+        for request in request_list:
+            self._owner_map[request] = cmd
+            self._running_map[cmd][request] = None
+        return list(request_list)
+
+    def __get_running_list(self, cmd):
+        return list(self._running_map[cmd])
+
+    def __pop_owner(self, request, cmd=None):
+        owner = self._owner_map.get(request)
+        if owner is None or (cmd is not None and owner is not cmd):
+            raise AssertionError("Unexpected request {0}".format(request))
+        del self._owner_map[request]
+        del self._running_map[owner][request]
+        return owner
+
+
 class CommunicationCommandInterface:
     """
     Interface for all communication commands.
@@ -80,6 +288,47 @@ class CommunicationCommandInterface:
         """
         raise NotImplementedError()
 
+    def get_hedging_delay(self):
+        """
+        Returns number of seconds after which get_hedged_request_list should be
+        called or None if the command does not hedge its requests.
+        """
+        # pylint: disable=no-self-use
+        return None
+
+    def get_hedged_request_list(self):
+        """
+        Returns list of Request objects duplicating work of the requests which
+        have not been answered yet.
+        """
+        # pylint: disable=no-self-use
+        return []
+
+    def get_cancelled_request_list(self):
+        """
+        Returns list of running Request objects whose responses are not needed
+        anymore. Called after each processed response.
+        """
+        # pylint: disable=no-self-use
+        return []
+
+    def is_aborted(self):
+        """
+        Returns True if no more responses are needed as the command cannot
+        succeed anyway. Called after each processed response. All running
+        requests of the command are cancelled then and on_abort is called.
+        """
+        # pylint: disable=no-self-use
+        return False
+
+    def on_abort(self, request_list):
+        """
+        Runs when the command has been aborted, before on_complete.
+
+        list request_list -- Request objects which have been cancelled or not
+            sent at all
+        """
+
 
 class RunRemotelyBase(CommunicationCommandInterface):
     """
@@ -90,6 +339,24 @@ class RunRemotelyBase(CommunicationCommandInterface):
     def __init__(self, report_processor: SimpleReportProcessorInterface):
         self.__report_processor = report_processor
         self._error_list = []
+        self.__fail_fast = False
+
+    def enable_fail_fast(self):
+        """
+        Stop waiting for responses once an error has been reported. Use it only
+        when any error means the whole operation fails. The targets whose
+        requests have been cancelled are reported.
+        """
+        self.__fail_fast = True
+
+    def is_aborted(self):
+        return self.__fail_fast and bool(self._error_list)
+
+    def on_abort(self, request_list):
+        if request_list:
+            self._report(reports.node_communication_cancelled(
+                {request.target.label for request in request_list}
+            ))
 
     def _get_response_report(self, response):
         # pylint: disable=no-self-use
@@ -169,16 +436,41 @@ class OneByOneStrategyMixin(StrategyBase):
     Communication strategy in which requests are executed one by one. So only
     one request from _prepare_initial_requests is chosen as initial request
     list. Other requests are then available by calling method _get_next_list.
+
+    Hedging may be turned on by calling _set_hedging. Then the next request is
+    sent when there is no response to the running ones after a delay. The first
+    processed response which does not ask for the next request is considered
+    to be the final one and the other running requests are cancelled.
     """
     #pylint: disable=abstract-method
     __iter = None
     __successful = False
+    __hedging_delay = None
+    __hedging_max_duplicates = 0
+    __running = None
+    __next_requested = False
+    __finished = False
+
+    def _set_hedging(self, delay, max_duplicates=1):
+        """
+        Turn on hedging of requests. Use it only for requests which do not
+        change anything, as more of them may be processed by the targets.
+
+        float delay -- seconds to wait for a response before sending the next
+            request, None turns hedging off
+        int max_duplicates -- maximal number of requests running in addition
+            to the first one
+        """
+        self.__hedging_delay = delay
+        self.__hedging_max_duplicates = max_duplicates
 
     def get_initial_request_list(self):
         """
         Returns only first request from _prepare_initial_requests.
         """
         self.__iter = iter(self._prepare_initial_requests())
+        self.__running = []
+        self.__finished = False
         return self._get_next_list()
 
     def _get_next_list(self):
@@ -187,10 +479,50 @@ class OneByOneStrategyMixin(StrategyBase):
         _prepare_initial_requests. Raises StopIteration when there is no other
         request left.
         """
+        self.__next_requested = True
         try:
-            return [next(self.__iter)]
+            request = next(self.__iter)
         except StopIteration:
             return []
+        self.__running.append(request)
+        return [request]
+
+    def on_response(self, response):
+        self.__forget_request(response.request)
+        self.__next_requested = False
+        returned = super().on_response(response)
+        if not self.__next_requested:
+            self.__finished = True
+        return returned
+
+    def get_hedging_delay(self):
+        if self.__finished:
+            return None
+        return self.__hedging_delay
+
+    def get_hedged_request_list(self):
+        if (
+            self.__hedging_delay is None
+            or
+            self.__finished
+            or
+            len(self.__running) > self.__hedging_max_duplicates
+        ):
+            return []
+        return self._get_next_list()
+
+    def __forget_request(self, request):
+        for i, running in enumerate(self.__running):
+            if running is request:
+                del self.__running[i]
+                return
+
+    def get_cancelled_request_list(self):
+        if not self.__finished:
+            return []
+        request_list = self.__running
+        self.__running = []
+        return request_list
 
 
 class AllAtOnceStrategyMixin(StrategyBase):
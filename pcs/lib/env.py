@@ -1,9 +1,15 @@
+import random
+import time
+
+from pcs import settings
 from pcs.common.node_communicator import NodeCommunicatorFactory
+from pcs.common.reports import SimpleReportProcessorInterface
 from pcs.common.tools import Version
 from pcs.lib import reports
 from pcs.lib.booth.env import BoothEnv
 from pcs.lib.cib.tools import get_cib_crm_feature_set
 from pcs.lib.node import get_existing_nodes_names
+from pcs.lib.pacemaker.cib_snapshot import SnapshotInvalidatingRunner
 from pcs.lib.pacemaker.env import PacemakerEnv
 from pcs.lib.communication import qdevice
 from pcs.lib.communication.corosync import (
@@ -11,8 +17,8 @@ from pcs.lib.communication.corosync import (
     DistributeCorosyncConf,
 )
 from pcs.lib.communication.tools import (
-    run,
     run_and_raise,
+    run_many_and_raise,
 )
 from pcs.lib.corosync.config_facade import ConfigFacade as CorosyncConfigFacade
 from pcs.lib.corosync.live import (
@@ -23,17 +29,22 @@ from pcs.lib.external import (
     is_service_running,
     CommandRunner,
 )
-from pcs.lib.errors import LibraryError
+from pcs.lib.errors import (
+    LibraryError,
+    ReportItemSeverity,
+)
 from pcs.lib.node_communication import (
     LibCommunicatorLogger,
     NodeTargetLibFactory,
 )
 from pcs.lib.pacemaker.live import (
-    diff_cibs_xml,
+    CibPatchOutdatedException,
+    diff_cibs,
     ensure_cib_version,
     ensure_wait_for_idle_support,
     get_cib,
     get_cib_xml,
+    get_cib_xml_without_status,
     get_cluster_status_xml,
     push_cib_diff_xml,
     replace_cib_configuration,
@@ -46,6 +57,42 @@ from pcs.lib.xml_tools import etree_to_str
 
 MIN_FEATURE_SET_VERSION_FOR_DIFF = Version(3, 0, 9)
 
+class _CibChangedError(Exception):
+    pass
+
+class _RepeatedWarningFilter(SimpleReportProcessorInterface):
+    """
+    Report processor passing each warning only once, so that a modification
+    of the CIB repeated on the current CIB does not report it again
+    """
+    def __init__(self, report_processor):
+        self.__report_processor = report_processor
+        self.__reported_warnings = []
+
+    def __filter(self, report_list):
+        filtered_list = []
+        for report_item in report_list:
+            if report_item.severity == ReportItemSeverity.WARNING:
+                warning = (
+                    report_item.code,
+                    report_item.info,
+                    report_item.forceable,
+                )
+                if warning in self.__reported_warnings:
+                    continue
+                self.__reported_warnings.append(warning)
+            filtered_list.append(report_item)
+        return filtered_list
+
+    def process(self, report_item):
+        self.process_list([report_item])
+
+    def process_list(self, report_item_list):
+        self.__report_processor.process_list(self.__filter(report_item_list))
+
+    def report_list(self, report_list):
+        return self.__report_processor.report_list(self.__filter(report_list))
+
 class LibraryEnvironment:
     # pylint: disable=too-many-instance-attributes, too-many-public-methods
 
@@ -60,7 +107,13 @@ class LibraryEnvironment:
         booth=None,
         known_hosts_getter=None,
         request_timeout=None,
+        debug=False,
+        cib_snapshot=None,
     ):
+        """
+        CibSnapshot cib_snapshot -- live CIB shared with other CIB readers of
+            the same pcs run, used only when the CIB is live
+        """
         # pylint: disable=too-many-arguments
         self._logger = logger
         self._report_processor = report_processor
@@ -79,17 +132,23 @@ class LibraryEnvironment:
         # postponing dealing with them, because it's not that easy to move
         # related code currently - it's in pcsd
         self._known_hosts_getter = known_hosts_getter
-        self._known_hosts = None
         self._cib_upgrade_reported = False
         self._cib_data_tmp_file = None
         self.__loaded_cib_diff_source = None
         self.__loaded_cib_diff_source_feature_set = None
         self.__loaded_cib_to_modify = None
+        # (attempt, max attempts) of a CIB push which fails if the CIB has been
+        # changed by someone else
+        self.__cib_push_attempt = None
+        self.__cib_snapshot = cib_snapshot if cib_data is None else None
         self._communicator_factory = NodeCommunicatorFactory(
             LibCommunicatorLogger(self.logger, self.report_processor),
             self.user_login,
             self.user_groups,
-            self._request_timeout
+            self._request_timeout,
+            address_stagger=settings.default_request_address_stagger,
+            # Capture communication debug info only if somebody reads it.
+            debug=debug,
         )
 
         self.__timeout_cache = {}
@@ -110,11 +169,38 @@ class LibraryEnvironment:
     def user_groups(self):
         return self._user_groups
 
-    def get_cib(self, minimal_version=None):
+    def get_cib(self, minimal_version=None, sections=None):
+        """
+        Load the CIB to be modified and pushed
+
+        Version minimal_version -- upgrade the CIB to at least this version
+        iterable sections -- top level CIB sections the caller needs
+            ("configuration", "status"), all of them if None
+        """
         if self.__loaded_cib_diff_source is not None:
             raise AssertionError("CIB has already been loaded")
-        self.__loaded_cib_diff_source = get_cib_xml(self.cmd_runner())
-        self.__loaded_cib_to_modify = get_cib(self.__loaded_cib_diff_source)
+        with_status = sections is None or "status" in sections
+        if self.__cib_snapshot is not None and (
+            with_status or self.__cib_snapshot.is_loaded
+        ):
+            load_xml = lambda: get_cib_xml(self.cmd_runner())
+            self.__loaded_cib_diff_source = self.__cib_snapshot.get_xml(
+                load_xml
+            )
+            self.__loaded_cib_to_modify = self.__cib_snapshot.get_tree_copy(
+                load_xml
+            )
+        else:
+            # The status section is usually most of the CIB and it is not
+            # needed by commands changing the configuration. Both the original
+            # and the modified CIB are without it, so their diff is correct.
+            self.__loaded_cib_diff_source = (
+                get_cib_xml(self.cmd_runner()) if with_status
+                else get_cib_xml_without_status(self.cmd_runner())
+            )
+            self.__loaded_cib_to_modify = get_cib(
+                self.__loaded_cib_diff_source
+            )
         if minimal_version is not None:
             upgraded_cib = ensure_cib_version(
                 self.cmd_runner(),
@@ -205,6 +291,67 @@ class LibraryEnvironment:
             return self.__push_cib_full(self.__loaded_cib_to_modify, wait=wait)
         return self.__push_cib_diff(wait=wait)
 
+    def modify_cib(
+        self, modify, minimal_version=None, wait=False, sections=None
+    ):
+        """
+        Load the CIB, modify it and push it. If the CIB has been changed by
+        someone else in the meantime, repeat the modification on the current
+        CIB.
+
+        callable modify -- takes the loaded CIB etree and modifies it, it is
+            called again for each attempt
+        Version minimal_version -- upgrade the CIB to at least this version
+        mixed wait -- how many seconds to wait for pacemaker to process new CIB
+            or False for not waiting at all
+        iterable sections -- top level CIB sections the modification needs,
+            see get_cib
+        """
+        max_attempts = (
+            max(1, settings.cib_push_max_attempts) if self.is_cib_live else 1
+        )
+        report_processor = self._report_processor
+        self._report_processor = _RepeatedWarningFilter(report_processor)
+        try:
+            self.__modify_cib_attempts(
+                modify, minimal_version, wait, sections, max_attempts
+            )
+        finally:
+            self._report_processor = report_processor
+
+    def __modify_cib_attempts(
+        self, modify, minimal_version, wait, sections, max_attempts
+    ):
+        # pylint: disable=too-many-arguments
+        for attempt in range(1, max_attempts + 1):
+            cib = self.get_cib(minimal_version, sections=sections)
+            if self.is_cib_live:
+                self.__cib_push_attempt = (attempt, max_attempts)
+            try:
+                modify(cib)
+                self.push_cib(wait=wait)
+                return
+            except _CibChangedError:
+                self.__drop_loaded_cib()
+                if self.__cib_snapshot is not None:
+                    self.__cib_snapshot.invalidate()
+            finally:
+                self.__cib_push_attempt = None
+            if attempt < max_attempts:
+                retry_delay = random.uniform(0.5, 1) * min(
+                    settings.cib_push_retry_delay * 2 ** (attempt - 1),
+                    settings.cib_push_retry_max_delay
+                )
+                self.report_processor.process(
+                    reports.cib_push_conflict(
+                        attempt, max_attempts, retry_delay
+                    )
+                )
+                time.sleep(retry_delay)
+        raise LibraryError(
+            reports.cib_push_conflict_attempts_exhausted(max_attempts)
+        )
+
     def __push_cib_full(self, cib_to_push, wait=False):
         cmd_runner = self.cmd_runner()
         self.__do_push_cib(
@@ -222,24 +369,42 @@ class LibraryEnvironment:
         )
 
     def __main_push_cib_diff(self, cmd_runner):
-        cib_diff_xml = diff_cibs_xml(
+        check_conflict = self.__cib_push_attempt is not None
+        if check_conflict:
+            self.report_processor.process(
+                reports.cib_push_attempt(*self.__cib_push_attempt)
+            )
+        # With the source version in the diff, pacemaker refuses to apply it
+        # if the CIB has been changed by someone else since it was loaded.
+        # Without it, the changes made by others would be silently overwritten.
+        cib_diff_xml = diff_cibs(
             cmd_runner,
             self.report_processor,
             self.__loaded_cib_diff_source,
-            etree_to_str(self.__loaded_cib_to_modify)
+            self.__loaded_cib_to_modify,
+            source_version=check_conflict,
         )
-        if cib_diff_xml:
+        if not cib_diff_xml:
+            return
+        try:
             push_cib_diff_xml(cmd_runner, cib_diff_xml)
+        except CibPatchOutdatedException:
+            if check_conflict:
+                raise _CibChangedError()
+            raise
 
     def __do_push_cib(self, cmd_runner, push_strategy, wait):
         timeout = self.get_wait_timeout(wait)
         push_strategy()
         self._cib_upgrade_reported = False
+        self.__drop_loaded_cib()
+        if self.is_cib_live and timeout is not False:
+            wait_for_idle(cmd_runner, timeout)
+
+    def __drop_loaded_cib(self):
         self.__loaded_cib_diff_source = None
         self.__loaded_cib_diff_source_feature_set = None
         self.__loaded_cib_to_modify = None
-        if self.is_cib_live and timeout is not False:
-            wait_for_idle(cmd_runner, timeout)
 
     @property
     def is_cib_live(self):
@@ -318,16 +483,25 @@ class LibraryEnvironment:
             self.report_processor.process(
                 reports.qdevice_client_reload_started()
             )
-            com_cmd = qdevice.Stop(self.report_processor, skip_offline_nodes)
-            com_cmd.set_targets(target_list)
-            run(self.get_node_communicator(), com_cmd)
-            report_list = com_cmd.error_list
-            com_cmd = qdevice.Start(self.report_processor, skip_offline_nodes)
-            com_cmd.set_targets(target_list)
-            run(self.get_node_communicator(), com_cmd)
-            report_list += com_cmd.error_list
-            if report_list:
-                raise LibraryError()
+            # Restart qdevice on each node independently, so a node does not
+            # have to wait for qdevice to be stopped on all the other nodes.
+            # Failing to stop qdevice on a node does not prevent starting it.
+            cmd_list = []
+            dependency_map = {}
+            for target in target_list:
+                stop_cmd = qdevice.Stop(
+                    self.report_processor, skip_offline_nodes
+                )
+                stop_cmd.set_targets([target])
+                start_cmd = qdevice.Start(
+                    self.report_processor, skip_offline_nodes
+                )
+                start_cmd.set_targets([target])
+                cmd_list.extend([stop_cmd, start_cmd])
+                dependency_map[start_cmd] = [stop_cmd]
+            run_many_and_raise(
+                self.get_node_communicator(), cmd_list, dependency_map
+            )
 
     @property
     def is_corosync_conf_live(self):
@@ -360,6 +534,13 @@ class LibraryEnvironment:
                     raise LibraryError(reports.cib_save_tmp_error(str(e)))
             runner_env["CIB_file"] = self._cib_data_tmp_file.name
 
+        if self.__cib_snapshot is not None:
+            return SnapshotInvalidatingRunner(
+                self.__cib_snapshot,
+                self.logger,
+                self.report_processor,
+                runner_env,
+            )
         return CommandRunner(self.logger, self.report_processor, runner_env)
 
     @property
@@ -385,12 +566,11 @@ class LibraryEnvironment:
         ]
 
     def __get_known_hosts(self):
-        if self._known_hosts is None:
-            if self._known_hosts_getter:
-                self._known_hosts = self._known_hosts_getter()
-            else:
-                self._known_hosts = {}
-        return self._known_hosts
+        # The getter is expected to cache the known hosts and to reload them
+        # only when they have changed.
+        if self._known_hosts_getter:
+            return self._known_hosts_getter()
+        return {}
 
     @property
     def booth(self):
@@ -0,0 +1,99 @@
+from copy import deepcopy
+import os.path
+
+from pcs.lib.external import CommandRunner
+from pcs.lib.pacemaker.live import get_cib
+
+# Pacemaker tools which never change the CIB. Running any other command
+# invalidates the snapshot.
+_READ_ONLY_COMMANDS = frozenset(["crm_diff", "crm_mon", "crm_verify"])
+_CIBADMIN_QUERY_OPTIONS = frozenset(["-Q", "--query"])
+
+def is_cib_read_only_command(args):
+    """
+    Check if a command only reads the CIB
+
+    list args -- the command and its arguments
+    """
+    command = os.path.basename(args[0])
+    if command == "cibadmin":
+        return bool(_CIBADMIN_QUERY_OPTIONS.intersection(args[1:]))
+    return command in _READ_ONLY_COMMANDS
+
+class CibSnapshot:
+    """
+    Live CIB loaded once and shared by all the CIB readers of one pcs run
+
+    The parsed CIB is shared by the readers, it must not be modified. Readers
+    which modify the CIB get its copy. The snapshot is dropped once pcs runs
+    a command which may change the CIB.
+    """
+    def __init__(self):
+        self.__xml = None
+        self.__tree = None
+
+    @property
+    def is_loaded(self):
+        return self.__xml is not None
+
+    def get_xml(self, load_xml):
+        """
+        Return the CIB as a string
+
+        callable load_xml -- returns the live CIB as a string
+        """
+        if self.__xml is None:
+            self.__xml = load_xml()
+        return self.__xml
+
+    def get_tree(self, load_xml):
+        """
+        Return the shared CIB tree, it must not be modified
+
+        callable load_xml -- returns the live CIB as a string
+        """
+        if self.__tree is None:
+            self.__tree = get_cib(self.get_xml(load_xml))
+        return self.__tree
+
+    def get_tree_copy(self, load_xml):
+        """
+        Return a copy of the CIB tree which can be modified
+
+        callable load_xml -- returns the live CIB as a string
+        """
+        return deepcopy(self.get_tree(load_xml))
+
+    def invalidate(self):
+        self.__xml = None
+        self.__tree = None
+
+    def command_run(self, args):
+        """
+        Drop the snapshot if a command may have changed the CIB
+
+        list args -- the command and its arguments
+        """
+        if not is_cib_read_only_command(args):
+            self.invalidate()
+
+class SnapshotInvalidatingRunner(CommandRunner):
+    """
+    CommandRunner dropping a CIB snapshot when a command may change the CIB
+    """
+    def __init__(self, cib_snapshot, logger, reporter, env_vars=None):
+        super().__init__(logger, reporter, env_vars)
+        self.__cib_snapshot = cib_snapshot
+
+    def run(
+        self, args, stdin_string=None, env_extend=None, binary_output=False
+    ):
+        try:
+            return super().run(
+                args,
+                stdin_string=stdin_string,
+                env_extend=env_extend,
+                binary_output=binary_output,
+            )
+        finally:
+            self.__cib_snapshot.command_run(args)
@@ -7,6 +7,10 @@ from pcs.common.tools import (
     xml_fromstring
 )
 from pcs.lib import reports
+from pcs.lib.cib.patchset import (
+    create_patchset,
+    set_source_version,
+)
 from pcs.lib.cib.tools import get_pacemaker_version_by_which_cib_was_validated
 from pcs.lib.errors import LibraryError
 from pcs.lib.pacemaker.state import ClusterState
@@ -16,6 +20,8 @@ from pcs.lib.xml_tools import etree_to_str
 
 __EXITCODE_WAIT_TIMEOUT = 124
 __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT = 105
+# CRM_EX_OLD, pacemaker-1.x exits with pcmk_err_old_data
+__EXITCODES_CIB_UPDATE_OLDER = (103, 205)
 __RESOURCE_REFRESH_OPERATION_COUNT_THRESHOLD = 100
 
 class CrmMonErrorException(LibraryError):
@@ -24,6 +30,9 @@ class CrmMonErrorException(LibraryError):
 class FenceHistoryCommandErrorException(Exception):
     pass
 
+class CibPatchOutdatedException(LibraryError):
+    pass
+
 ### status
 
 def get_cluster_status_xml(runner):
@@ -59,6 +68,31 @@ def get_cib_xml(runner, scope=None):
         )
     return stdout
 
+def get_cib_xml_without_status(runner):
+    """
+    Return the CIB without its status section, which is usually most of the CIB
+    """
+    # Load the root element first. If the CIB is changed in between, the root
+    # holds an older epoch than the configuration, so pacemaker refuses a diff
+    # with the source version taken from it instead of missing the change.
+    cib = _get_cib_root(runner)
+    cib.append(get_cib(get_cib_xml(runner, scope="configuration")))
+    return etree_to_str(cib)
+
+def _get_cib_root(runner):
+    stdout, stderr, retval = runner.run([
+        __exec("cibadmin"),
+        "--local",
+        "--query",
+        "--xpath", "/cib",
+        "--no-children",
+    ])
+    if retval != 0:
+        raise LibraryError(
+            reports.cib_load_error(join_multilines([stderr, stdout]))
+        )
+    return get_cib(stdout)
+
 def parse_cib_xml(xml):
     return xml_fromstring(xml)
 
@@ -109,6 +143,11 @@ def push_cib_diff_xml(runner, cib_diff_xml):
         "--xml-pipe",
     ]
     stdout, stderr, retval = runner.run(cmd, stdin_string=cib_diff_xml)
+    if retval in __EXITCODES_CIB_UPDATE_OLDER:
+        # the diff has a source version and the CIB has been changed since
+        raise CibPatchOutdatedException(
+            reports.cib_push_error(stderr, stdout)
+        )
     if retval != 0:
         raise LibraryError(reports.cib_push_error(stderr, stdout))
 
@@ -151,6 +190,35 @@ def diff_cibs_xml(runner, reporter, cib_old_xml, cib_new_xml):
         )
     return stdout.strip()
 
+def diff_cibs(
+    runner, reporter, cib_old_xml, cib_new, source_version=False
+):
+    """
+    Return xml diff of two CIBs, prefer an in-process patchset to crm_diff
+    CommandRunner runner
+    string cib_old_xml -- original CIB
+    etree cib_new -- modified CIB
+    bool source_version -- put the version of the original CIB to the diff so
+        that pushing it fails with CibPatchOutdatedException if the CIB has
+        been changed in the meantime
+    """
+    cib_old = get_cib(cib_old_xml)
+    patchset = create_patchset(cib_old, cib_new)
+    if patchset is not None:
+        if patchset.find("change") is None:
+            return ""
+    else:
+        # crm_diff can describe changes the patchset generator cannot
+        cib_diff_xml = diff_cibs_xml(
+            runner, reporter, cib_old_xml, etree_to_str(cib_new)
+        )
+        if not cib_diff_xml or not source_version:
+            return cib_diff_xml
+        patchset = xml_fromstring(cib_diff_xml)
+    if source_version:
+        set_source_version(patchset, cib_old)
+    return etree_to_str(patchset)
+
 def ensure_cib_version(runner, cib, version):
     """
     This method ensures that specified cib is verified by pacemaker with
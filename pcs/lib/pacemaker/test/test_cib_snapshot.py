@@ -0,0 +1,106 @@
+import logging
+from unittest import mock, TestCase
+
+from pcs.lib.pacemaker.cib_snapshot import (
+    CibSnapshot,
+    SnapshotInvalidatingRunner,
+    is_cib_read_only_command,
+)
+from pcs.test.tools.custom_mock import MockLibraryReportProcessor
+
+
+class IsCibReadOnlyCommand(TestCase):
+    def test_cibadmin_query(self):
+        self.assertTrue(
+            is_cib_read_only_command(["/usr/sbin/cibadmin", "-l", "-Q"])
+        )
+        self.assertTrue(
+            is_cib_read_only_command(["cibadmin", "--local", "--query"])
+        )
+
+    def test_cibadmin_write(self):
+        self.assertFalse(
+            is_cib_read_only_command(
+                ["cibadmin", "--replace", "--xml-pipe", "-o", "configuration"]
+            )
+        )
+        self.assertFalse(is_cib_read_only_command(["cibadmin", "--patch"]))
+
+    def test_read_only_tools(self):
+        self.assertTrue(
+            is_cib_read_only_command(["/usr/sbin/crm_mon", "--one-shot"])
+        )
+
+    def test_other_tools(self):
+        self.assertFalse(
+            is_cib_read_only_command(["crm_resource", "--cleanup"])
+        )
+
+
+class CibSnapshotTest(TestCase):
+    def setUp(self):
+        self.snapshot = CibSnapshot()
+        self.load_xml = mock.Mock(return_value="<cib><configuration/></cib>")
+
+    def test_load_once(self):
+        self.assertEqual(
+            "<cib><configuration/></cib>", self.snapshot.get_xml(self.load_xml)
+        )
+        tree = self.snapshot.get_tree(self.load_xml)
+        self.assertIs(tree, self.snapshot.get_tree(self.load_xml))
+        self.load_xml.assert_called_once_with()
+
+    def test_copy_is_not_shared(self):
+        tree_copy = self.snapshot.get_tree_copy(self.load_xml)
+        tree_copy.find("configuration").set("changed", "true")
+        self.assertIsNone(
+            self.snapshot.get_tree(self.load_xml)
+                .find("configuration").get("changed")
+        )
+        self.load_xml.assert_called_once_with()
+
+    def test_read_only_command_keeps_snapshot(self):
+        self.snapshot.get_xml(self.load_xml)
+        self.snapshot.command_run(["crm_mon", "--one-shot", "--as-xml"])
+        self.snapshot.get_xml(self.load_xml)
+        self.load_xml.assert_called_once_with()
+
+    def test_other_command_invalidates_snapshot(self):
+        self.snapshot.get_tree(self.load_xml)
+        self.snapshot.command_run(["cibadmin", "--patch", "--xml-pipe"])
+        self.snapshot.get_tree(self.load_xml)
+        self.assertEqual(2, self.load_xml.call_count)
+
+
+@mock.patch("pcs.lib.external.CommandRunner.run")
+class SnapshotInvalidatingRunnerTest(TestCase):
+    def setUp(self):
+        self.snapshot = mock.Mock(spec_set=CibSnapshot)
+        self.runner = SnapshotInvalidatingRunner(
+            self.snapshot,
+            mock.MagicMock(logging.Logger),
+            MockLibraryReportProcessor(),
+        )
+
+    def test_notify_snapshot(self, mock_run):
+        mock_run.return_value = ("", "", 0)
+        self.assertEqual(
+            ("", "", 0), self.runner.run(["cibadmin", "--patch"], "<diff/>")
+        )
+        mock_run.assert_called_once_with(
+            ["cibadmin", "--patch"],
+            stdin_string="<diff/>",
+            env_extend=None,
+            binary_output=False,
+        )
+        self.snapshot.command_run.assert_called_once_with(
+            ["cibadmin", "--patch"]
+        )
+
+    def test_notify_snapshot_on_error(self, mock_run):
+        mock_run.side_effect = OSError("error")
+        with self.assertRaises(OSError):
+            self.runner.run(["cibadmin", "--patch"])
+        self.snapshot.command_run.assert_called_once_with(
+            ["cibadmin", "--patch"]
+        )
@@ -576,6 +576,21 @@ def node_communication_not_connected(node, reason):
     )
 
 
+def node_communication_cancelled(node_list):
+    """
+    requests to the nodes have been cancelled or not sent at all due to
+    previous errors
+
+    iterable node_list -- names of the nodes
+    """
+    return ReportItem.warning(
+        report_codes.NODE_COMMUNICATION_CANCELLED,
+        info={
+            "node_list": sorted(node_list),
+        }
+    )
+
+
 def node_communication_no_more_addresses(node, request):
     """
     request failed and there are no more addresses to try it again
@@ -1790,6 +1805,52 @@ def cib_push_error(reason, pushed_cib):
         }
     )
 
+def cib_push_attempt(attempt, max_attempts):
+    """
+    pushing changes of the cib, the cib is checked for changes made by others
+
+    int attempt -- number of the attempt
+    int max_attempts -- number of attempts which will be made at most
+    """
+    return ReportItem.debug(
+        report_codes.CIB_PUSH_ATTEMPT,
+        info={
+            "attempt": attempt,
+            "max_attempts": max_attempts,
+        }
+    )
+
+def cib_push_conflict(attempt, max_attempts, retry_delay):
+    """
+    the cib has been changed by someone else since it was loaded, the changes
+    will be repeated on the current cib
+
+    int attempt -- number of the failed attempt
+    int max_attempts -- number of attempts which will be made at most
+    float retry_delay -- seconds to wait before the next attempt
+    """
+    return ReportItem.warning(
+        report_codes.CIB_PUSH_CONFLICT,
+        info={
+            "attempt": attempt,
+            "max_attempts": max_attempts,
+            "retry_delay": retry_delay,
+        }
+    )
+
+def cib_push_conflict_attempts_exhausted(attempts):
+    """
+    the cib has been changed by someone else during each attempt to push it
+
+    int attempts -- number of failed attempts
+    """
+    return ReportItem.error(
+        report_codes.CIB_PUSH_CONFLICT_ATTEMPTS_EXHAUSTED,
+        info={
+            "attempts": attempts,
+        }
+    )
+
 def cib_save_tmp_error(reason):
     """
     cannot save CIB into a temporary file
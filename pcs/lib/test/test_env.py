@@ -634,10 +634,7 @@ class PushCorosyncConfLiveWithQdeviceTest(PushCorosyncConfLiveBase):
                 node_labels=self.node_labels
             )
             .runner.systemctl.is_active("corosync", is_active=False)
-            .http.corosync.qdevice_client_stop(
-                node_labels=self.node_labels
-            )
-            .http.corosync.qdevice_client_start(
+            .http.corosync.qdevice_client_reload(
                 node_labels=self.node_labels
             )
         )
@@ -691,11 +688,11 @@ class PushCorosyncConfLiveWithQdeviceTest(PushCorosyncConfLiveBase):
                 node_labels=self.node_labels
             )
             .runner.systemctl.is_active("corosync", is_active=False)
-            .http.corosync.qdevice_client_stop(
-                node_labels=self.node_labels
-            )
-            .http.corosync.qdevice_client_start(
-                communication_list=[
+            .http.corosync.qdevice_client_reload(
+                stop_communication_list=[
+                    {"label": label} for label in self.node_labels
+                ],
+                start_communication_list=[
                     {
                         "label": label,
                         "output": "corosync is not running, skipping",
@@ -758,8 +755,8 @@ class PushCorosyncConfLiveWithQdeviceTest(PushCorosyncConfLiveBase):
                 node_labels=self.node_labels
             )
             .runner.systemctl.is_active("corosync", is_active=False)
-            .http.corosync.qdevice_client_stop(
-                communication_list=[
+            .http.corosync.qdevice_client_reload(
+                stop_communication_list=[
                     dict(
                         label="node-1",
                     ),
@@ -768,10 +765,8 @@ class PushCorosyncConfLiveWithQdeviceTest(PushCorosyncConfLiveBase):
                         response_code=400,
                         output="error",
                     ),
-                ]
-            )
-            .http.corosync.qdevice_client_start(
-                communication_list=[
+                ],
+                start_communication_list=[
                     dict(
                         label="node-1",
                         errno=8,
@@ -848,8 +843,8 @@ class PushCorosyncConfLiveWithQdeviceTest(PushCorosyncConfLiveBase):
                 ]
             )
             .runner.systemctl.is_active("corosync", is_active=False)
-            .http.corosync.qdevice_client_stop(
-                communication_list=[
+            .http.corosync.qdevice_client_reload(
+                stop_communication_list=[
                     dict(
                         label="node-1",
                     ),
@@ -858,10 +853,8 @@ class PushCorosyncConfLiveWithQdeviceTest(PushCorosyncConfLiveBase):
                         response_code=400,
                         output="error",
                     ),
-                ]
-            )
-            .http.corosync.qdevice_client_start(
-                communication_list=[
+                ],
+                start_communication_list=[
                     dict(
                         label="node-1",
                         errno=8,
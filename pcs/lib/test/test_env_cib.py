@@ -1,13 +1,24 @@
 from functools import partial
+import logging
 from unittest import mock, TestCase
 from lxml import etree
 
 from pcs.common import report_codes
 from pcs.common.tools import Version
+from pcs.lib import reports
 from pcs.lib.env import LibraryEnvironment
+from pcs.lib.errors import (
+    LibraryError,
+    ReportItemSeverity,
+)
+from pcs.lib.pacemaker.cib_snapshot import (
+    CibSnapshot,
+    SnapshotInvalidatingRunner,
+)
 from pcs.test.tools import fixture
 from pcs.test.tools.assertions import  assert_xml_equal
 from pcs.test.tools.command_env import get_env_tools
+from pcs.test.tools.custom_mock import MockLibraryReportProcessor
 from pcs.test.tools.misc import (
     get_test_resource as rc,
     create_setup_patch_mixin,
@@ -135,6 +146,20 @@ class GetCib(TestCase, ManageCibAssertionMixin):
         env.get_cib()
         self.assert_raises_cib_already_loaded(env.get_cib)
 
+    def test_without_status(self):
+        self.config.runner.cib.load_without_status()
+        cib = self.env_assist.get_env().get_cib(sections=["configuration"])
+        self.assertEqual("557", cib.get("epoch"))
+        self.assertIsNotNone(cib.find("configuration"))
+        self.assertIsNone(cib.find("status"))
+
+    def test_status_requested(self):
+        self.config.runner.cib.load()
+        cib = self.env_assist.get_env().get_cib(
+            sections=["configuration", "status"]
+        )
+        self.assertIsNotNone(cib.find("status"))
+
 
 class PushLoadedCib(TestCase, ManageCibAssertionMixin):
     # pylint: disable=too-many-public-methods
@@ -152,7 +177,46 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         self.cib_cannot_diff = "cib-empty-1.2.xml"
         self.env_assist, self.config = get_env_tools(test_case=self)
 
-    def config_load_and_push_diff(self):
+    @staticmethod
+    def add_resource(cib):
+        etree.SubElement(
+            cib.find("configuration/resources"),
+            "primitive",
+            {
+                "id": "R",
+                "class": "ocf",
+                "provider": "pacemaker",
+                "type": "Dummy",
+            }
+        )
+
+    @staticmethod
+    def add_comment(cib):
+        # The patchset generator does not support comments, crm_diff is used.
+        cib.find("configuration").append(etree.Comment("comment"))
+        return etree_to_str(cib)
+
+    def config_load_and_push_diff(self, **kwargs):
+        (self.config
+            .runner.cib.load(filename=self.cib_can_diff)
+            .runner.cib.push_diff(
+                **kwargs,
+                cib_diff="""
+                    <diff format="2">
+                        <change operation="create"
+                            path="/cib/configuration/resources"
+                            position="0"
+                        >
+                            <primitive id="R" class="ocf" provider="pacemaker"
+                                type="Dummy"
+                            />
+                        </change>
+                    </diff>
+                """
+            )
+        )
+
+    def config_load_and_push_crm_diff(self):
         (self.config
             .runner.cib.load(filename=self.cib_can_diff)
             .runner.cib.diff(self.tmpfile_old.name, self.tmpfile_new.name)
@@ -196,9 +260,34 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         self.config_load_and_push_diff()
         env = self.env_assist.get_env()
 
+        self.add_resource(env.get_cib())
+        env.push_cib()
+
+    def test_get_without_status_and_push(self):
+        self.config_load_and_push_diff()
+        self.config.remove("runner.cib.load")
+        self.config.runner.cib.load_without_status(
+            filename=self.cib_can_diff, before="runner.cib.push_diff"
+        )
+        env = self.env_assist.get_env()
+
+        self.add_resource(env.get_cib(sections=["configuration"]))
+        env.push_cib()
+
+    def test_get_and_push_no_change(self):
+        self.config.runner.cib.load(filename=self.cib_can_diff)
+        env = self.env_assist.get_env()
+
         env.get_cib()
         env.push_cib()
-        self.env_assist.assert_reports(self.push_reports())
+
+    def test_get_and_push_crm_diff(self):
+        self.config_load_and_push_crm_diff()
+        env = self.env_assist.get_env()
+
+        cib_new = self.add_comment(env.get_cib())
+        env.push_cib()
+        self.env_assist.assert_reports(self.push_reports(cib_new=cib_new))
 
     def test_get_and_push_cannot_diff(self):
         self.config_load_and_push()
@@ -211,18 +300,14 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
 
     def test_modified_cib_features_do_not_matter(self):
-        self.config_load_and_push_diff()
+        self.config_load_and_push_crm_diff()
         env = self.env_assist.get_env()
 
         cib = env.get_cib()
         cib.set("crm_feature_set", "3.0.8")
+        cib_new = self.add_comment(cib)
         env.push_cib()
-        self.env_assist.assert_reports(self.push_reports(
-            cib_new=self.config.calls.get("runner.cib.load").stdout.replace(
-                "3.0.9",
-                "3.0.8"
-            )
-        ))
+        self.env_assist.assert_reports(self.push_reports(cib_new=cib_new))
 
     def test_push_no_features_goes_with_full(self):
         (self.config
@@ -245,12 +330,11 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
         env = self.env_assist.get_env()
 
-        env.get_cib()
+        self.add_resource(env.get_cib())
         env.push_cib()
         # need to use lambda because env.cib is a property
         self.assert_raises_cib_not_loaded(lambda: env.cib)
         env.get_cib()
-        self.env_assist.assert_reports(self.push_reports())
 
     def test_can_get_after_push_cannot_diff(self):
         self.config_load_and_push()
@@ -278,7 +362,7 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         self.mock_write_tmpfile.side_effect = EnvironmentError("test error")
         env = self.env_assist.get_env()
 
-        env.get_cib()
+        self.add_comment(env.get_cib())
         self.env_assist.assert_raise_library_error(
             env.push_cib,
             [
@@ -302,9 +386,9 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
             )
         )
         env = self.env_assist.get_env()
-        env.get_cib()
+        cib_new = self.add_comment(env.get_cib())
         env.push_cib()
-        self.env_assist.assert_reports(self.push_reports())
+        self.env_assist.assert_reports(self.push_reports(cib_new=cib_new))
 
     def test_diff_fails(self):
         (self.config
@@ -317,7 +401,7 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
             )
         )
         env = self.env_assist.get_env()
-        env.get_cib()
+        cib_new = self.add_comment(env.get_cib())
         self.env_assist.assert_raise_library_error(
             env.push_cib,
             [
@@ -328,16 +412,12 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
             ],
             expected_in_processor=False
         )
-        self.env_assist.assert_reports(self.push_reports())
+        self.env_assist.assert_reports(self.push_reports(cib_new=cib_new))
 
     def test_push_diff_fails(self):
-        (self.config
-            .runner.cib.load(filename=self.cib_can_diff)
-            .runner.cib.diff(self.tmpfile_old.name, self.tmpfile_new.name)
-            .runner.cib.push_diff(stderr="invalid cib", returncode=1)
-        )
+        self.config_load_and_push_diff(stderr="invalid cib", returncode=1)
         env = self.env_assist.get_env()
-        env.get_cib()
+        self.add_resource(env.get_cib())
         self.env_assist.assert_raise_library_error(
             env.push_cib,
             [
@@ -348,7 +428,6 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
             ],
             expected_in_processor=False
         )
-        self.env_assist.assert_reports(self.push_reports())
 
     def test_push_fails(self):
         (self.config
@@ -381,9 +460,9 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
         env = self.env_assist.get_env()
 
-        env.get_cib()
+        cib_new = self.add_comment(env.get_cib())
         env.push_cib(wait=self.wait_timeout)
-        self.env_assist.assert_reports(self.push_reports())
+        self.env_assist.assert_reports(self.push_reports(cib_new=cib_new))
 
     def test_wait_cannot_diff(self):
         (self.config
@@ -436,6 +515,209 @@ class PushLoadedCib(TestCase, ManageCibAssertionMixin):
         )
 
 
+@mock.patch("pcs.lib.env.time.sleep")
+@mock.patch("pcs.lib.env.random.uniform", lambda low, high: high)
+@mock.patch("pcs.lib.env.settings.cib_push_max_attempts", 3)
+@mock.patch("pcs.lib.env.settings.cib_push_retry_delay", 0.5)
+@mock.patch("pcs.lib.env.settings.cib_push_retry_max_delay", 0.8)
+class ModifyCib(TestCase):
+    # pylint: disable=too-many-public-methods
+    cib_diff = """
+        <diff format="2">
+            {0}
+            <change operation="create" path="/cib/configuration/resources"
+                position="0"
+            >
+                <primitive id="R" class="ocf" provider="pacemaker"
+                    type="Dummy"
+                />
+            </change>
+        </diff>
+    """
+    source_version = """
+        <version>
+            <source admin_epoch="0" epoch="557"/>
+        </version>
+    """
+
+    def setUp(self):
+        self.env_assist, self.config = get_env_tools(test_case=self)
+        self.modify = mock.Mock(side_effect=PushLoadedCib.add_resource)
+
+    def config_attempt(self, number, returncode=0):
+        (self.config
+            .runner.cib.load(
+                name="runner.cib.load.{0}".format(number),
+                filename="cib-empty-2.0.xml",
+            )
+            .runner.cib.push_diff(
+                name="runner.cib.push_diff.{0}".format(number),
+                cib_diff=self.cib_diff.format(self.source_version),
+                stderr=(
+                    "Update was older than existing configuration"
+                    if returncode else ""
+                ),
+                returncode=returncode,
+            )
+        )
+
+    @staticmethod
+    def attempt_report(number):
+        return fixture.debug(
+            report_codes.CIB_PUSH_ATTEMPT, attempt=number, max_attempts=3
+        )
+
+    @staticmethod
+    def conflict_report(number, retry_delay):
+        return fixture.warn(
+            report_codes.CIB_PUSH_CONFLICT,
+            attempt=number,
+            max_attempts=3,
+            retry_delay=retry_delay,
+        )
+
+    def test_push_without_conflict(self, mock_sleep):
+        self.config_attempt(1)
+        self.env_assist.get_env().modify_cib(self.modify)
+        self.assertEqual(1, self.modify.call_count)
+        mock_sleep.assert_not_called()
+        self.env_assist.assert_reports([self.attempt_report(1)])
+
+    def test_repeat_modification_on_conflict(self, mock_sleep):
+        self.config_attempt(1, returncode=103)
+        # pacemaker-1.x
+        self.config_attempt(2, returncode=205)
+        self.config_attempt(3)
+        self.env_assist.get_env().modify_cib(self.modify)
+        self.assertEqual(3, self.modify.call_count)
+        self.assertEqual(
+            [mock.call(0.5), mock.call(0.8)], mock_sleep.call_args_list
+        )
+        self.env_assist.assert_reports([
+            self.attempt_report(1),
+            self.conflict_report(1, 0.5),
+            self.attempt_report(2),
+            self.conflict_report(2, 0.8),
+            self.attempt_report(3),
+        ])
+
+    def test_attempts_exhausted(self, mock_sleep):
+        for number in range(1, 4):
+            self.config_attempt(number, returncode=103)
+        self.env_assist.assert_raise_library_error(
+            lambda: self.env_assist.get_env().modify_cib(self.modify),
+            [
+                fixture.error(
+                    report_codes.CIB_PUSH_CONFLICT_ATTEMPTS_EXHAUSTED,
+                    attempts=3,
+                ),
+            ],
+            expected_in_processor=False
+        )
+        self.assertEqual(2, mock_sleep.call_count)
+        self.env_assist.assert_reports([
+            self.attempt_report(1),
+            self.conflict_report(1, 0.5),
+            self.attempt_report(2),
+            self.conflict_report(2, 0.8),
+            self.attempt_report(3),
+        ])
+
+    def test_warnings_not_repeated(self, mock_sleep):
+        self.config_attempt(1, returncode=103)
+        self.config_attempt(2)
+        env = self.env_assist.get_env()
+        def modify(cib):
+            env.report_processor.process(
+                reports.cib_alert_recipient_already_exists(
+                    "alert", "value", severity=ReportItemSeverity.WARNING
+                )
+            )
+            PushLoadedCib.add_resource(cib)
+        env.modify_cib(modify)
+        self.assertEqual(1, mock_sleep.call_count)
+        self.env_assist.assert_reports([
+            fixture.warn(
+                report_codes.CIB_ALERT_RECIPIENT_ALREADY_EXISTS,
+                alert="alert",
+                recipient="value",
+            ),
+            self.attempt_report(1),
+            self.conflict_report(1, 0.5),
+            self.attempt_report(2),
+        ])
+
+    def test_push_error_is_not_repeated(self, mock_sleep):
+        (self.config
+            .runner.cib.load(filename="cib-empty-2.0.xml")
+            .runner.cib.push_diff(
+                cib_diff=self.cib_diff.format(self.source_version),
+                stderr="invalid cib",
+                returncode=1,
+            )
+        )
+        self.env_assist.assert_raise_library_error(
+            lambda: self.env_assist.get_env().modify_cib(self.modify),
+            [
+                fixture.error(
+                    report_codes.CIB_PUSH_ERROR,
+                    reason="invalid cib",
+                    pushed_cib="",
+                ),
+            ],
+            expected_in_processor=False
+        )
+        self.assertEqual(1, self.modify.call_count)
+        mock_sleep.assert_not_called()
+        self.env_assist.assert_reports([self.attempt_report(1)])
+
+    @mock.patch("pcs.lib.pacemaker.live.write_tmpfile")
+    def test_crm_diff_with_source_version(self, mock_write_tmpfile, _):
+        tmpfile_old = mock_tmpfile("old.cib")
+        tmpfile_new = mock_tmpfile("new.cib")
+        mock_write_tmpfile.side_effect = [tmpfile_old, tmpfile_new]
+        create_resource = self.cib_diff.format("")
+        (self.config
+            .runner.cib.load(filename="cib-empty-2.0.xml")
+            .runner.cib.diff(
+                tmpfile_old.name, tmpfile_new.name, stdout=create_resource
+            )
+            .runner.cib.push_diff(
+                cib_diff=self.cib_diff.format(self.source_version)
+            )
+        )
+        def modify(cib):
+            # The patchset generator does not support comments, crm_diff is
+            # used.
+            cib.find("configuration").append(etree.Comment("comment"))
+        self.env_assist.get_env().modify_cib(modify)
+        self.env_assist.assert_reports([
+            fixture.debug(report_codes.TMP_FILE_WRITE),
+            fixture.debug(report_codes.TMP_FILE_WRITE),
+            self.attempt_report(1),
+        ])
+
+    def test_modification_error_is_not_repeated(self, mock_sleep):
+        self.config.runner.cib.load(filename="cib-empty-2.0.xml")
+        self.modify.side_effect = LibraryError()
+        with self.assertRaises(LibraryError):
+            self.env_assist.get_env().modify_cib(self.modify)
+        self.assertEqual(1, self.modify.call_count)
+        mock_sleep.assert_not_called()
+
+    def test_no_conflict_check_for_mocked_cib(self, mock_sleep):
+        self.config.env.set_cib_data(
+            open(rc("cib-empty-2.0.xml")).read()
+        )
+        (self.config
+            .runner.cib.load(filename="cib-empty-2.0.xml")
+            .runner.cib.push_diff(cib_diff=self.cib_diff.format(""))
+        )
+        self.env_assist.get_env().modify_cib(self.modify)
+        self.assertEqual(1, self.modify.call_count)
+        mock_sleep.assert_not_called()
+
+
 class PushCustomCib(TestCase, ManageCibAssertionMixin):
     custom_cib = "<custom_cib />"
     wait_timeout = 10
@@ -518,3 +800,41 @@ class PushCibMockedWithWait(TestCase):
             ],
             expected_in_processor=False
         )
+
+
+@mock.patch("pcs.lib.env.get_cib_xml")
+class GetCibFromSnapshot(TestCase):
+    def setUp(self):
+        self.snapshot = CibSnapshot()
+        self.cib_xml = "<cib><configuration><resources/></configuration></cib>"
+
+    def get_env(self, cib_data=None):
+        return LibraryEnvironment(
+            mock.MagicMock(logging.Logger),
+            MockLibraryReportProcessor(),
+            cib_data=cib_data,
+            cib_snapshot=self.snapshot,
+        )
+
+    def test_cib_loaded_once(self, mock_get_cib_xml):
+        mock_get_cib_xml.return_value = self.cib_xml
+        cib1 = self.get_env().get_cib()
+        cib1.find(".//resources").set("changed", "true")
+        cib2 = self.get_env().get_cib()
+        self.assertIsNone(cib2.find(".//resources").get("changed"))
+        mock_get_cib_xml.assert_called_once_with(mock.ANY)
+
+    def test_snapshot_not_used_for_mocked_cib(self, mock_get_cib_xml):
+        mock_get_cib_xml.return_value = self.cib_xml
+        self.get_env().get_cib()
+        self.get_env(cib_data="<cib/>").get_cib()
+        self.assertEqual(2, mock_get_cib_xml.call_count)
+
+    def test_runner_invalidates_snapshot(self, mock_get_cib_xml):
+        mock_get_cib_xml.return_value = self.cib_xml
+        env = self.get_env()
+        self.assertIsInstance(env.cmd_runner(), SnapshotInvalidatingRunner)
+        env.get_cib()
+        self.snapshot.command_run(["cibadmin", "--patch"])
+        self.get_env().get_cib()
+        self.assertEqual(2, mock_get_cib_xml.call_count)
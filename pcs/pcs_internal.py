@@ -42,6 +42,7 @@ def get_cli_env(options):
     # we get all the messages the processor got. So the value of the parameter
     # does not matter.
     env.report_processor = LibraryReportProcessor(True)
+    env.debug = True
     env.request_timeout = (
         options.get("request_timeout") or settings.default_request_timeout
     )
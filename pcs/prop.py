@@ -55,7 +55,7 @@ def set_property(lib, argv, modifiers):
     if failed:
         sys.exit(1)
 
-    cib_dom = utils.get_cib_dom()
+    cib_dom = utils.get_cib_dom(utils.get_cib(scope="configuration"))
     for prop, value in properties.items():
         utils.set_cib_property(prop, value, cib_dom)
     utils.replace_cib_configuration(cib_dom)
@@ -72,7 +72,7 @@ def unset_property(lib, argv, modifiers):
     if not argv:
         raise CmdLineInputError()
 
-    cib_dom = utils.get_cib_dom()
+    cib_dom = utils.get_cib_dom(utils.get_cib(scope="configuration"))
     for arg in argv:
         utils.set_cib_property(arg, "", cib_dom)
     utils.replace_cib_configuration(cib_dom)
@@ -42,6 +42,12 @@ pcsd_cert_location = "/var/lib/pcsd/pcsd.crt"
 pcsd_key_location = "/var/lib/pcsd/pcsd.key"
 pcsd_users_conf_location = "/var/lib/pcsd/pcs_users.conf"
 pcsd_settings_conf_location = "/var/lib/pcsd/pcs_settings.conf"
+pcsd_known_hosts_location = "/var/lib/pcsd/known-hosts"
+pcsd_sessions_db_location = "/var/lib/pcsd/pcsd-sessions.db"
+pcsd_sync_config_lock_location = "/var/lib/pcsd/pcsd-sync-config.lock"
+pcsd_sync_config_peers_location = "/var/lib/pcsd/pcsd-sync-config-peers.json"
+# known-hosts file of non-root users
+pcs_known_hosts_user_location = "~/.pcs/known-hosts"
 pcsd_exec_location = "/usr/lib/pcsd/"
 pcsd_log_location = "/var/log/pcsd/pcsd.log"
 pcsd_default_port = 2224
@@ -60,6 +66,23 @@ pacemaker_wait_timeout_status = 124
 booth_config_dir = "/etc/booth"
 booth_binary = "/usr/sbin/booth"
 default_request_timeout = 60
+# Maximal number of requests to other nodes running at the same time and
+# maximal number of such requests running against one address at the same time.
+# Other requests wait in a queue. Zero means no limit.
+default_request_max_in_flight = 64
+default_request_max_in_flight_per_host = 8
+# When a node has more addresses, try the next one in parallel if there is no
+# connection via the previous one after this number of seconds. Used only for
+# requests which are safe to be processed more than once by a node.
+default_request_address_stagger = 1
+# When debugging is on, keep only this number of last bytes of debug output of
+# each request to other nodes. Zero means no limit.
+default_request_debug_max_size = 1024 * 1024
+# Read-only requests sent to nodes one by one are sent to the next node as well
+# if there is no response after this number of seconds. At most this number of
+# such duplicate requests run at the same time.
+default_request_hedge_delay = 2
+default_request_hedge_max_duplicates = 1
 pcs_bundled_dir = "/usr/lib/pcs/bundled/"
 pcs_bundled_pacakges_dir = os.path.join(pcs_bundled_dir, "packages")
 
@@ -83,5 +106,52 @@ default_ssl_options = ",".join([
 # not exists.
 pcsd_gem_path = "vendor/bundle/ruby"
 ruby_executable = "/usr/bin/ruby"
+# Number of long-lived ruby processes handling pcsd requests. Zero means that
+# a new ruby process is started for each request.
+pcsd_ruby_workers = 4
+# A ruby worker is restarted after handling this number of requests.
+pcsd_ruby_worker_max_requests = 100
+# Maximal number of extra ruby processes handling remote requests with streamed
+# bodies when all the long-lived ruby processes are busy. Requests over the
+# limit are refused.
+pcsd_ruby_overflow_workers = 8
+# Maximal size of a request body in bytes. Bodies of remote requests are
+# streamed to ruby, so they are not held in memory as a whole.
+pcsd_max_body_size = 100 * 1024 * 1024
+# Maximal time in seconds to receive a request body.
+pcsd_body_timeout = 300
+# Number of processes serving pcsd requests. Zero means that requests are
+# served by the main pcsd process. Otherwise the main process only starts the
+# workers and synchronizes the configuration.
+pcsd_workers = 0
+# Synchronization of config files starts this number of seconds after a synced
+# file has been changed locally, so more changes are sent to the nodes at once.
+pcsd_config_sync_trigger_delay = 2
 
 gui_session_lifetime_seconds = 60 * 60
+# Web UI sessions are kept in the pcsd process ("memory") or in
+# pcsd_sessions_db_location ("file") where they survive a restart of pcsd.
+# Sessions are always kept in the file when pcsd runs more workers.
+pcsd_session_storage = "memory"
+# Expired web UI sessions are dropped every this number of seconds.
+pcsd_session_sweep_interval = 60
+# Number of long-lived processes authenticating users via PAM.
+pcsd_auth_process_pool_size = 4
+# Groups of users are cached for this number of seconds. The cache is dropped
+# when /etc/group or /etc/passwd changes.
+pcsd_user_groups_cache_ttl = 30
+# Responses of status requests polled by the GUI and other nodes are kept for
+# this number of seconds and shared by all requests of the same user. Identical
+# requests running at the same time are handled only once. Zero disables
+# caching of the request.
+pcsd_cache_ttl_clusters_overview = 2
+pcsd_cache_ttl_cluster_status = 2
+pcsd_cache_ttl_remote_status = 2
+pcsd_cache_ttl_remote_cluster_status = 2
+# Commands which support it repeat their changes on the current CIB when the CIB
+# has been changed by someone else since they loaded it. They make up to this
+# number of attempts and wait for a random time between them. The waiting time
+# grows from the retry delay up to the max retry delay (in seconds).
+cib_push_max_attempts = 5
+cib_push_retry_delay = 0.2
+cib_push_retry_max_delay = 3
@@ -0,0 +1,137 @@
+import shutil
+from tempfile import NamedTemporaryFile
+from unittest import mock, TestCase
+
+from pcs.batch import load_commands
+from pcs.test.tools.assertions import AssertPcsMixin
+from pcs.test.tools.misc import get_test_resource as rc
+from pcs.test.tools.pcs_runner import PcsRunner
+
+
+empty_cib = rc("cib-empty.xml")
+temp_cib = rc("temp-cib.xml")
+
+def write_batch(content):
+    batch_file = NamedTemporaryFile(mode="w", suffix=".pcs")
+    batch_file.write(content)
+    batch_file.flush()
+    return batch_file
+
+
+def load(content):
+    with write_batch(content) as batch_file:
+        return load_commands(batch_file.name)
+
+
+class LoadCommands(TestCase):
+    def assert_error(self, content, message):
+        with mock.patch("pcs.utils.sys.stderr") as mock_stderr:
+            with self.assertRaises(SystemExit):
+                load(content)
+        mock_stderr.write.assert_called_once_with(
+            "Error: {0}\n".format(message)
+        )
+
+    def test_commands(self):
+        self.assertEqual(
+            [
+                (2, ["acl", "enable"]),
+                (4, ["resource", "update", "R", "description=a b"]),
+                (5, ["--force", "constraint", "delete", "C"]),
+            ],
+            load(
+                "# create the resource\n"
+                "acl enable\n"
+                "\n"
+                "pcs resource update R 'description=a b' # comment\n"
+                "--force constraint delete C\n"
+            )
+        )
+
+    def test_unsupported_command(self):
+        self.assert_error(
+            "resource enable R\ncluster stop --all\n",
+            "Command on line 2 cannot be used in a batch: 'cluster stop "
+            "--all', supported commands are acl, alert, constraint, property, "
+            "resource, stonith"
+        )
+
+    def test_live_cluster_subcommand(self):
+        for command in (
+            "resource cleanup R",
+            "resource move R node1",
+            "stonith fence node1",
+            "stonith sbd disable",
+            "resource delete R",
+            "stonith remove S",
+            "acl",
+        ):
+            with self.subTest(command=command):
+                self.assert_error(
+                    command,
+                    "Command on line 1 cannot be used in a batch: '{0}', only "
+                    "commands changing the CIB are supported".format(command)
+                )
+
+    def test_nested_subcommand(self):
+        self.assertEqual(
+            [(1, ["resource", "group", "add", "G", "R"])],
+            load("resource group add G R\n")
+        )
+
+    def test_wait(self):
+        self.assert_error(
+            "resource enable R --wait=10\n",
+            "Command on line 1 cannot be used in a batch: 'resource enable R "
+            "--wait=10', use --wait of the batch to wait for the changes"
+        )
+
+    def test_unparsable_line(self):
+        self.assert_error(
+            "resource update R 'description=a\n",
+            "Unable to parse line 1: No closing quotation"
+        )
+
+    def test_missing_file(self):
+        with self.assertRaises(SystemExit):
+            load_commands(rc("batch-does-not-exist.pcs"))
+
+
+class Batch(TestCase, AssertPcsMixin):
+    def setUp(self):
+        shutil.copy(empty_cib, temp_cib)
+        self.pcs_runner = PcsRunner(temp_cib)
+
+    def test_success(self):
+        with write_batch(
+            "acl enable\npcs acl role create role1 read xpath /xpath1/\n"
+        ) as batch_file:
+            self.assert_pcs_success("batch {0}".format(batch_file.name))
+        self.assert_pcs_success(
+            "acl",
+            "ACLs are enabled\n"
+            "\n"
+            "Role: role1\n"
+            "  Permission: read xpath /xpath1/ (role1-read)\n"
+        )
+
+    def test_nothing_changed_on_error(self):
+        with write_batch(
+            "acl enable\nacl role create role1\nacl role create role1\n"
+        ) as batch_file:
+            self.assert_pcs_fail(
+                "batch {0}".format(batch_file.name),
+                "Error: 'role1' already exists\n"
+                "Error: Command on line 3 failed: 'acl role create role1', no "
+                "changes have been made\n"
+            )
+        self.assert_pcs_success(
+            "acl", "ACLs are disabled, run 'pcs acl enable' to enable\n\n"
+        )
+
+    def test_wait_not_supported_with_file(self):
+        with write_batch("acl enable\n") as batch_file:
+            self.assert_pcs_fail(
+                "batch {0} --wait".format(batch_file.name),
+                "Error: Cannot use '-f' together with '--wait'\n"
+            )
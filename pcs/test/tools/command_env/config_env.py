@@ -1,8 +1,11 @@
+from lxml import etree
+
 from pcs.test.tools.command_env.mock_push_cib import Call as PushCibCall
 from pcs.test.tools.command_env.mock_push_corosync_conf import (
     Call as PushCorosyncConfCall,
 )
 from pcs.test.tools.fixture_cib import modify_cib
+from pcs.test.tools.xml import etree_to_str
 
 from pcs import settings
 from pcs.common.host import PcsKnownHost, Destination
@@ -103,7 +106,7 @@ class EnvConfig:
             here)
         """
         cib_xml = modify_cib(
-            self.__calls.get(load_key).stdout,
+            self.__get_loaded_cib(load_key),
             modifiers,
             **modifier_shortcuts
         )
@@ -113,6 +116,17 @@ class EnvConfig:
             instead=instead
         )
 
+    def __get_loaded_cib(self, load_key):
+        cib_xml = self.__calls.get(load_key).stdout
+        configuration = etree.fromstring(cib_xml)
+        if configuration.tag != "configuration":
+            return cib_xml
+        # cib has been loaded without its status, see
+        # runner.cib.load_without_status
+        cib = etree.fromstring(self.__calls.get(load_key + ".root").stdout)
+        cib.append(configuration)
+        return etree_to_str(cib)
+
     def push_cib_custom(
         self, name="env.push_cib_custom", custom_cib=None, wait=False,
         exception=None, instead=None
@@ -2,7 +2,8 @@ import base64
 import json
 
 from pcs.test.tools.command_env.mock_node_communicator import (
-    place_multinode_call
+    place_communication,
+    place_multinode_call,
 )
 
 class CorosyncShortcuts:
@@ -144,6 +145,54 @@ class CorosyncShortcuts:
             output="corosync-qdevice stopped",
         )
 
+    def qdevice_client_reload(
+        self, name="http.corosync.qdevice_client_reload",
+        node_labels=None, stop_communication_list=None,
+        start_communication_list=None
+    ):
+        """
+        Create calls for restarting qdevice service on each node independently
+
+        Qdevice is stopped on all nodes at once. It is started on a node as soon
+        as it has been stopped there.
+
+        string name -- the key of this call
+        list node_labels -- create success responses from these nodes
+        list stop_communication_list -- create custom stop responses
+        list start_communication_list -- create custom start responses, in the
+            same order of nodes as stop_communication_list
+        """
+        if node_labels is not None:
+            stop_communication_list = [{"label": l} for l in node_labels]
+            start_communication_list = [{"label": l} for l in node_labels]
+        stop_communication_list = [
+            dict(
+                dict(
+                    action="remote/qdevice_client_stop",
+                    output="corosync-qdevice stopped",
+                ),
+                **communication
+            )
+            for communication in stop_communication_list
+        ]
+        start_communication_list = [
+            dict(
+                dict(
+                    action="remote/qdevice_client_start",
+                    output="corosync-qdevice started",
+                ),
+                **communication
+            )
+            for communication in start_communication_list
+        ]
+        place_communication(
+            self.__calls,
+            name,
+            [stop_communication_list] + [
+                [communication] for communication in start_communication_list
+            ],
+        )
+
     def qdevice_net_get_ca_cert(
         self, ca_cert=b"ca_cert", node_labels=None, communication_list=None,
         name="http.corosync.qdevice_net_get_ca_cert",
@@ -1,9 +1,12 @@
+from lxml import etree
+
 from pcs.test.tools.command_env.mock_runner import(
     Call as RunnerCall,
     create_check_stdin_xml,
 )
 from pcs.test.tools.fixture_cib import modify_cib
 from pcs.test.tools.misc import get_test_resource as rc
+from pcs.test.tools.xml import etree_to_str
 
 
 CIB_FILENAME = "cib-empty.xml"
@@ -73,6 +76,47 @@ class CibShortcuts:
 
         self.__calls.place(name, call, before=before, instead=instead)
 
+    def load_without_status(
+        self,
+        modifiers=None,
+        name="runner.cib.load",
+        filename=None,
+        before=None,
+        **modifier_shortcuts
+    ):
+        """
+        Create calls for loading cib without its status section: the root
+        element is loaded by the call name + ".root" and then the configuration
+        section is loaded by the call name.
+
+        Parameters are the same as in the method load.
+        """
+        cib = etree.fromstring(modify_cib(
+            open(rc(filename if filename else self.cib_filename)).read(),
+            modifiers,
+            **modifier_shortcuts
+        ))
+        configuration = cib.find("configuration")
+        for child in list(cib):
+            cib.remove(child)
+        cib.text = None
+        self.__calls.place(
+            name + ".root",
+            RunnerCall(
+                "cibadmin --local --query --xpath /cib --no-children",
+                stdout=etree_to_str(cib),
+            ),
+            before=before,
+        )
+        self.__calls.place(
+            name,
+            RunnerCall(
+                "cibadmin --local --query --scope=configuration",
+                stdout=etree_to_str(configuration),
+            ),
+            before=before,
+        )
+
     def load_content(
         self,
         cib,
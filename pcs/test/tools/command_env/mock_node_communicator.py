@@ -321,6 +321,9 @@ def _compare_request_data(expected, real):
 class NodeCommunicator:
     def __init__(self, call_queue=None):
         self.__call_queue = call_queue
+        self.__cancelled_list = []
+        # expected request: real request added by the tested code
+        self.__real_request_map = {}
 
     def add_requests(self, request_list):
         _, add_request_call = self.__call_queue.take(
@@ -375,7 +378,48 @@ class NodeCommunicator:
                 bad_request_list_content(errors)
             )
 
+        for expected_request, real_request in zip(
+            expected_request_list, request_list
+        ):
+            self.__real_request_map[expected_request] = real_request
 
     def start_loop(self):
         _, call = self.__call_queue.take(CALL_TYPE_HTTP_START_LOOP)
-        return call.response_list
+        for response in call.response_list:
+            # Make the response reference the request added by the tested
+            # code as a real communicator does.
+            real_request = self.__pop_real_request(response.request)
+            if real_request is not None:
+                response.handle.request_obj = real_request
+            # Skip responses of cancelled requests.
+            cancelled = [
+                request for request in self.__cancelled_list
+                if request is response.request
+            ]
+            if cancelled:
+                self.__cancelled_list.remove(cancelled[0])
+                continue
+            yield response
+
+    def __pop_real_request(self, expected_request):
+        if expected_request in self.__real_request_map:
+            return self.__real_request_map.pop(expected_request)
+        # Tests may replace responses of a call by new ones, their requests
+        # are then found by content.
+        for request in self.__real_request_map:
+            if (
+                request.action == expected_request.action
+                and
+                request.target.label == expected_request.target.label
+                and
+                request.data == expected_request.data
+            ):
+                return self.__real_request_map.pop(request)
+        return None
+
+    def call_later(self, delay, callback):
+        # All responses are known in advance, there is no time to wait for.
+        pass
+
+    def cancel_requests(self, request_list):
+        self.__cancelled_list.extend(request_list)
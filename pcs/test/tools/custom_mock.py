@@ -65,6 +65,7 @@ class MockLibraryReportProcessor(LibraryReportProcessorToConsole):
 
 
 class MockCurl:
+    # pylint: disable=too-many-instance-attributes
     def __init__(
             self, info=None, output=b"", debug_output_list=None, exception=None,
             error=None, request=None
@@ -214,3 +215,29 @@ class MockCurlMulti:
                 err_list.append((handle, errno, msg))
             self._proccessed_list.append(handle)
         return (0, ok_list, err_list)
+
+
+class MockCurlMultiSocket(MockCurlMulti):
+    """
+    CurlMulti driven by socket_action and callbacks as in the async mode
+    """
+    def add_handle(self, handle):
+        super().add_handle(handle)
+        self.__call_timer()
+
+    def perform(self):
+        raise AssertionError("perform must not be used with socket_action")
+
+    def select(self, timeout=1):
+        raise AssertionError("select must not be used with socket_action")
+
+    def socket_action(self, sock_fd, ev_bitmask):
+        # pylint: disable=unused-argument
+        if self._handle_list:
+            # pretend there is still some work to do
+            self.__call_timer()
+        return (0, len(self._handle_list))
+
+    def __call_timer(self):
+        if pycurl.M_TIMERFUNCTION in self._opts:
+            self._opts[pycurl.M_TIMERFUNCTION](0)
@@ -22,6 +22,7 @@ def full_usage():
     out += strip_extras(host([], False))
     out += strip_extras(alert([], False))
     out += strip_extras(client([], False))
+    out += strip_extras(batch([], False))
     print(out.strip())
     print("Examples:\n" + examples.replace(r" \ ", ""))
 
@@ -124,6 +125,7 @@ def generate_completion_tree_from_usage():
     tree["alert"] = generate_tree(alert([], False))
     tree["booth"] = generate_tree(booth([], False))
     tree["client"] = generate_tree(client([], False))
+    tree["batch"] = generate_tree(batch([], False))
     return tree
 
 def generate_tree(usage_txt):
@@ -188,6 +190,7 @@ Commands:
     node        Manage cluster nodes.
     alert       Manage pacemaker alerts.
     client      Manage pcsd client configuration.
+    batch       Run pcs commands as one change of the CIB.
 """
 # Advanced usage to possibly add later
 #  --corosync_conf=<corosync file> Specify alternative corosync.conf file
@@ -1952,10 +1955,42 @@ Commands:
     return output
 
 
+def batch(args=(), pout=True):
+    output = """
+Usage: pcs batch <file>|-
+Run pcs commands as one change of the CIB.
+
+Commands:
+    <file>|- [--wait[=n]]
+        Read pcs commands from the specified file, or from stdin if '-' is
+        specified, one command per line. Lines starting with '#' are ignored.
+        The commands are run against one copy of the CIB and all their
+        changes are pushed to the cluster at once when all of them succeed.
+        If any of the commands fails, no changes are pushed. Only acl, alert,
+        constraint, property, resource and stonith commands changing the CIB
+        are allowed, commands working with the live cluster (e.g. resource
+        cleanup, stonith fence, resource delete and stonith delete, which stop
+        the resources first) and their --wait option are not. If --wait is
+        specified, pcs will wait up to 'n' seconds for the changes to take
+        effect and then return 0 if the changes have been processed or 1
+        otherwise. If 'n' is not specified it defaults to 60 minutes.
+
+Examples:
+    pcs batch web-server.pcs --wait
+      Run the commands from 'web-server.pcs', push their changes at once and
+      wait for the cluster to apply them.
+"""
+    if pout:
+        print(sub_usage(args, output))
+        return None
+    return output
+
+
 def show(main_usage_name, rest_usage_names):
     usage_map = {
         "acl": acl,
         "alert": alert,
+        "batch": batch,
         "booth": booth,
         "client": client,
         "cluster": cluster,
@@ -25,7 +25,11 @@ from pcs.common import (
     pcs_pycurl as pycurl,
     report_codes,
 )
-from pcs.common.host import PcsKnownHost
+from pcs.common.known_hosts import (
+    get_known_hosts_file,
+    KnownHostsParseError,
+)
+from pcs.common.node_communicator import enable_debug_capture
 from pcs.common.tools import join_multilines
 
 from pcs.cli.common import (
@@ -58,6 +62,7 @@ from pcs.lib.external import (
 )
 import pcs.lib.corosync.config_parser as corosync_conf_parser
 from pcs.lib.corosync.config_facade import ConfigFacade as corosync_conf_facade
+from pcs.lib.pacemaker.cib_snapshot import CibSnapshot
 from pcs.lib.pacemaker.live import has_wait_for_idle_support
 from pcs.lib.pacemaker.state import ClusterState
 from pcs.lib.pacemaker.values import(
@@ -78,6 +83,9 @@ from pcs.lib.pacemaker.values import(
 usefile = False
 filename = ""
 pcs_options = {}
+# The live CIB is loaded once and shared by utils and library commands until
+# pcs runs a command which may change it.
+_cib_snapshot = CibSnapshot()
 
 
 class UnknownPropertyException(Exception):
@@ -272,30 +280,15 @@ def remove_uid_gid_file(uid, gid):
 
     return file_removed
 
-@lru_cache()
 def read_known_hosts_file():
     """
     Commandline options: no options
     """
-    output, retval = run_pcsdcli("read_known_hosts")
-    data = {}
-    if (
-        retval == 0
-        and
-        output['status'] == 'ok'
-        and
-        output['data']
-        and
-        output['data'].get('known_hosts')
-    ):
-        try:
-            data = {
-                name: PcsKnownHost.from_known_host_file_dict(name, host)
-                for name, host in output['data']['known_hosts'].items()
-            }
-        except KeyError:
-            print("Warning: Unable to parse known host file.")
-    return data
+    try:
+        return get_known_hosts_file().get_known_hosts()
+    except KnownHostsParseError:
+        print("Warning: Unable to parse known host file.")
+        return {}
 
 def repeat_if_timeout(send_http_request_function, repeat_count=15):
     """
@@ -482,23 +475,7 @@ def sendHTTPRequest(
         print("Sending HTTP Request to: " + url)
         print("Data: {0}".format(data))
 
-    def __debug_callback(data_type, debug_data):
-        prefixes = {
-            # pylint: disable=no-member
-            pycurl.DEBUG_TEXT: b"* ",
-            pycurl.DEBUG_HEADER_IN: b"< ",
-            pycurl.DEBUG_HEADER_OUT: b"> ",
-            pycurl.DEBUG_DATA_IN: b"<< ",
-            pycurl.DEBUG_DATA_OUT: b">> ",
-        }
-        if data_type in prefixes:
-            debug_output.write(prefixes[data_type])
-            debug_output.write(debug_data)
-            if not debug_data.endswith(b"\n"):
-                debug_output.write(b"\n")
-
     output = BytesIO()
-    debug_output = BytesIO()
     cookies = __get_cookie_list(token)
     if not timeout:
         timeout = settings.default_request_timeout
@@ -508,9 +485,9 @@ def sendHTTPRequest(
     handler.setopt(pycurl.PROTOCOLS, pycurl.PROTO_HTTPS)
     handler.setopt(pycurl.URL, url.encode("utf-8"))
     handler.setopt(pycurl.WRITEFUNCTION, output.write)
-    handler.setopt(pycurl.VERBOSE, 1)
     handler.setopt(pycurl.NOSIGNAL, 1) # required for multi-threading
-    handler.setopt(pycurl.DEBUGFUNCTION, __debug_callback)
+    if "--debug" in pcs_options:
+        enable_debug_capture(handler)
     handler.setopt(pycurl.TIMEOUT_MS, int(timeout * 1000))
     handler.setopt(pycurl.SSL_VERIFYHOST, 0)
     handler.setopt(pycurl.SSL_VERIFYPEER, 0)
@@ -531,7 +508,7 @@ def sendHTTPRequest(
             print("--Debug Response End--")
             print("Communication debug info for calling: {0}".format(url))
             print("--Debug Communication Output Start--")
-            print(debug_output.getvalue().decode("utf-8", "ignore"))
+            print(handler.debug_buffer.getvalue().decode("utf-8", "ignore"))
             print("--Debug Communication Output End--")
             print()
 
@@ -789,6 +766,7 @@ def run(
         )
         output, dummy_stderror = p.communicate(string_for_stdin)
         returnVal = p.returncode
+        _cib_snapshot.command_run(args)
         if "--debug" in pcs_options:
             print("Return Value: {0}".format(returnVal))
             print(("--Debug Output Start--\n{0}".format(output)).rstrip())
@@ -1505,6 +1483,15 @@ def get_cib_xpath(xpath_query):
     return output
 
 def get_cib(scope=None):
+    """
+    Commandline options:
+      * -f - CIB file
+    """
+    if not usefile and not scope:
+        return _cib_snapshot.get_xml(_load_cib)
+    return _load_cib(scope)
+
+def _load_cib(scope=None):
     """
     Commandline options:
       * -f - CIB file
@@ -2566,6 +2553,7 @@ def get_lib_env():
       * -f - CIB file
       * --corosync_conf - corosync.conf file
       * --request-timeout - timeout of HTTP requests
+      * --debug - capture communication debug info
     """
     user = None
     groups = None
@@ -2599,6 +2587,8 @@ def get_lib_env():
         corosync_conf_data,
         known_hosts_getter=read_known_hosts_file,
         request_timeout=pcs_options.get("--request-timeout"),
+        debug="--debug" in pcs_options,
+        cib_snapshot=_cib_snapshot,
     )
 
 def get_cib_user_groups():
@@ -2628,6 +2618,8 @@ def get_cli_env():
     env.known_hosts_getter = read_known_hosts_file
     env.report_processor = get_report_processor()
     env.request_timeout = pcs_options.get("--request-timeout")
+    env.debug = "--debug" in pcs_options
+    env.cib_snapshot = _cib_snapshot
     return env
 
 def get_middleware_factory():
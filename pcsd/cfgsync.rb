@@ -569,12 +569,30 @@ module Cfgsync
       node_configs, node_connected = self.get_configs_cluster(
         @nodes, @cluster_name
       )
+      @node_configs = node_configs
       filtered_configs = self.filter_configs_cluster(
         node_configs, @config_classes
       )
       return filtered_configs, node_connected
     end
 
+    # Return the nodes which responded in the last fetch and which do not have
+    # the same version and content of the config.
+    def nodes_with_different_config(cfg)
+      nodes = []
+      (@node_configs || {}).each { |node, cfg_map|
+        node_cfg = cfg_map[cfg.class.name]
+        if (
+          node_cfg.nil? or
+          node_cfg.version != cfg.version or
+          node_cfg.hash != cfg.hash
+        )
+          nodes << node
+        end
+      }
+      return nodes
+    end
+
     def fetch()
       configs_cluster, node_connected = self.fetch_all()
 
@@ -77,8 +77,14 @@ configure do
   CAPABILITIES_PCSD = capabilities_pcsd.freeze
 end
 
-def run_cfgsync
+# Fetch configs from the cluster nodes. Nothing is saved here, configs which
+# are newer in the cluster are returned, so they can be saved by
+# save_synced_configs while pcsd holds its config sync lock. If push is true,
+# local configs newer than the ones in the cluster are sent to the nodes which
+# do not have them yet. Nodes already having the same config are skipped.
+def run_cfgsync(push=false)
   node_connected = true
+  configs_to_save = {}
   if Cfgsync::ConfigSyncControl.sync_thread_allowed?()
     $logger.info('Config files sync started')
     begin
@@ -93,10 +99,19 @@ def run_cfgsync
           cluster_nodes,
           cluster_name
         )
-        cfgs_to_save, _, node_connected = fetcher.fetch()
+        cfgs_to_save, cfgs_to_push, node_connected = fetcher.fetch()
         cfgs_to_save.each { |cfg_to_save|
-          cfg_to_save.save()
+          configs_to_save[cfg_to_save.class.name] = cfg_to_save.text
         }
+        if push
+          cfgs_to_push.each { |cfg_to_push|
+            nodes = fetcher.nodes_with_different_config(cfg_to_push)
+            next if nodes.empty?()
+            Cfgsync::ConfigPublisher.new(
+              PCSAuth.getSuperuserAuth(), [cfg_to_push], nodes, cluster_name
+            ).send()
+          }
+        end
         $logger.info('Config files sync finished')
       else
         $logger.info(
@@ -111,10 +126,29 @@ def run_cfgsync
     $logger.info('Config files sync is disabled or paused, skipping')
   end
   if node_connected
-    return Cfgsync::ConfigSyncControl.sync_thread_interval()
+    interval = Cfgsync::ConfigSyncControl.sync_thread_interval()
   else
-    return Cfgsync::ConfigSyncControl.sync_thread_interval_previous_not_connected()
+    interval = Cfgsync::ConfigSyncControl.sync_thread_interval_previous_not_connected()
   end
+  return interval, configs_to_save
+end
+
+# Save configs fetched by run_cfgsync. A config may have been saved by
+# set_configs since it was fetched, so the fetched one is saved only if it is
+# still newer than the local one.
+def save_synced_configs(configs)
+  cfg_classes = Cfgsync::get_cfg_classes_by_name()
+  configs.each { |name, text|
+    next unless cfg_classes[name]
+    cfg = cfg_classes[name].from_text(text)
+    local_cfg = cfg_classes[name].from_file('')
+    if (
+      cfg.version > local_cfg.version or
+      (cfg.version == local_cfg.version and cfg.hash != local_cfg.hash)
+    )
+      cfg.save()
+    end
+  }
 end
 
 helpers do
@@ -1,63 +1,138 @@
 require "base64"
 require "date"
 require "json"
+require "stringio"
+require "tempfile"
 
-request_json = ARGF.read()
+def process_request(request, body=nil)
+  if !request.include?("type")
+    return {:error => "Type not specified", :logs => []}
+  end
 
-begin
-  request = JSON.parse(request_json)
-rescue => e
-  puts e
-  exit
+  $tornado_logs = []
+  # A worker process handles many requests. Do not let session information of
+  # a previous request leak to the current one.
+  $tornado_username = nil
+  $tornado_groups = nil
+  $tornado_is_authenticated = nil
+
+  require 'pcsd'
+
+  if ["sinatra_gui", "sinatra_remote"].include?(request["type"])
+    if request["type"] == "sinatra_gui"
+      $tornado_username = request["session"]["username"]
+      $tornado_groups = request["session"]["groups"]
+      $tornado_is_authenticated = request["session"]["is_authenticated"]
+    end
+
+    set :logging, true
+    set :run, false
+    # Do not turn exceptions into fancy 100kB HTML pages and print them on
+    # stdout. Instead, rack.errors is logged and therefore returned in
+    # result[:log].
+    set :show_exceptions, false
+    app = [Sinatra::Application][0]
+
+    env = request["env"]
+    env["rack.input"] = body || StringIO.new(env["rack.input"])
+    env["rack.errors"] = StringIO.new()
+
+    status, headers, body = app.call(env)
+    rack_errors = env['rack.errors'].string()
+    if not rack_errors.empty?()
+      $logger.error(rack_errors)
+    end
+
+    result = {
+      :status => status,
+      :headers => headers,
+      :body => Base64.encode64(body.join("")),
+    }
+
+  elsif request["type"] == "sync_configs"
+    interval, configs = run_cfgsync(request["push"])
+    result = {
+      :next => Time.now.to_i + interval,
+      :configs => configs,
+    }
+  elsif request["type"] == "sync_configs_save"
+    save_synced_configs(request["configs"])
+    result = {}
+  else
+    result = {:error => "Unknown type: '#{request["type"]}'"}
+  end
+
+  result[:logs] = $tornado_logs
+  return result
 end
 
-if !request.include?("type")
-  result = {:error => "Type not specified"}
-  print result.to_json
-  exit
+# A streamed request body follows its request as chunks framed the same way as
+# requests and terminated by an empty frame. It is stored in a temporary file so
+# big uploads are not held in memory.
+def read_body_stream(input)
+  body = Tempfile.new("pcsd-request-body")
+  body.binmode
+  while (header = input.gets) and header.to_i > 0
+    body.write(input.read(header.to_i))
+  end
+  body.rewind
+  return body
 end
 
-$tornado_logs = []
+def write_frame(stream, data)
+  json = data.to_json
+  stream.write("#{json.bytesize}\n")
+  stream.write(json)
+  stream.flush
+end
 
-require 'pcsd'
+# In the worker mode the process handles requests until its stdin is closed.
+# Each request and each response is framed: a line with the length of the json
+# document in bytes followed by the json document itself. Once pcsd is loaded,
+# the worker sends a frame with the logs of loading to tell it is ready.
+if ENV["PCSD_RUBY_WORKER"] == "true"
+  $stdin.binmode
+  response_stream = $stdout.dup
+  response_stream.binmode
+  # Anything printed by the handlers must not break the framing.
+  $stdout = $stderr
 
-if ["sinatra_gui", "sinatra_remote"].include?(request["type"])
-  if request["type"] == "sinatra_gui"
-    $tornado_username = request["session"]["username"]
-    $tornado_groups = request["session"]["groups"]
-    $tornado_is_authenticated = request["session"]["is_authenticated"]
-  end
+  $tornado_logs = []
+  require 'pcsd'
+  write_frame(response_stream, {:logs => $tornado_logs})
 
-  set :logging, true
-  set :run, false
-  # Do not turn exceptions into fancy 100kB HTML pages and print them on stdout.
-  # Instead, rack.errors is logged and therefore returned in result[:log].
-  set :show_exceptions, false
-  app = [Sinatra::Application][0]
-
-  env = request["env"]
-  env["rack.input"] = StringIO.new(env["rack.input"])
-  env["rack.errors"] = StringIO.new()
-
-  status, headers, body = app.call(env)
-  rack_errors = env['rack.errors'].string()
-  if not rack_errors.empty?()
-    $logger.error(rack_errors)
+  while (header = $stdin.gets)
+    request_json = $stdin.read(header.to_i).force_encoding("UTF-8")
+    begin
+      request = JSON.parse(request_json)
+    rescue JSON::ParserError => e
+      # It is not known whether body frames follow the request, they cannot be
+      # told apart from the next request. Stop the worker, pcsd starts a new
+      # one.
+      write_frame(response_stream, {:error => e.to_s, :logs => []})
+      break
+    end
+    body = nil
+    begin
+      body = read_body_stream($stdin) if request["body_stream"]
+      result = process_request(request, body)
+    rescue StandardError => e
+      result = {:error => "#{e.class}: #{e}", :logs => $tornado_logs}
+    ensure
+      body.close! if body
+    end
+    write_frame(response_stream, result)
   end
+  exit
+end
 
-  result = {
-    :status => status,
-    :headers => headers,
-    :body => Base64.encode64(body.join("")),
-  }
-
-elsif request["type"] == "sync_configs"
-  result = {
-    :next => Time.now.to_i + run_cfgsync()
-  }
-else
-  result = {:error => "Unknown type: '#{request["type"]}'"}
+request_json = ARGF.read()
+
+begin
+  request = JSON.parse(request_json)
+rescue => e
+  puts e
+  exit
 end
 
-result[:logs] = $tornado_logs
-print result.to_json
+print process_request(request).to_json
@@ -720,6 +720,35 @@ class TestConfigFetcher < Test::Unit::TestCase
     })
     assert_equal([[], [], true], fetcher.fetch())
   end
+
+  def test_nodes_with_different_config()
+    cfg1 = Cfgsync::PcsdSettings.from_text(
+      '{"data_version": 1, "format_version": 2}'
+    )
+    cfg3 = Cfgsync::PcsdSettings.from_text(
+      '{"data_version": 2, "clusters": [], "format_version": 2}'
+    )
+    cfg4 = Cfgsync::PcsdSettings.from_text(
+      '{"data_version": 2, "format_version": 2}'
+    )
+    cfg_name = Cfgsync::PcsdSettings.name
+    fetcher = ConfigFetcherMock.new({}, [Cfgsync::PcsdSettings], nil, nil)
+
+    # nothing fetched yet
+    assert_equal([], fetcher.nodes_with_different_config(cfg3))
+
+    fetcher.set_configs_local({cfg_name => cfg3})
+    fetcher.set_configs_cluster({
+      'node1' => {cfg_name => cfg1},
+      'node2' => {cfg_name => cfg3},
+      'node3' => {cfg_name => cfg4},
+      'node4' => {},
+    })
+    fetcher.fetch()
+    assert_equal(
+      ['node1', 'node3', 'node4'], fetcher.nodes_with_different_config(cfg3)
+    )
+  end
 end
 
 